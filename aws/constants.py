@@ -1,3 +1,33 @@
 AWS_SDK_PANDAS_LAYER_ARN: str = "arn:aws:lambda:ap-southeast-1:336392948345:layer:AWSSDKPandas-Python311:16"
+# "incremental" downloads the archives of recently added matches, falling back to the complete archive when they do not cover the gap
+CRICSHEET_DATA_DOWNLOAD_MODE: str = "full"
+# Decoder of the cricsheet JSON files in the extraction lambdas, "fast" uses orjson, "typed" decodes only the fields of the
+# cricsheet schema which are extracted with msgspec, and "standard" uses the json module
+CRICSHEET_JSON_DECODER: str = "fast"
+# "full" rebuilds the dataset from MongoDB, "incremental" prepares it from the previously published CSVs and the matches added
+# since, and "streaming" rebuilds it a few matches at a time with a multipart upload to keep the memory flat
+DATASET_EXPORT_MODE: str = "full"
+# Codec of the published CSV files, one of "gzip", "zstd" or "none", the Parquet files use it for their pages as well
+DATASET_OUTPUT_COMPRESSION: str = "none"
+# When enabled, the new cricsheet files of a run are uploaded as a single bundle which the unified extraction lambda iterates over
+ENABLE_BUNDLED_NEW_MATCH_UPLOAD: bool = False
+# When enabled, the dataset is also published as Parquet files with dictionary encoded string columns
+ENABLE_PARQUET_OUTPUT: bool = False
+# When enabled, S3 events of new cricsheet files are buffered in SQS and the extraction lambdas process them in batches
+ENABLE_SQS_BATCHED_DATA_EXTRACTION: bool = False
+# When enabled, the lambdas queue their execution status in SQS and a scheduled lambda sends them to Telegram as a single digest,
+# only the failures of a lambda handler itself are still sent right away
+ENABLE_TELEGRAM_NOTIFICATION_DIGEST: bool = False
+# When enabled, a single lambda extracts both the matchwise and deliverywise data of a new cricsheet file from one parse
+ENABLE_UNIFIED_MATCH_DATA_EXTRACTION: bool = False
+# Maximum number of upserts and deletes sent to MongoDB in a single bulk write by the extraction lambdas
+MONGO_DB_BULK_WRITE_CHUNK_SIZE: str = "1000"
+# Number of documents the dataset export fetches from MongoDB in every round trip of its cursors
+MONGO_DB_EXPORT_CURSOR_BATCH_SIZE: str = "10000"
+# Number of threads uploading the new cricsheet files to S3 in parallel
+S3_UPLOAD_CONCURRENCY: str = "8"
+SQS_BATCH_SIZE_FOR_DATA_EXTRACTION: int = 25
+SQS_MAXIMUM_BATCHING_WINDOW_IN_SECONDS_FOR_DATA_EXTRACTION: int = 60
 SSM_PARAMETER_PREFIX: str = "/cdk/stack/mens-t20i-dataset/"
+TELEGRAM_NOTIFICATION_DIGEST_INTERVAL_IN_MINUTES: int = 60
 THRESHOLD_FOR_NUMBER_OF_FILES_TO_BE_SENT_FOR_PROCESSING: str = "10"
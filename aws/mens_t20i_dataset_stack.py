@@ -14,7 +14,28 @@ from aws_cdk import (
 )
 import boto3
 from constructs import Construct
-from constants import AWS_SDK_PANDAS_LAYER_ARN, THRESHOLD_FOR_NUMBER_OF_FILES_TO_BE_SENT_FOR_PROCESSING
+from constants import (
+    AWS_SDK_PANDAS_LAYER_ARN,
+    CRICSHEET_DATA_DOWNLOAD_MODE,
+    CRICSHEET_JSON_DECODER,
+    DATASET_EXPORT_MODE,
+    DATASET_OUTPUT_COMPRESSION,
+    ENABLE_BUNDLED_NEW_MATCH_UPLOAD,
+    ENABLE_PARQUET_OUTPUT,
+    ENABLE_SQS_BATCHED_DATA_EXTRACTION,
+    ENABLE_TELEGRAM_NOTIFICATION_DIGEST,
+    ENABLE_UNIFIED_MATCH_DATA_EXTRACTION,
+    MONGO_DB_BULK_WRITE_CHUNK_SIZE,
+    MONGO_DB_EXPORT_CURSOR_BATCH_SIZE,
+    S3_UPLOAD_CONCURRENCY,
+    SQS_BATCH_SIZE_FOR_DATA_EXTRACTION,
+    SQS_MAXIMUM_BATCHING_WINDOW_IN_SECONDS_FOR_DATA_EXTRACTION,
+    TELEGRAM_NOTIFICATION_DIGEST_INTERVAL_IN_MINUTES,
+    THRESHOLD_FOR_NUMBER_OF_FILES_TO_BE_SENT_FOR_PROCESSING,
+)
+# The names of the published files are taken from the lambda package, which is installed along with the build scripts
+from mens_t20i_data_collector._lambdas.constants import DELIVERYWISE_DATA_CSV_FILE_NAME
+from mens_t20i_data_collector._lambdas.dataset_output_compressor import get_dataset_output_file_name
 from parameters import (
     DELIVERYWISE_DATA_COLLECTION_NAME,
     MATCHWISE_DATA_COLLECTION_NAME,
@@ -68,7 +89,17 @@ class MenT20IDatasetStack(Stack):
             visibility_timeout=Duration.minutes(15),
             delivery_delay=Duration.minutes(5),
         )
-
+        # SQS queue collecting the execution status of the lambdas for the Telegram notification digest
+        sqs_queue_to_collect_execution_status_for_notification_digest = sqs.Queue(
+            self,
+            f"{stack_name}-sqs_queue_to_collect_execution_status_for_notification_digest",
+            visibility_timeout=Duration.minutes(15),
+        ) if ENABLE_TELEGRAM_NOTIFICATION_DIGEST else None
+        # Timeout of the data extraction lambdas, longer in batched mode since a single invocation processes several files
+        data_extraction_lambda_timeout = Duration.minutes(5) if ENABLE_SQS_BATCHED_DATA_EXTRACTION else Duration.minutes(1)
+        data_extraction_lambda_handler_name = "batch_handler" if ENABLE_SQS_BATCHED_DATA_EXTRACTION else "handler"
+        # Bundles of new cricsheet files are consumed by the unified data extraction lambda only
+        is_unified_match_data_extraction_enabled = ENABLE_UNIFIED_MATCH_DATA_EXTRACTION or ENABLE_BUNDLED_NEW_MATCH_UPLOAD
         ########################################  SECRET MANAGER Configurations ##########################################
         __db_secrets = {
             "DELIVERYWISE_DATA_COLLECTION_NAME": DELIVERYWISE_DATA_COLLECTION_NAME,
@@ -81,6 +112,11 @@ class MenT20IDatasetStack(Stack):
             "KAGGLE_SECRET_KEY": KAGGLE_SECRET_KEY,
             "KAGGLE_USERNAME": KAGGLE_USERNAME,
         }
+        __telegram_notification_settings = {
+            "ENABLE_TELEGRAM_NOTIFICATION_DIGEST": "true" if ENABLE_TELEGRAM_NOTIFICATION_DIGEST else "false",
+        }
+        if sqs_queue_to_collect_execution_status_for_notification_digest is not None:
+            __telegram_notification_settings["TELEGRAM_NOTIFICATION_QUEUE_URL"] = sqs_queue_to_collect_execution_status_for_notification_digest.queue_url
 
         ########################################  LAMBDA LAYER Configurations ##########################################
 
@@ -105,12 +141,16 @@ class MenT20IDatasetStack(Stack):
             handler="download_from_cricsheet_lambda_function.handler",
             runtime=_lambda.Runtime.PYTHON_3_11,
             environment={
+                "CRICSHEET_DATA_DOWNLOAD_MODE": CRICSHEET_DATA_DOWNLOAD_MODE,
+                "CRICSHEET_DATA_UPLOAD_MODE": "bundle" if ENABLE_BUNDLED_NEW_MATCH_UPLOAD else "files",
                 "DELAYED_SQS_QUEUE_URL": sqs_queue_to_send_delayed_message_when_new_file_is_downloaded.queue_url,
                 "DOWNLOAD_BUCKET_NAME": cricsheet_data_downloading_bucket.bucket_name,
                 "DYNAMODB_TABLE_NAME": dynamodb_to_store_file_status_data.table_name,
+                "S3_UPLOAD_CONCURRENCY": S3_UPLOAD_CONCURRENCY,
                 "THRESHOLD_FOR_NUMBER_OF_FILES_TO_BE_SENT_FOR_PROCESSING": THRESHOLD_FOR_NUMBER_OF_FILES_TO_BE_SENT_FOR_PROCESSING,
                 "TELEGRAM_BOT_TOKEN": TELEGRAM_BOT_TOKEN,
                 "TELEGRAM_CHAT_ID": TELEGRAM_CHAT_ID,
+                **__telegram_notification_settings,
             },
             function_name=f"{stack_name}-cricsheet-data-downloading-lambda",
             layers=[
@@ -155,22 +195,24 @@ class MenT20IDatasetStack(Stack):
             self,
             f"{stack_name}-cricsheet-deliverywise-data-extraction-lambda",
             code=_lambda.Code.from_asset("output/extract_deliverywise_cricsheet_data_lambda_function.zip"),
-            handler="extract_deliverywise_cricsheet_data_lambda_function.handler",
+            handler=f"extract_deliverywise_cricsheet_data_lambda_function.{data_extraction_lambda_handler_name}",
             runtime=_lambda.Runtime.PYTHON_3_11,
             environment={
+                "CRICSHEET_JSON_DECODER": CRICSHEET_JSON_DECODER,
                 "DOWNLOAD_BUCKET_NAME": cricsheet_data_downloading_bucket.bucket_name,
                 **__db_secrets,
                 "DYNAMODB_TABLE_NAME": dynamodb_to_store_file_status_data.table_name,
+                "MONGO_DB_BULK_WRITE_CHUNK_SIZE": MONGO_DB_BULK_WRITE_CHUNK_SIZE,
                 "TELEGRAM_BOT_TOKEN": TELEGRAM_BOT_TOKEN,
                 "TELEGRAM_CHAT_ID": TELEGRAM_CHAT_ID,
+                **__telegram_notification_settings,
             },
             function_name=f"{stack_name}-deliverywise-data-extraction-lambda",
             layers=[
                 package_layer,
-                pandas_layer,
             ],
             memory_size=300,
-            timeout=Duration.minutes(1),
+            timeout=data_extraction_lambda_timeout,
         )
         # Permissions for lambda functions to the S3 bucket
         cricsheet_data_downloading_bucket.grant_read_write(cricsheet_deliverywise_data_extraction_lambda)
@@ -187,53 +229,38 @@ class MenT20IDatasetStack(Stack):
                 resources=["*"],
             )
         )
-        event_bridge_rule_to_trigger_deliverywise_data_extraction_lambda = events.Rule(
-            self,
-            f"{stack_name}_event_bridge_rule_to_trigger_deliverywise_data_extraction_lambda",
-            event_pattern=events.EventPattern(
-                source=["aws.s3"],
-                detail_type=["Object Created"],
-                detail={
-                    "bucket": {
-                        "name": [cricsheet_data_downloading_bucket.bucket_name]
-                    },
-                    "object": {
-                        "key": [{"prefix": "cricsheet_data/processed_data"}]
-                    }
-                },
-            ),
-        )
-        event_bridge_rule_to_trigger_deliverywise_data_extraction_lambda.add_target(
-            events_targets.LambdaFunction(cricsheet_deliverywise_data_extraction_lambda)
-        )
-        cricsheet_deliverywise_data_extraction_lambda.add_permission(
-            "allow-s3-to-trigger-delivery-wise-data-extraction-lambda",
-            principal=iam.ServicePrincipal("s3.amazonaws.com"),
-            action="lambda:InvokeFunction",
-            source_arn=event_bridge_rule_to_trigger_deliverywise_data_extraction_lambda.rule_arn,
-        )
+        if not is_unified_match_data_extraction_enabled:
+            self._trigger_data_extraction_lambda_for_new_cricsheet_files(
+                stack_name=stack_name,
+                data_extraction_type="deliverywise",
+                permission_id="allow-s3-to-trigger-delivery-wise-data-extraction-lambda",
+                cricsheet_data_downloading_bucket=cricsheet_data_downloading_bucket,
+                data_extraction_lambda=cricsheet_deliverywise_data_extraction_lambda,
+            )
 
         # Lambda function for extracting matchwise cricsheet data
         cricsheet_matchwise_data_extraction_lambda = _lambda.Function(
             self,
             f"{stack_name}-cricsheet-matchwise-data-extraction-lambda",
             code=_lambda.Code.from_asset("output/extract_matchwise_cricsheet_data_lambda_function.zip"),
-            handler="extract_matchwise_cricsheet_data_lambda_function.handler",
+            handler=f"extract_matchwise_cricsheet_data_lambda_function.{data_extraction_lambda_handler_name}",
             runtime=_lambda.Runtime.PYTHON_3_11,
             environment={
+                "CRICSHEET_JSON_DECODER": CRICSHEET_JSON_DECODER,
                 "DOWNLOAD_BUCKET_NAME": cricsheet_data_downloading_bucket.bucket_name,
                 **__db_secrets,
                 "DYNAMODB_TABLE_NAME": dynamodb_to_store_file_status_data.table_name,
+                "MONGO_DB_BULK_WRITE_CHUNK_SIZE": MONGO_DB_BULK_WRITE_CHUNK_SIZE,
                 "TELEGRAM_BOT_TOKEN": TELEGRAM_BOT_TOKEN,
                 "TELEGRAM_CHAT_ID": TELEGRAM_CHAT_ID,
+                **__telegram_notification_settings,
             },
             function_name=f"{stack_name}-matchwise-data-extraction-lambda",
             layers=[
                 package_layer,
-                pandas_layer,
             ],
             memory_size=300,
-            timeout=Duration.minutes(1),
+            timeout=data_extraction_lambda_timeout,
         )
         # Permissions for lambda functions to the S3 bucket
         cricsheet_data_downloading_bucket.grant_read_write(cricsheet_matchwise_data_extraction_lambda)
@@ -250,31 +277,67 @@ class MenT20IDatasetStack(Stack):
                 resources=["*"],
             )
         )
-        event_bridge_rule_to_trigger_matchwise_data_extraction_lambda = events.Rule(
-            self,
-            f"{stack_name}_event_bridge_rule_to_trigger_matchwise_data_extraction_lambda",
-            event_pattern=events.EventPattern(
-                source=["aws.s3"],
-                detail_type=["Object Created"],
-                detail={
-                    "bucket": {
-                        "name": [cricsheet_data_downloading_bucket.bucket_name]
-                    },
-                    "object": {
-                        "key": [{"prefix": "cricsheet_data/processed_data"}]
-                    }
+        if not is_unified_match_data_extraction_enabled:
+            self._trigger_data_extraction_lambda_for_new_cricsheet_files(
+                stack_name=stack_name,
+                data_extraction_type="matchwise",
+                permission_id="allow-s3-to-trigger-match-wise-data-extraction-lambda",
+                cricsheet_data_downloading_bucket=cricsheet_data_downloading_bucket,
+                data_extraction_lambda=cricsheet_matchwise_data_extraction_lambda,
+            )
+
+        # Lambda function for extracting both matchwise and deliverywise cricsheet data from a single parse of the file
+        if is_unified_match_data_extraction_enabled:
+            cricsheet_match_data_extraction_lambda = _lambda.Function(
+                self,
+                f"{stack_name}-cricsheet-match-data-extraction-lambda",
+                code=_lambda.Code.from_asset("output/extract_cricsheet_match_data_lambda_function.zip"),
+                handler=(
+                    "extract_cricsheet_match_data_lambda_function.bundle_handler" if ENABLE_BUNDLED_NEW_MATCH_UPLOAD
+                    else f"extract_cricsheet_match_data_lambda_function.{data_extraction_lambda_handler_name}"
+                ),
+                runtime=_lambda.Runtime.PYTHON_3_11,
+                environment={
+                    "CRICSHEET_JSON_DECODER": CRICSHEET_JSON_DECODER,
+                    "DOWNLOAD_BUCKET_NAME": cricsheet_data_downloading_bucket.bucket_name,
+                    **__db_secrets,
+                    "DYNAMODB_TABLE_NAME": dynamodb_to_store_file_status_data.table_name,
+                    "MONGO_DB_BULK_WRITE_CHUNK_SIZE": MONGO_DB_BULK_WRITE_CHUNK_SIZE,
+                    "TELEGRAM_BOT_TOKEN": TELEGRAM_BOT_TOKEN,
+                    "TELEGRAM_CHAT_ID": TELEGRAM_CHAT_ID,
+                    **__telegram_notification_settings,
                 },
-            ),
-        )
-        event_bridge_rule_to_trigger_matchwise_data_extraction_lambda.add_target(
-            events_targets.LambdaFunction(cricsheet_matchwise_data_extraction_lambda)
-        )
-        cricsheet_matchwise_data_extraction_lambda.add_permission(
-            "allow-s3-to-trigger-match-wise-data-extraction-lambda",
-            principal=iam.ServicePrincipal("s3.amazonaws.com"),
-            action="lambda:InvokeFunction",
-            source_arn=event_bridge_rule_to_trigger_matchwise_data_extraction_lambda.rule_arn,
-        )
+                function_name=f"{stack_name}-match-data-extraction-lambda",
+                layers=[
+                    package_layer,
+                ],
+                memory_size=1024 if ENABLE_BUNDLED_NEW_MATCH_UPLOAD else 300,
+                timeout=Duration.minutes(10) if ENABLE_BUNDLED_NEW_MATCH_UPLOAD else data_extraction_lambda_timeout,
+            )
+            # Permissions for lambda functions to the S3 bucket
+            cricsheet_data_downloading_bucket.grant_read_write(cricsheet_match_data_extraction_lambda)
+            # Permissions for lambda functions to the DynamoDB table
+            dynamodb_to_store_file_status_data.grant_read_write_data(cricsheet_match_data_extraction_lambda)
+            # Policy for CloudWatch logging
+            cricsheet_match_data_extraction_lambda.add_to_role_policy(
+                iam.PolicyStatement(
+                    actions=[
+                        "logs:CreateLogGroup",
+                        "logs:CreateLogStream",
+                        "logs:PutLogEvents",
+                    ],
+                    resources=["*"],
+                )
+            )
+            self._trigger_data_extraction_lambda_for_new_cricsheet_files(
+                stack_name=stack_name,
+                data_extraction_type="match",
+                permission_id="allow-s3-to-trigger-match-data-extraction-lambda",
+                cricsheet_data_downloading_bucket=cricsheet_data_downloading_bucket,
+                data_extraction_lambda=cricsheet_match_data_extraction_lambda,
+                s3_key_prefix="cricsheet_data/bundle_indexes" if ENABLE_BUNDLED_NEW_MATCH_UPLOAD else "cricsheet_data/processed_data",
+                buffer_events_in_sqs_queue=ENABLE_SQS_BATCHED_DATA_EXTRACTION and not ENABLE_BUNDLED_NEW_MATCH_UPLOAD,
+            )
 
         # Lambda function to convert the stored data in MongoDB table to CSV and store in S3
         convert_mongodb_data_to_csv_lambda = _lambda.Function(
@@ -284,10 +347,15 @@ class MenT20IDatasetStack(Stack):
             handler="convert_mongo_db_data_to_csv_lambda.handler",
             runtime=_lambda.Runtime.PYTHON_3_11,
             environment={
+                "DATASET_EXPORT_MODE": DATASET_EXPORT_MODE,
+                "DATASET_OUTPUT_COMPRESSION": DATASET_OUTPUT_COMPRESSION,
                 "DOWNLOAD_BUCKET_NAME": cricsheet_data_downloading_bucket.bucket_name,
+                "ENABLE_PARQUET_OUTPUT": "true" if ENABLE_PARQUET_OUTPUT else "false",
+                "MONGO_DB_EXPORT_CURSOR_BATCH_SIZE": MONGO_DB_EXPORT_CURSOR_BATCH_SIZE,
                 **__db_secrets,
                 "TELEGRAM_BOT_TOKEN": TELEGRAM_BOT_TOKEN,
                 "TELEGRAM_CHAT_ID": TELEGRAM_CHAT_ID,
+                **__telegram_notification_settings,
             },
             function_name=f"{stack_name}-convert-mongo-data-to-csv-lambda",
             layers=[
@@ -327,10 +395,13 @@ class MenT20IDatasetStack(Stack):
             handler="upload_dataset_to_kaggle_lambda.handler",
             runtime=_lambda.Runtime.PYTHON_3_11,
             environment={
+                "DATASET_OUTPUT_COMPRESSION": DATASET_OUTPUT_COMPRESSION,
                 "DOWNLOAD_BUCKET_NAME": cricsheet_data_downloading_bucket.bucket_name,
+                "ENABLE_PARQUET_OUTPUT": "true" if ENABLE_PARQUET_OUTPUT else "false",
                 **__kaggle_secrets,
                 "TELEGRAM_BOT_TOKEN": TELEGRAM_BOT_TOKEN,
                 "TELEGRAM_CHAT_ID": TELEGRAM_CHAT_ID,
+                **__telegram_notification_settings,
             },
             function_name=f"{stack_name}-upload-dataset-to-kaggle-lambda",
             layers=[
@@ -346,7 +417,7 @@ class MenT20IDatasetStack(Stack):
         cricsheet_data_downloading_bucket.add_event_notification(
             s3.EventType.OBJECT_CREATED,
             s3_notifications.LambdaDestination(upload_dataset_to_kaggle_lambda),
-            s3.NotificationKeyFilter(prefix="output/", suffix="deliverywise_data.csv"),
+            s3.NotificationKeyFilter(prefix="output/", suffix=get_dataset_output_file_name(DELIVERYWISE_DATA_CSV_FILE_NAME, DATASET_OUTPUT_COMPRESSION)),
         )
         # Policy for CloudWatch logging
         upload_dataset_to_kaggle_lambda.add_to_role_policy(
@@ -359,3 +430,113 @@ class MenT20IDatasetStack(Stack):
                 resources=["*"],
             )
         )
+
+        # Lambda function to send the queued execution status of the lambdas to Telegram as a single digest
+        if sqs_queue_to_collect_execution_status_for_notification_digest is not None:
+            send_notification_digest_lambda = _lambda.Function(
+                self,
+                f"{stack_name}-send-notification-digest-lambda",
+                code=_lambda.Code.from_asset("output/send_notification_digest_lambda.zip"),
+                handler="send_notification_digest_lambda.handler",
+                runtime=_lambda.Runtime.PYTHON_3_11,
+                environment={
+                    "TELEGRAM_BOT_TOKEN": TELEGRAM_BOT_TOKEN,
+                    "TELEGRAM_CHAT_ID": TELEGRAM_CHAT_ID,
+                    "TELEGRAM_NOTIFICATION_QUEUE_URL": sqs_queue_to_collect_execution_status_for_notification_digest.queue_url,
+                },
+                function_name=f"{stack_name}-send-notification-digest-lambda",
+                layers=[
+                    package_layer,
+                ],
+                timeout=Duration.minutes(5),
+            )
+            sqs_queue_to_collect_execution_status_for_notification_digest.grant_consume_messages(send_notification_digest_lambda)
+            # Policy for CloudWatch logging
+            send_notification_digest_lambda.add_to_role_policy(
+                iam.PolicyStatement(
+                    actions=[
+                        "logs:CreateLogGroup",
+                        "logs:CreateLogStream",
+                        "logs:PutLogEvents",
+                    ],
+                    resources=["*"],
+                )
+            )
+            # Granting permissions to the Lambda functions to queue their execution status
+            for lambda_function in [
+                cricsheet_data_downloading_lambda,
+                cricsheet_deliverywise_data_extraction_lambda,
+                cricsheet_matchwise_data_extraction_lambda,
+                convert_mongodb_data_to_csv_lambda,
+                upload_dataset_to_kaggle_lambda,
+            ] + ([cricsheet_match_data_extraction_lambda] if is_unified_match_data_extraction_enabled else []):
+                sqs_queue_to_collect_execution_status_for_notification_digest.grant_send_messages(lambda_function)
+            # EventBridge Rule to send the digest periodically
+            events.Rule(
+                self,
+                f"{stack_name}_event_bridge_rule_to_trigger_send_notification_digest_lambda",
+                schedule=events.Schedule.rate(Duration.minutes(TELEGRAM_NOTIFICATION_DIGEST_INTERVAL_IN_MINUTES)),
+                targets=[
+                    events_targets.LambdaFunction(send_notification_digest_lambda)
+                ],
+            )
+
+    def _trigger_data_extraction_lambda_for_new_cricsheet_files(
+        self,
+        stack_name: str,
+        data_extraction_type: str,
+        permission_id: str,
+        cricsheet_data_downloading_bucket: s3.Bucket,
+        data_extraction_lambda: _lambda.Function,
+        s3_key_prefix: str = "cricsheet_data/processed_data",
+        buffer_events_in_sqs_queue: bool = ENABLE_SQS_BATCHED_DATA_EXTRACTION,
+    ) -> None:
+        """
+        Triggers the data extraction lambda whenever a new cricsheet file or bundle is placed for processing, either directly
+        through an EventBridge rule or, in batched mode, through an SQS queue buffering the EventBridge events.
+        """
+        event_bridge_rule_to_trigger_data_extraction_lambda = events.Rule(
+            self,
+            f"{stack_name}_event_bridge_rule_to_trigger_{data_extraction_type}_data_extraction_lambda",
+            event_pattern=events.EventPattern(
+                source=["aws.s3"],
+                detail_type=["Object Created"],
+                detail={
+                    "bucket": {
+                        "name": [cricsheet_data_downloading_bucket.bucket_name]
+                    },
+                    "object": {
+                        "key": [{"prefix": s3_key_prefix}]
+                    }
+                },
+            ),
+        )
+        if buffer_events_in_sqs_queue:
+            # SQS queue to buffer the events of new files, so that the lambda processes them in batches
+            sqs_queue_to_buffer_new_files_for_data_extraction = sqs.Queue(
+                self,
+                f"{stack_name}-sqs_queue_to_buffer_new_files_for_{data_extraction_type}_data_extraction",
+                visibility_timeout=Duration.minutes(30),
+            )
+            event_bridge_rule_to_trigger_data_extraction_lambda.add_target(
+                events_targets.SqsQueue(sqs_queue_to_buffer_new_files_for_data_extraction)
+            )
+            data_extraction_lambda.add_event_source(
+                lambda_event_sources.SqsEventSource(
+                    sqs_queue_to_buffer_new_files_for_data_extraction,
+                    batch_size=SQS_BATCH_SIZE_FOR_DATA_EXTRACTION,
+                    max_batching_window=Duration.seconds(SQS_MAXIMUM_BATCHING_WINDOW_IN_SECONDS_FOR_DATA_EXTRACTION),
+                    report_batch_item_failures=True,
+                    enabled=True,
+                )
+            )
+        else:
+            event_bridge_rule_to_trigger_data_extraction_lambda.add_target(
+                events_targets.LambdaFunction(data_extraction_lambda)
+            )
+        data_extraction_lambda.add_permission(
+            permission_id,
+            principal=iam.ServicePrincipal("s3.amazonaws.com"),
+            action="lambda:InvokeFunction",
+            source_arn=event_bridge_rule_to_trigger_data_extraction_lambda.rule_arn,
+        )
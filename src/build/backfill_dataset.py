@@ -0,0 +1,292 @@
+"""
+This module rebuilds the whole dataset from a local Cricsheet archive on a single machine, instead of sending every file through
+the lambdas a few at a time.
+
+The matches of the archive are parsed in parallel by a pool of processes, with the same extraction logic as the unified
+extraction lambda, a few dozen matches per task. The parsed matches are either bulk loaded into MongoDB, from where the dataset
+export lambda publishes them, or written straight to the dataset files in a local folder. Only men's T20I matches are loaded,
+like the download lambda does for the archives of recently added matches.
+
+When loading MongoDB, the settings of the lambdas are read from the same environmental variables, like `MONGO_DB_URL` and
+`MONGO_DB_NAME`. With `--mark-files-processed`, the files are also recorded in the DynamoDB table of the data extraction status
+and in the processed files manifest, so that the next run of the download lambda does not send them for processing again.
+
+Functions:
+- `backfill_dataset()`: Parses every match of the archive in parallel and loads the parsed matches.
+- `_load_matches_parsed_in_parallel(arguments, member_names, loader)`: Parses the matches with a pool of processes and loads them.
+- `_extract_matches_of_cricsheet_zip(cricsheet_zip_path, member_names, json_decoder_name)`: Parses the given matches of the archive, in a worker process.
+- `MongoDbBackfillLoader`: Upserts the parsed matches into MongoDB and optionally marks their files as processed.
+- `DatasetFilesBackfillLoader`: Collects the parsed matches and writes them as the CSV files of the dataset.
+
+Usage:
+Run `backfill_dataset --cricsheet-zip t20s_male_json.zip` to load MongoDB, or add `--output-folder dataset` to write the dataset files.
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+import pandas as pd
+from build.constants import BACKFILL_MATCHES_PER_TASK
+from mens_t20i_data_collector._lambdas.client_registry import (
+    get_boto3_client,
+    get_boto3_resource,
+    get_mongo_db_client
+)
+from mens_t20i_data_collector._lambdas.constants import (
+    CRICSHEET_JSON_DECODERS,
+    DELIVERYWISE_DATA_CSV_FILE_NAME,
+    DELIVERYWISE_DATAFRAME_COLUMNS,
+    MATCHWISE_DATA_CSV_FILE_NAME,
+    MENS_T20I_MATCH_INFO
+)
+from mens_t20i_data_collector._lambdas.cricsheet_json_decoder import (
+    get_cricsheet_json_decoder
+)
+from mens_t20i_data_collector._lambdas.dataset_export_query import (
+    DatasetExportQuery
+)
+from mens_t20i_data_collector._lambdas.dataset_output_compressor import (
+    DatasetOutputCompressor,
+    get_dataset_output_file_name
+)
+from mens_t20i_data_collector._lambdas.extract_cricsheet_match_data.extract_cricsheet_match_data_lambda_function import (
+    CricsheetMatchDataExtractionHandler
+)
+from mens_t20i_data_collector._lambdas.processed_files_manifest import (
+    ProcessedFilesManifest
+)
+from mens_t20i_data_collector._lambdas.utils import (
+    get_environmental_variable_value,
+    make_dynamodb_entries_for_file_data_extraction_status_of_multiple_matches,
+    upsert_documents_of_multiple_matches_in_mongodb
+)
+
+# Logging configuration
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+
+class MongoDbBackfillLoader:
+
+    """Upserts the parsed matches into the MongoDB collections of the lambdas, one bulk write per collection for every task."""
+
+    def __init__(self, mark_files_processed: bool, content_crc32s_by_file: Dict[str, int]) -> None:
+        """
+        :param mark_files_processed: Whether to record the loaded files in the DynamoDB table of the data extraction status
+            and in the processed files manifest
+        :param content_crc32s_by_file: CRC32 of every file of the archive, recorded along with the loaded files
+        """
+        mongo_db = get_mongo_db_client(get_environmental_variable_value("MONGO_DB_URL"))[get_environmental_variable_value("MONGO_DB_NAME")]
+        self._matchwise_data_mongo_collection = mongo_db[get_environmental_variable_value("MATCHWISE_DATA_COLLECTION_NAME")]
+        self._deliverywise_data_mongo_collection = mongo_db[get_environmental_variable_value("DELIVERYWISE_DATA_COLLECTION_NAME")]
+        self._mongo_db_bulk_write_chunk_size = int(get_environmental_variable_value("MONGO_DB_BULK_WRITE_CHUNK_SIZE"))
+        self._dynamo_db_to_store_file_data_extraction_status = get_boto3_resource("dynamodb").Table(   # type: ignore
+            get_environmental_variable_value("DYNAMODB_TABLE_NAME")
+        ) if mark_files_processed else None
+        self._content_crc32s_by_file = content_crc32s_by_file
+        self._processed_files: List[str] = []
+
+    def add(self, match_data_by_file: Dict[str, Dict], delivery_records_by_file: Dict[str, List[Dict]]) -> List[str]:
+        """
+        :param match_data_by_file: Match data of every parsed match, keyed by the name of its file
+        :param delivery_records_by_file: Delivery records of every parsed match, keyed by the name of its file
+        :return: Names of the files which could not be loaded
+        """
+        failed_files = set(upsert_documents_of_multiple_matches_in_mongodb(
+            self._deliverywise_data_mongo_collection, delivery_records_by_file, self._mongo_db_bulk_write_chunk_size, remove_stale_documents=True
+        ))
+        failed_files.update(upsert_documents_of_multiple_matches_in_mongodb(
+            self._matchwise_data_mongo_collection,
+            {file: [match_data] for file, match_data in match_data_by_file.items()},
+            self._mongo_db_bulk_write_chunk_size
+        ))
+        if self._dynamo_db_to_store_file_data_extraction_status is not None:
+            failed_files.update(make_dynamodb_entries_for_file_data_extraction_status_of_multiple_matches(
+                table=self._dynamo_db_to_store_file_data_extraction_status,
+                match_ids_by_message_id={
+                    file: match_data["match_id"] for file, match_data in match_data_by_file.items() if file not in failed_files
+                },
+                fields=["deliverywise_data_extraction_status", "matchwise_data_extraction_status"],
+                content_crc32s_by_match_id={
+                    match_data["match_id"]: self._content_crc32s_by_file[file] for file, match_data in match_data_by_file.items()
+                }
+            ))
+        self._processed_files.extend(file for file in match_data_by_file if file not in failed_files)
+        return sorted(failed_files)
+
+    def close(self) -> None:
+        """
+        Adds the loaded files to the processed files manifest, once they are all recorded in DynamoDB.
+        """
+        if self._dynamo_db_to_store_file_data_extraction_status is None:
+            return
+        processed_files_manifest = ProcessedFilesManifest(get_boto3_client("s3"), get_environmental_variable_value("DOWNLOAD_BUCKET_NAME"))
+        processed_files_manifest.load()
+        processed_files_manifest.add({file: self._content_crc32s_by_file[file] for file in self._processed_files})
+        processed_files_manifest.save()
+
+
+class DatasetFilesBackfillLoader:
+
+    """Collects the parsed matches and writes them as the CSV files of the dataset, the same way the dataset export lambda does."""
+
+    def __init__(self, output_folder: str, dataset_output_compression: str) -> None:
+        """
+        :param output_folder: Folder to write the dataset files to
+        :param dataset_output_compression: Compression of the dataset files, either none, gzip or zstd
+        """
+        self._output_folder = Path(output_folder)
+        self._dataset_output_compression = dataset_output_compression
+        self._matchwise_documents: List[Dict] = []
+        # The deliveries are kept as a dataframe for every task, which takes far less memory than their records
+        self._deliverywise_dataframes: List[pd.DataFrame] = []
+
+    def add(self, match_data_by_file: Dict[str, Dict], delivery_records_by_file: Dict[str, List[Dict]]) -> List[str]:
+        """
+        :param match_data_by_file: Match data of every parsed match, keyed by the name of its file
+        :param delivery_records_by_file: Delivery records of every parsed match, keyed by the name of its file
+        :return: Names of the files which could not be loaded, which is none of them
+        """
+        self._matchwise_documents.extend({field: value for field, value in match_data.items() if field != "_id"} for match_data in match_data_by_file.values())
+        self._deliverywise_dataframes.append(pd.DataFrame(
+            [delivery_record for delivery_records in delivery_records_by_file.values() for delivery_record in delivery_records],
+            columns=DELIVERYWISE_DATAFRAME_COLUMNS
+        ))
+        return []
+
+    def close(self) -> None:
+        """
+        Numbers the matches by their date and writes the matchwise and the deliverywise CSV files.
+        """
+        matchwise_dataframe = DatasetExportQuery.prepare_matchwise_dataframe(self._matchwise_documents)
+        deliverywise_dataframe = DatasetExportQuery.merge_match_number_into_deliverywise_data(
+            pd.concat(self._deliverywise_dataframes, ignore_index=True), matchwise_dataframe
+        )
+        os.makedirs(self._output_folder, exist_ok=True)
+        for dataframe, file_name in ((matchwise_dataframe, MATCHWISE_DATA_CSV_FILE_NAME), (deliverywise_dataframe, DELIVERYWISE_DATA_CSV_FILE_NAME)):
+            file_path = self._output_folder / get_dataset_output_file_name(file_name, self._dataset_output_compression)
+            compressor = DatasetOutputCompressor(self._dataset_output_compression)
+            file_path.write_bytes(compressor.compress(dataframe.to_csv(index=False).encode("utf-8")) + compressor.flush())
+            logging.info(f"{len(dataframe)} rows written to {file_path}")
+
+
+def backfill_dataset():   # noqa: Vulture
+    """Parses every match of a local Cricsheet archive with a pool of processes and loads the parsed matches."""
+    arguments = _parse_arguments()
+    with zipfile.ZipFile(arguments.cricsheet_zip) as cricsheet_zip_file:
+        members = [member for member in cricsheet_zip_file.infolist() if not member.is_dir() and member.filename.endswith(".json")]
+    member_names = sorted(member.filename for member in members)
+    loader = DatasetFilesBackfillLoader(arguments.output_folder, arguments.dataset_output_compression) if arguments.output_folder \
+        else MongoDbBackfillLoader(arguments.mark_files_processed, {os.path.basename(member.filename): member.CRC for member in members})
+    logging.info(f"Backfilling {len(member_names)} files of {arguments.cricsheet_zip} with {arguments.workers} processes")
+
+    start_time = time.perf_counter()
+    number_of_loaded_files, failed_files, skipped_files = _load_matches_parsed_in_parallel(arguments, member_names, loader)
+    loader.close()
+
+    wall_time_in_seconds = max(time.perf_counter() - start_time, 1e-9)
+    logging.info(
+        f"Backfilled {number_of_loaded_files} matches in {wall_time_in_seconds:.1f} s - {number_of_loaded_files / wall_time_in_seconds:.1f} matches/s. "
+        f"{len(skipped_files)} files are not of men's T20Is"
+    )
+    if failed_files:
+        logging.error(f"Failed to backfill {len(failed_files)} files: {sorted(failed_files)}")
+        sys.exit(1)
+
+
+def _parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Rebuilds the dataset from a local Cricsheet archive with a pool of processes.")
+    parser.add_argument("--cricsheet-zip", required=True, help="Path of a Cricsheet archive like t20s_male_json.zip")
+    parser.add_argument("--output-folder", help="Folder to write the dataset files to, instead of loading the matches into MongoDB")
+    parser.add_argument("--dataset-output-compression", choices=["none", "gzip", "zstd"], default="none", help="Compression of the dataset files")
+    parser.add_argument(
+        "--mark-files-processed", action="store_true",
+        help="Record the files loaded into MongoDB in DynamoDB and in the processed files manifest, so that the lambdas skip them"
+    )
+    parser.add_argument("--json-decoder", choices=CRICSHEET_JSON_DECODERS, default="fast", help="Decoder of the cricsheet JSON files")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Number of worker processes parsing the matches")
+    parser.add_argument("--matches-per-task", type=int, default=BACKFILL_MATCHES_PER_TASK, help="Number of matches parsed by a worker in a single task")
+    arguments = parser.parse_args()
+    if arguments.mark_files_processed and arguments.output_folder:
+        parser.error("--mark-files-processed applies only when loading the matches into MongoDB")
+    return arguments
+
+
+def _load_matches_parsed_in_parallel(
+    arguments: argparse.Namespace, member_names: List[str], loader: Union[MongoDbBackfillLoader, DatasetFilesBackfillLoader]
+) -> Tuple[int, List[str], List[str]]:
+    """
+    Parses the given matches of the archive with a pool of processes, and loads the matches of every task as soon as it completes.
+
+    :param arguments: Command line arguments of the backfill
+    :param member_names: Names of the JSON files of the matches in the archive
+    :param loader: Loader of the parsed matches
+    :return: Number of loaded matches, along with the names of the files which failed and of the ones which are not of men's T20Is
+    """
+    number_of_parsed_files = 0
+    number_of_loaded_files = 0
+    failed_files: List[str] = []
+    skipped_files: List[str] = []
+    # The lambda handlers log every match they parse, which would flood the output of the backfill
+    with ProcessPoolExecutor(max_workers=arguments.workers, initializer=logging.disable, initargs=(logging.INFO,)) as executor:
+        futures = [
+            executor.submit(
+                _extract_matches_of_cricsheet_zip, arguments.cricsheet_zip, member_names[index:index + arguments.matches_per_task], arguments.json_decoder
+            )
+            for index in range(0, len(member_names), arguments.matches_per_task)
+        ]
+        for future in as_completed(futures):
+            match_data_by_file, delivery_records_by_file, failed_files_of_task, skipped_files_of_task = future.result()
+            files_failed_to_load = loader.add(match_data_by_file, delivery_records_by_file)
+            number_of_parsed_files += len(match_data_by_file) + len(failed_files_of_task) + len(skipped_files_of_task)
+            number_of_loaded_files += len(match_data_by_file) - len(files_failed_to_load)
+            failed_files.extend(failed_files_of_task + files_failed_to_load)
+            skipped_files.extend(skipped_files_of_task)
+            logging.info(f"Parsed {number_of_parsed_files} of {len(member_names)} files")
+    return number_of_loaded_files, failed_files, skipped_files
+
+
+def _extract_matches_of_cricsheet_zip(
+    cricsheet_zip_path: str, member_names: List[str], json_decoder_name: str
+) -> Tuple[Dict[str, Dict], Dict[str, List[Dict]], List[str], List[str]]:
+    """
+    Parses the given matches of the Cricsheet archive into their match data and delivery records. Runs in a worker process.
+
+    :param cricsheet_zip_path: Path of the Cricsheet archive
+    :param member_names: Names of the JSON files of the matches in the archive
+    :param json_decoder_name: Name of the decoder of the cricsheet JSON files
+    :return: Match data and delivery records of every parsed match keyed by the name of its file, along with the names of the
+        files which failed and of the ones which are not of men's T20Is
+    """
+    match_data_by_file: Dict[str, Dict] = {}
+    delivery_records_by_file: Dict[str, List[Dict]] = {}
+    failed_files: List[str] = []
+    skipped_files: List[str] = []
+    decode_cricsheet_json = get_cricsheet_json_decoder(json_decoder_name)
+    with zipfile.ZipFile(cricsheet_zip_path) as cricsheet_zip_file:
+        for member_name in member_names:
+            file = os.path.basename(member_name)
+            try:
+                json_data = decode_cricsheet_json(cricsheet_zip_file.read(member_name))
+                if not _is_mens_t20i_match(json_data):
+                    skipped_files.append(file)
+                    continue
+                match_data, delivery_records = CricsheetMatchDataExtractionHandler._get_match_data_and_delivery_records_of_json_data(  # pylint: disable=protected-access
+                    json_data, int(os.path.splitext(file)[0])
+                )
+                match_data_by_file[file] = match_data
+                delivery_records_by_file[file] = delivery_records
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                logging.error(f"Failed to parse {file}: {e}")
+                failed_files.append(file)
+    return match_data_by_file, delivery_records_by_file, failed_files, skipped_files
+
+
+def _is_mens_t20i_match(json_data: Dict) -> bool:
+    match_info = json_data.get("info", {})
+    return all(match_info.get(field) == value for field, value in MENS_T20I_MATCH_INFO.items())
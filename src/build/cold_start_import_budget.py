@@ -0,0 +1,78 @@
+"""
+This module measures the cold-start import time of every AWS Lambda handler against its budget.
+
+Every handler module is imported in a fresh interpreter with `-X importtime`, which is what a Lambda cold start pays before
+the first event is handled. The self time of every imported module is attributed to its top level package, so the report
+shows which dependencies dominate the import time of a handler. The best of a few runs is kept to smooth out the noise.
+
+Functions:
+- `report_cold_start_import_budget()`: Measures every handler, logs the report and exits with an error when a budget is exceeded.
+- `_measure_import_time_of_module(module_name)`: Imports a module in a fresh interpreter and collects the self time per top level package.
+
+Usage:
+Run `report_cold_start_import_budget` from the root of the repository, with the dependencies of the handlers installed.
+"""
+
+import logging
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, Tuple
+from build.constants import (
+    COLD_START_IMPORT_BUDGETS_IN_MILLISECONDS,
+    COLD_START_IMPORT_MEASUREMENT_RUNS,
+    COLD_START_IMPORT_REPORT_TOP_PACKAGES
+)
+
+# Logging configuration
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+_IMPORT_TIME_LINE_PATTERN = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s+(.+)$")
+
+def report_cold_start_import_budget():   # noqa: Vulture
+    """Reports the cold-start import time of every lambda handler and fails when one of them exceeds its budget."""
+    handlers_over_budget = []
+    for module_name, budget_in_milliseconds in COLD_START_IMPORT_BUDGETS_IN_MILLISECONDS.items():
+        # The first import compiles the bytecode of the module, which a deployed lambda does not pay for
+        _measure_import_time_of_module(module_name)
+        total_in_milliseconds, milliseconds_by_package = min(
+            (_measure_import_time_of_module(module_name) for _ in range(COLD_START_IMPORT_MEASUREMENT_RUNS)), key=lambda measurement: measurement[0]
+        )
+        status = "OK" if total_in_milliseconds <= budget_in_milliseconds else "OVER BUDGET"
+        logging.info(f"{module_name}: {total_in_milliseconds:.1f} ms of {budget_in_milliseconds} ms budget - {status}")
+        top_packages = sorted(milliseconds_by_package.items(), key=lambda item: item[1], reverse=True)[:COLD_START_IMPORT_REPORT_TOP_PACKAGES]
+        for package_name, milliseconds in top_packages:
+            logging.info(f"    {package_name:<30} {milliseconds:8.1f} ms")
+        if total_in_milliseconds > budget_in_milliseconds:
+            handlers_over_budget.append(module_name)
+    if handlers_over_budget:
+        logging.error(f"Cold-start import budget exceeded by {handlers_over_budget}")
+        sys.exit(1)
+
+def _measure_import_time_of_module(module_name: str) -> Tuple[float, Dict[str, float]]:
+    """
+    Imports the module in a fresh interpreter and collects its import time.
+
+    :param module_name: Name of the module to import
+    :return: Total import time of the module in milliseconds, and the self time of the imported modules per top level package
+    """
+    try:
+        completed_process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module_name}"], capture_output=True, text=True, check=True
+        )
+    except subprocess.CalledProcessError as e:
+        logging.error(f"Failed to import {module_name}: {e.stderr}")
+        raise
+    total_in_milliseconds = 0.0
+    milliseconds_by_package: Dict[str, float] = defaultdict(float)
+    for line in completed_process.stderr.splitlines():
+        match = _IMPORT_TIME_LINE_PATTERN.match(line)
+        if match is None:
+            continue
+        self_time_in_microseconds, cumulative_time_in_microseconds, imported_module_name = match.groups()
+        imported_module_name = imported_module_name.strip()
+        milliseconds_by_package[imported_module_name.split(".")[0]] += int(self_time_in_microseconds) / 1000
+        if imported_module_name == module_name:
+            total_in_milliseconds = int(cumulative_time_in_microseconds) / 1000
+    return total_in_milliseconds, dict(milliseconds_by_package)
@@ -6,14 +6,59 @@ File to maintain the constants which are used in build_packages
 from pathlib import Path
 
 # Constants
+BACKFILL_MATCHES_PER_TASK = 50
+# Cold-start import budget of every lambda handler, measured on a developer machine. The lambda handlers which work on a
+# single match at a time run thousands of times during a backfill, so they are kept free of pandas
+COLD_START_IMPORT_BUDGETS_IN_MILLISECONDS = {
+    'mens_t20i_data_collector._lambdas.convert_mongodb_data_to_csv.convert_mongo_db_data_to_csv_lambda': 1500,
+    'mens_t20i_data_collector._lambdas.download_from_cricsheet.download_from_cricsheet_lambda_function': 500,
+    'mens_t20i_data_collector._lambdas.extract_cricsheet_match_data.extract_cricsheet_match_data_lambda_function': 400,
+    'mens_t20i_data_collector._lambdas.extract_deliverywise_cricsheet_data.extract_deliverywise_cricsheet_data_lambda_function': 400,
+    'mens_t20i_data_collector._lambdas.extract_matchwise_cricsheet_data.extract_matchwise_cricsheet_data_lambda_function': 400,
+    'mens_t20i_data_collector._lambdas.send_notification_digest.send_notification_digest_lambda': 400,
+    'mens_t20i_data_collector._lambdas.upload_dataset_to_kaggle.upload_dataset_to_kaggle_lambda': 400,
+}
+COLD_START_IMPORT_MEASUREMENT_RUNS = 3
+COLD_START_IMPORT_REPORT_TOP_PACKAGES = 8
 DIST_FOLDER = Path("dist")
+EXTRACTION_BENCHMARK_DATASET_MATCHES = 400
+EXTRACTION_BENCHMARK_FIXTURES_FOLDER = Path("tests/fixtures/cricsheet_matches")
+# Slowdown of the median time of a benchmark against the baseline which fails the benchmark run
+EXTRACTION_BENCHMARK_REGRESSION_TOLERANCE = 0.25
+EXTRACTION_BENCHMARK_RESULTS_FILE_PATH = Path("extraction_benchmark_results.json")
+EXTRACTION_BENCHMARK_RUNS = 50
 LAMBDA_HANDLER_FILES = [
     'src/mens_t20i_data_collector/_lambdas/convert_mongodb_data_to_csv/convert_mongo_db_data_to_csv_lambda.py',
     'src/mens_t20i_data_collector/_lambdas/download_from_cricsheet/download_from_cricsheet_lambda_function.py',
+    'src/mens_t20i_data_collector/_lambdas/extract_cricsheet_match_data/extract_cricsheet_match_data_lambda_function.py',
     'src/mens_t20i_data_collector/_lambdas/extract_deliverywise_cricsheet_data/extract_deliverywise_cricsheet_data_lambda_function.py',
     'src/mens_t20i_data_collector/_lambdas/extract_matchwise_cricsheet_data/extract_matchwise_cricsheet_data_lambda_function.py',
+    'src/mens_t20i_data_collector/_lambdas/send_notification_digest/send_notification_digest_lambda.py',
     'src/mens_t20i_data_collector/_lambdas/upload_dataset_to_kaggle/upload_dataset_to_kaggle_lambda.py',
 ]
+# Settings of the lambda handlers when the pipeline runs locally against the in-process stand-ins of the AWS services,
+# MongoDB, Cricsheet, Telegram and Kaggle. The settings of a run given on the command line are added to them
+LOCAL_PIPELINE_RUN_ENVIRONMENT = {
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "CRICSHEET_DATA_DOWNLOAD_MODE": "full",
+    "CRICSHEET_JSON_DECODER": "fast",
+    "DELIVERYWISE_DATA_COLLECTION_NAME": "deliverywise_data",
+    "DOWNLOAD_BUCKET_NAME": "mens-t20i-dataset-local",
+    "DYNAMODB_TABLE_NAME": "mens-t20i-dataset-local-cricsheet_json_file_data_extraction_status_table",
+    "ENABLE_TELEGRAM_NOTIFICATION_DIGEST": "false",
+    "KAGGLE_DATASET_SLUG": "mens-t20i-dataset",
+    "KAGGLE_SECRET_KEY": "local",
+    "KAGGLE_USERNAME": "local",
+    "MATCHWISE_DATA_COLLECTION_NAME": "matchwise_data",
+    "MONGO_DB_BULK_WRITE_CHUNK_SIZE": "1000",
+    "MONGO_DB_EXPORT_CURSOR_BATCH_SIZE": "10000",
+    "MONGO_DB_NAME": "mens_t20i_dataset_local_run",
+    "MONGO_DB_URL": "mongodb://localhost:27017",
+    "S3_UPLOAD_CONCURRENCY": "8",
+    "TELEGRAM_BOT_TOKEN": "local",
+    "TELEGRAM_CHAT_ID": "local",
+}
+LOCAL_PIPELINE_RUN_SQS_QUEUE_NAME = "mens-t20i-dataset-local-delayed-message-queue"
 PACKAGE_NAME = "mens_t20i_data_collector"
 PYTHON_VERSION = "3.11"
 LAYER_PATH = Path("layer")
@@ -0,0 +1,311 @@
+"""
+This module benchmarks the hot paths of the data extraction and of the dataset preparation on real-shaped cricsheet matches.
+
+The fixtures cover a full match, a match shortened to a few overs, a DLS-affected match, a match decided by a super over and a
+match with many extras. Every extraction step is timed on every fixture:
+- `decode_json`: Decoding of the cricsheet JSON file with the json module, as the handlers read it from S3.
+- `decode_json_fast` and `decode_json_typed`: Decoding of the same file with the faster decoders of `get_cricsheet_json_decoder`,
+  whose speedup over the json module is logged.
+- `parse_deliveries`: `_get_delivery_data_of_given_match_id` of the deliverywise handler.
+- `create_composite_delivery_keys`: Delivery records with their composite key, from the parsed deliveries of the match.
+- `parse_and_store_match_data`: `_get_match_data_of_given_match_id_and_store_in_dynamodb` of the matchwise handler.
+The transforms of `DatasetPreparationHandler` are timed on a dataset made of the fixtures repeated as many matches:
+- `prepare_matchwise_data` and `prepare_deliverywise_data`: Dataframes of the dataset, from the documents of MongoDB.
+- `encode_deliverywise_csv`: CSV file of the deliverywise data.
+
+MongoDB, DynamoDB and S3 are replaced by in-memory stand-ins, so that only the code of the pipeline is measured. The median and
+the minimum time of every benchmark are saved as JSON. Given the results of an earlier run as the baseline, every benchmark is
+compared against it, and the run fails when one of them got slower than the tolerance.
+
+Functions:
+- `run_extraction_benchmark()`: Runs every benchmark, saves the results and compares them against the baseline.
+- `_benchmark_extraction(fixtures, runs)`: Times the extraction steps on every fixture.
+- `_benchmark_dataset_preparation(fixtures, number_of_matches, runs)`: Times the transforms of the dataset preparation.
+- `_compare_with_baseline(results, baseline, tolerance)`: Logs the change of every benchmark and returns the regressions.
+
+Usage:
+Run `run_extraction_benchmark --output baseline.json` from the root of the repository before a change, and
+`run_extraction_benchmark --baseline baseline.json` after it.
+"""
+
+import argparse
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List
+from unittest import mock
+from build.constants import (
+    EXTRACTION_BENCHMARK_DATASET_MATCHES,
+    EXTRACTION_BENCHMARK_FIXTURES_FOLDER,
+    EXTRACTION_BENCHMARK_REGRESSION_TOLERANCE,
+    EXTRACTION_BENCHMARK_RESULTS_FILE_PATH,
+    EXTRACTION_BENCHMARK_RUNS,
+    LOCAL_PIPELINE_RUN_ENVIRONMENT
+)
+from mens_t20i_data_collector._lambdas import client_registry
+from mens_t20i_data_collector._lambdas.constants import (
+    DELIVERYWISE_DATA_CSV_FILE_NAME
+)
+from mens_t20i_data_collector._lambdas.convert_mongodb_data_to_csv.convert_mongo_db_data_to_csv_lambda import (
+    DatasetPreparationHandler
+)
+from mens_t20i_data_collector._lambdas.cricsheet_json_decoder import (
+    get_cricsheet_json_decoder
+)
+from mens_t20i_data_collector._lambdas.cricsheet_match_data_parser import (
+    CricsheetMatchDataParser
+)
+from mens_t20i_data_collector._lambdas.extract_deliverywise_cricsheet_data.extract_deliverywise_cricsheet_data_lambda_function import (
+    DeliverywiseCricsheetDataExtractionHandler
+)
+from mens_t20i_data_collector._lambdas.extract_matchwise_cricsheet_data.extract_matchwise_cricsheet_data_lambda_function import (
+    MatchwiseCricsheetDataExtractionHandler
+)
+
+# Logging configuration
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+_BENCHMARK_ENVIRONMENT = {
+    **LOCAL_PIPELINE_RUN_ENVIRONMENT,
+    "DATASET_EXPORT_MODE": "full",
+    "DATASET_OUTPUT_COMPRESSION": "none",
+    "ENABLE_PARQUET_OUTPUT": "false",
+}
+
+
+class _StandInMongoCollection:
+
+    """In-memory stand-in of a MongoDB collection, which discards the writes and serves the find queries of the dataset export."""
+
+    def __init__(self) -> None:
+        self.documents: List[Dict] = []
+
+    def replace_one(self, *_, **__) -> None:
+        pass
+
+    def bulk_write(self, *_, **__) -> None:
+        pass
+
+    def create_index(self, *_, **__) -> None:
+        pass
+
+    def find(self, query: Dict, projection: Dict) -> "_StandInMongoCursor":
+        if query:
+            raise NotImplementedError("Only the find queries of the full dataset export are served by the stand-in")
+        included_fields = [field for field, is_included in projection.items() if is_included]
+        if included_fields:
+            return _StandInMongoCursor({field: document[field] for field in included_fields if field in document} for document in self.documents)
+        return _StandInMongoCursor(
+            {field: value for field, value in document.items() if projection.get(field, 1)} for document in self.documents
+        )
+
+
+class _StandInMongoCursor(list):
+
+    def batch_size(self, _) -> "_StandInMongoCursor":
+        return self
+
+
+class _StandInMongoClient:
+
+    def __init__(self) -> None:
+        self.databases: Dict[str, Dict[str, _StandInMongoCollection]] = defaultdict(lambda: defaultdict(_StandInMongoCollection))
+        self.admin = SimpleNamespace(command=lambda _: {"ok": 1})
+
+    def __getitem__(self, database_name: str) -> Dict[str, _StandInMongoCollection]:
+        return self.databases[database_name]
+
+
+class _StandInDynamoDbTable:
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.meta = SimpleNamespace(client=SimpleNamespace(transact_write_items=lambda **_: {}))
+
+    def update_item(self, **_) -> Dict:
+        return {}
+
+
+def run_extraction_benchmark():   # noqa: Vulture
+    """Runs the extraction and dataset preparation benchmarks, saves their results and compares them against the baseline."""
+    arguments = _parse_arguments()
+    fixtures = {
+        fixture_path.stem: fixture_path.read_bytes() for fixture_path in sorted(EXTRACTION_BENCHMARK_FIXTURES_FOLDER.glob("*.json"))
+    }
+    if not fixtures:
+        logging.error(f"No cricsheet match fixtures found in {EXTRACTION_BENCHMARK_FIXTURES_FOLDER}")
+        sys.exit(1)
+    mongo_db_client = _StandInMongoClient()
+    # The handlers log every step, which is not what is benchmarked here
+    logging.disable(logging.INFO)
+    try:
+        with mock.patch.dict("os.environ", _BENCHMARK_ENVIRONMENT):
+            client_registry.set_client_factory("boto3_client", lambda *_: SimpleNamespace())
+            client_registry.set_client_factory("boto3_resource", lambda service_name: SimpleNamespace(
+                Table=_StandInDynamoDbTable, Object=lambda *_: SimpleNamespace(put=lambda **__: {})
+            ))
+            client_registry.set_client_factory("mongo_db_client", lambda _: mongo_db_client)
+            results = {
+                **_benchmark_extraction(fixtures, arguments.runs),
+                **_benchmark_dataset_preparation(fixtures, mongo_db_client, arguments.dataset_matches, max(arguments.runs // 10, 1)),
+            }
+    finally:
+        logging.disable(logging.NOTSET)
+        client_registry.reset_client_registry()
+
+    with open(arguments.output, "w", encoding="utf-8") as output_file:
+        json.dump({
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python_version": platform.python_version(),
+            "platform": platform.platform(),
+            "benchmarks": results,
+        }, output_file, indent=2)
+    for name, result in results.items():
+        logging.info(f"{name:<56} median {result['median_in_microseconds']:12.1f} us, minimum {result['minimum_in_microseconds']:12.1f} us")
+        if name.startswith("decode_json_"):
+            stdlib_result = results[f"decode_json/{name.split('/')[1]}"]
+            logging.info(f"{name:<56} {stdlib_result['median_in_microseconds'] / result['median_in_microseconds']:.2f}x the speed of the json module")
+    logging.info(f"Benchmark results saved to {arguments.output}")
+    if arguments.baseline is None:
+        return
+    with open(arguments.baseline, encoding="utf-8") as baseline_file:
+        baseline = json.load(baseline_file)["benchmarks"]
+    regressions = _compare_with_baseline(results, baseline, arguments.tolerance)
+    if regressions:
+        logging.error(f"Benchmarks slower than the baseline by more than {arguments.tolerance:.0%}: {regressions}")
+        sys.exit(1)
+
+
+def _parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmarks the data extraction and the dataset preparation on cricsheet match fixtures.")
+    parser.add_argument("--output", default=str(EXTRACTION_BENCHMARK_RESULTS_FILE_PATH), help="Path of the JSON file to save the results to")
+    parser.add_argument("--baseline", help="Path of the JSON results of an earlier run to compare against")
+    parser.add_argument(
+        "--runs", type=int, default=EXTRACTION_BENCHMARK_RUNS, help="Timed runs of every extraction benchmark, a tenth of which time the dataset preparation"
+    )
+    parser.add_argument(
+        "--dataset-matches", type=int, default=EXTRACTION_BENCHMARK_DATASET_MATCHES, help="Number of matches of the dataset preparation benchmarks"
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=EXTRACTION_BENCHMARK_REGRESSION_TOLERANCE, help="Slowdown of the median against the baseline which fails the run"
+    )
+    return parser.parse_args()
+
+
+def _time_runs(function: Callable[[], Any], runs: int) -> Dict[str, float]:
+    """
+    Times the given function after a warm-up call.
+
+    :param function: Function to time
+    :param runs: Number of timed calls
+    :return: Median and minimum time of the calls in microseconds, along with their number
+    """
+    function()
+    timings = []
+    for _ in range(runs):
+        start_time = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start_time)
+    return {"median_in_microseconds": statistics.median(timings) * 1e6, "minimum_in_microseconds": min(timings) * 1e6, "runs": runs}
+
+
+def _benchmark_extraction(fixtures: Dict[str, bytes], runs: int) -> Dict[str, Dict[str, float]]:
+    """
+    Times the extraction steps of the deliverywise and the matchwise handlers on every fixture.
+
+    :param fixtures: Content of every cricsheet match fixture, keyed by its name
+    :param runs: Timed runs of every benchmark
+    :return: Results of every benchmark, keyed by the name of the benchmark and of the fixture
+    """
+    # pylint: disable=protected-access
+    results: Dict[str, Dict[str, float]] = {}
+    deliverywise_handler = DeliverywiseCricsheetDataExtractionHandler()
+    matchwise_handler = MatchwiseCricsheetDataExtractionHandler()
+    for match_id, (fixture_name, fixture_content) in enumerate(fixtures.items(), start=1):
+        json_data = json.loads(fixture_content)
+        deliverywise_handler._match_id = match_id
+        matchwise_handler._match_id = match_id
+        results[f"decode_json/{fixture_name}"] = _time_runs(lambda: json.loads(fixture_content), runs)  # pylint: disable=cell-var-from-loop
+        for decoder_name in ("fast", "typed"):
+            decode_cricsheet_json = get_cricsheet_json_decoder(decoder_name)
+            results[f"decode_json_{decoder_name}/{fixture_name}"] = _time_runs(
+                lambda: decode_cricsheet_json(fixture_content), runs  # pylint: disable=cell-var-from-loop
+            )
+        results[f"parse_deliveries/{fixture_name}"] = _time_runs(
+            lambda: deliverywise_handler._get_delivery_data_of_given_match_id(json_data), runs  # pylint: disable=cell-var-from-loop
+        )
+        results[f"create_composite_delivery_keys/{fixture_name}"] = _time_runs(
+            deliverywise_handler._build_delivery_documents, runs
+        )
+        results[f"parse_and_store_match_data/{fixture_name}"] = _time_runs(
+            lambda: matchwise_handler._get_match_data_of_given_match_id_and_store_in_dynamodb(json_data), runs  # pylint: disable=cell-var-from-loop
+        )
+    return results
+
+
+def _benchmark_dataset_preparation(
+    fixtures: Dict[str, bytes], mongo_db_client: _StandInMongoClient, number_of_matches: int, runs: int
+) -> Dict[str, Dict[str, float]]:
+    """
+    Times the transforms of the dataset preparation on a dataset made of the fixtures repeated as the given number of matches.
+
+    :param fixtures: Content of every cricsheet match fixture, keyed by its name
+    :param mongo_db_client: Stand-in of the MongoDB client, whose collections are filled with the dataset
+    :param number_of_matches: Number of matches of the dataset
+    :param runs: Timed runs of every benchmark
+    :return: Results of every benchmark, keyed by the name of the benchmark and the number of matches
+    """
+    database = mongo_db_client[_BENCHMARK_ENVIRONMENT["MONGO_DB_NAME"]]
+    matchwise_data_collection = database[_BENCHMARK_ENVIRONMENT["MATCHWISE_DATA_COLLECTION_NAME"]]
+    deliverywise_data_collection = database[_BENCHMARK_ENVIRONMENT["DELIVERYWISE_DATA_COLLECTION_NAME"]]
+    json_data_of_fixtures = [json.loads(fixture_content) for fixture_content in fixtures.values()]
+    for match_id in range(1, number_of_matches + 1):
+        cricsheet_match_data_parser = CricsheetMatchDataParser(json_data_of_fixtures[match_id % len(json_data_of_fixtures)], match_id)
+        cricsheet_match_data_parser.parse_innings()
+        match_data = cricsheet_match_data_parser.get_match_data()
+        match_data["_id"] = match_id
+        matchwise_data_collection.documents.append(match_data)
+        deliverywise_data_collection.documents.extend(cricsheet_match_data_parser.delivery_data_accumulator.to_mongo_documents())
+
+    # The dataframes are memoized by the handler, so every run prepares them with a new one
+    deliverywise_data = DatasetPreparationHandler().deliverywise_data
+    dataset_preparation_handler = DatasetPreparationHandler()
+    return {
+        f"prepare_matchwise_data/{number_of_matches}_matches": _time_runs(lambda: DatasetPreparationHandler().matchwise_data, runs),
+        f"prepare_deliverywise_data/{number_of_matches}_matches": _time_runs(lambda: DatasetPreparationHandler().deliverywise_data, runs),
+        f"encode_deliverywise_csv/{number_of_matches}_matches": _time_runs(
+            lambda: dataset_preparation_handler._convert_dataframe_to_csv_and_upload_to_s3(  # pylint: disable=protected-access
+                deliverywise_data, DELIVERYWISE_DATA_CSV_FILE_NAME
+            ), runs
+        ),
+    }
+
+
+def _compare_with_baseline(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], tolerance: float) -> List[str]:
+    """
+    Logs the change of the median time of every benchmark against the baseline.
+
+    :param results: Results of the current run, keyed by the name of the benchmark
+    :param baseline: Results of the baseline run, keyed by the name of the benchmark
+    :param tolerance: Relative slowdown of the median which counts as a regression
+    :return: Names of the benchmarks which got slower than the tolerance
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            logging.info(f"{name:<56} not in the baseline")
+            continue
+        ratio = result["median_in_microseconds"] / baseline[name]["median_in_microseconds"]
+        status = "OK" if ratio <= 1 + tolerance else "SLOWER"
+        logging.info(
+            f"{name:<56} {baseline[name]['median_in_microseconds']:12.1f} us -> {result['median_in_microseconds']:12.1f} us ({ratio:5.2f}x) - {status}"
+        )
+        if status == "SLOWER":
+            regressions.append(name)
+    return regressions
@@ -0,0 +1,279 @@
+"""
+This module runs the whole pipeline on a developer machine, from the download of the Cricsheet archive to the upload of the
+dataset to Kaggle, against in-process stand-ins of the services the lambdas talk to.
+
+Every lambda handler is called the way AWS calls it, with the EventBridge and SQS events built from what the previous stage
+left in S3 and SQS. S3, DynamoDB and SQS are served by moto and MongoDB by mongomock. The HTTP requests to Cricsheet are
+answered with the given Cricsheet archive and the ones to Telegram with a canned reply. Kaggle is replaced by a stand-in which
+keeps the published dataset in a local folder. The wall time of every stage is reported at the end, so that the throughput of
+the pipeline can be profiled and compared before deploying.
+
+mongomock looks every document up with a scan of its collection, so the extraction stages slow down as the collections grow.
+To profile those stages, run the pipeline against a local MongoDB server instead with `--mongo-db-url`.
+
+Functions:
+- `run_pipeline_locally()`: Parses the command line arguments, runs every stage of the pipeline and reports their wall time.
+- `_prepare_mongo_db(mongo_db_url)`: Points the lambdas to an empty database of mongomock or of a local MongoDB server.
+- `_run_stage(stage_timings, stage_name, handler, events)`: Calls a lambda handler with every event of a stage and times it.
+- `_get_extraction_stages(arguments, s3_client)`: Prepares the extraction lambda handlers and their events for the new files in S3.
+- `_get_local_kaggle_api_module(output_folder)`: Creates the stand-in of the Kaggle API module.
+
+Usage:
+Run `run_pipeline_locally --cricsheet-zip t20s_male_json.zip` from the root of the repository, with the test requirements installed.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+import time
+import types
+import uuid
+import zipfile
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from unittest import mock
+import boto3
+import mongomock
+import responses
+from moto import mock_aws
+from build.constants import (
+    LOCAL_PIPELINE_RUN_ENVIRONMENT,
+    LOCAL_PIPELINE_RUN_SQS_QUEUE_NAME
+)
+from mens_t20i_data_collector._lambdas import client_registry
+from mens_t20i_data_collector._lambdas.constants import (
+    CRICSHEET_DATA_DOWNLOADING_URL,
+    CRICSHEET_DATA_S3_FOLDER_NAME,
+    CRICSHEET_DATA_S3_FOLDER_TO_STORE_NEW_MATCH_BUNDLE_INDEXES,
+    CRICSHEET_DATA_S3_FOLDER_TO_STORE_PROCESSED_JSON_FILES_ZIP
+)
+from mens_t20i_data_collector._lambdas.convert_mongodb_data_to_csv import (
+    convert_mongo_db_data_to_csv_lambda
+)
+from mens_t20i_data_collector._lambdas.download_from_cricsheet import (
+    download_from_cricsheet_lambda_function
+)
+from mens_t20i_data_collector._lambdas.extract_cricsheet_match_data import (
+    extract_cricsheet_match_data_lambda_function
+)
+from mens_t20i_data_collector._lambdas.extract_deliverywise_cricsheet_data import (
+    extract_deliverywise_cricsheet_data_lambda_function
+)
+from mens_t20i_data_collector._lambdas.extract_matchwise_cricsheet_data import (
+    extract_matchwise_cricsheet_data_lambda_function
+)
+from mens_t20i_data_collector._lambdas.upload_dataset_to_kaggle import (
+    upload_dataset_to_kaggle_lambda
+)
+
+# Logging configuration
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+Handler = Callable[[Dict, Any], Dict]
+
+
+def run_pipeline_locally():   # noqa: Vulture
+    """Runs the download, extraction, conversion and upload stages of the pipeline locally and reports their wall time."""
+    arguments = _parse_arguments()
+    with open(arguments.cricsheet_zip, "rb") as cricsheet_zip_file:
+        cricsheet_zip_content = cricsheet_zip_file.read()
+    with zipfile.ZipFile(arguments.cricsheet_zip) as cricsheet_zip_file:
+        number_of_matches = sum(1 for name in cricsheet_zip_file.namelist() if name.endswith(".json"))
+    environment = {
+        **LOCAL_PIPELINE_RUN_ENVIRONMENT,
+        "CRICSHEET_DATA_UPLOAD_MODE": arguments.upload_mode,
+        "DATASET_EXPORT_MODE": arguments.dataset_export_mode,
+        "DATASET_OUTPUT_COMPRESSION": arguments.dataset_output_compression,
+        "ENABLE_PARQUET_OUTPUT": "true" if arguments.parquet else "false",
+        "MONGO_DB_URL": arguments.mongo_db_url or LOCAL_PIPELINE_RUN_ENVIRONMENT["MONGO_DB_URL"],
+        # Every match of the archive is sent for processing in a single run
+        "THRESHOLD_FOR_NUMBER_OF_FILES_TO_BE_SENT_FOR_PROCESSING": str(max(number_of_matches, 1)),
+    }
+    stage_timings: List[Tuple[str, int, float]] = []
+    with mock.patch.dict(os.environ, environment), mock_aws(), responses.RequestsMock(assert_all_requests_are_fired=False) as requests_mock, \
+            mock.patch.dict(sys.modules, dict.fromkeys(
+                ["kaggle", "kaggle.api", "kaggle.api.kaggle_api_extended"], _get_local_kaggle_api_module(arguments.output_folder)
+            )):
+        requests_mock.get(CRICSHEET_DATA_DOWNLOADING_URL, body=cricsheet_zip_content, headers={"ETag": f'"{uuid.uuid4().hex}"'})
+        requests_mock.post(re.compile(r"https://api\.telegram\.org/.*"), json={"ok": True})
+        client_registry.reset_client_registry()
+        _prepare_mongo_db(arguments.mongo_db_url)
+        # The lambda handlers log every file they process and print the metrics of every invocation, which would dominate the wall time of the stages
+        if not arguments.verbose:
+            logging.disable(logging.INFO)
+        try:
+            with contextlib.redirect_stdout(sys.stdout if arguments.verbose else io.StringIO()):
+                _run_all_stages(arguments, environment, stage_timings)
+        except RuntimeError as e:
+            logging.error(f"Local pipeline run failed: {e}")
+            sys.exit(1)
+        finally:
+            logging.disable(logging.NOTSET)
+            client_registry.reset_client_registry()
+    logging.info(f"Pipeline run of {number_of_matches} matches from {arguments.cricsheet_zip}:")
+    for stage_name, number_of_invocations, wall_time_in_seconds in stage_timings:
+        logging.info(f"    {stage_name:<40} {number_of_invocations:6d} invocations {wall_time_in_seconds:10.2f} s")
+    total_wall_time_in_seconds = sum(wall_time_in_seconds for _, _, wall_time_in_seconds in stage_timings)
+    logging.info(f"    {'total':<40} {'':18} {total_wall_time_in_seconds:10.2f} s - {number_of_matches / max(total_wall_time_in_seconds, 1e-9):.1f} matches/s")
+    logging.info(f"Published dataset is in {arguments.output_folder}")
+
+
+def _parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Runs the pipeline locally against in-process stand-ins of AWS, MongoDB, Cricsheet and Kaggle.")
+    parser.add_argument("--cricsheet-zip", required=True, help="Path of a Cricsheet archive like t20s_male_json.zip")
+    parser.add_argument("--output-folder", default="local_pipeline_output", help="Folder to keep the dataset published to the Kaggle stand-in")
+    parser.add_argument("--upload-mode", choices=["files", "bundle"], default="files", help="Upload mode of the new files of the download lambda")
+    parser.add_argument(
+        "--extraction-mode", choices=["separate", "unified"], default="separate",
+        help="Extraction by the matchwise and deliverywise lambdas, or by the unified lambda. Bundles are always extracted by the unified lambda"
+    )
+    parser.add_argument(
+        "--sqs-batch-size", type=int, help="Size of the SQS batches of the batched extraction, every file is extracted on its own when not given"
+    )
+    parser.add_argument("--dataset-export-mode", choices=["full", "streaming", "incremental"], default="full")
+    parser.add_argument("--dataset-output-compression", choices=["none", "gzip", "zstd"], default="none")
+    parser.add_argument("--parquet", action="store_true", help="Publish the dataset as Parquet alongside the CSV files")
+    parser.add_argument(
+        "--mongo-db-url",
+        help=f"URL of a MongoDB server to use instead of mongomock. The {LOCAL_PIPELINE_RUN_ENVIRONMENT['MONGO_DB_NAME']} database is dropped first"
+    )
+    parser.add_argument("--verbose", action="store_true", help="Keep the logs and the metrics of the lambda handlers, which also slow the stages down")
+    return parser.parse_args()
+
+
+def _prepare_mongo_db(mongo_db_url: Optional[str]) -> None:
+    """
+    Points the lambdas to an empty MongoDB database, either of mongomock or of the given MongoDB server.
+
+    :param mongo_db_url: URL of the MongoDB server, mongomock is used when not given
+    """
+    if mongo_db_url is None:
+        mongo_db_client = mongomock.MongoClient()
+        client_registry.set_client_factory("mongo_db_client", lambda _: mongo_db_client)
+        return
+    client_registry.get_mongo_db_client(mongo_db_url).drop_database(LOCAL_PIPELINE_RUN_ENVIRONMENT["MONGO_DB_NAME"])
+
+
+def _run_all_stages(arguments: argparse.Namespace, environment: Dict[str, str], stage_timings: List[Tuple[str, int, float]]) -> None:
+    """
+    Creates the AWS resources of the pipeline in moto and runs its stages in order, feeding every stage with the events of the previous one.
+
+    :param arguments: Command line arguments of the run
+    :param environment: Environment of the lambda handlers
+    :param stage_timings: Name, number of invocations and wall time of every stage run so far
+    """
+    s3_client = boto3.client("s3")
+    s3_client.create_bucket(Bucket=environment["DOWNLOAD_BUCKET_NAME"])
+    boto3.client("dynamodb").create_table(
+        TableName=environment["DYNAMODB_TABLE_NAME"],
+        KeySchema=[{"AttributeName": "file_name", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "file_name", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    sqs_client = boto3.client("sqs")
+    queue_url = sqs_client.create_queue(QueueName=LOCAL_PIPELINE_RUN_SQS_QUEUE_NAME)["QueueUrl"]
+    os.environ["DELAYED_SQS_QUEUE_URL"] = queue_url
+
+    _run_stage(stage_timings, "download_from_cricsheet", download_from_cricsheet_lambda_function.handler, [{}])
+    for stage_name, handler, events in _get_extraction_stages(arguments, s3_client):
+        _run_stage(stage_timings, stage_name, handler, events)
+    messages = sqs_client.receive_message(QueueUrl=queue_url, MaxNumberOfMessages=1).get("Messages", [])
+    if not messages:
+        raise RuntimeError("The download lambda did not send the message to trigger the conversion")
+    _run_stage(
+        stage_timings, "convert_mongodb_data_to_csv", convert_mongo_db_data_to_csv_lambda.handler,
+        [{"Records": [{"messageId": messages[0]["MessageId"], "body": messages[0]["Body"]}]}]
+    )
+    _run_stage(stage_timings, "upload_dataset_to_kaggle", upload_dataset_to_kaggle_lambda.handler, [{}])
+
+
+def _run_stage(stage_timings: List[Tuple[str, int, float]], stage_name: str, handler: Handler, events: List[Dict]) -> None:
+    """
+    Calls the lambda handler of a stage with every event of the stage, and records the wall time of the stage.
+
+    :param stage_timings: Name, number of invocations and wall time of every stage run so far
+    :param stage_name: Name of the stage
+    :param handler: Lambda handler of the stage
+    :param events: Events to call the lambda handler with, one invocation each
+    """
+    start_time = time.perf_counter()
+    for event in events:
+        response = handler(event, None)
+        if response["statusCode"] != 200 or response.get("batchItemFailures"):
+            raise RuntimeError(f"{stage_name} failed with the response {response}")
+    stage_timings.append((stage_name, len(events), time.perf_counter() - start_time))
+
+
+def _get_extraction_stages(arguments: argparse.Namespace, s3_client) -> List[Tuple[str, Handler, List[Dict]]]:
+    """
+    Prepares the extraction stages for the files uploaded by the download lambda, with the EventBridge events of their S3 objects
+    either passed straight to the handlers or buffered in SQS batches, the way the stack wires the extraction lambdas.
+
+    :param arguments: Command line arguments of the run
+    :param s3_client: S3 client
+    :return: Name, lambda handler and events of every extraction stage
+    """
+    bucket_name = os.environ["DOWNLOAD_BUCKET_NAME"]
+    if arguments.upload_mode == "bundle":
+        prefix = f"{CRICSHEET_DATA_S3_FOLDER_NAME}/{CRICSHEET_DATA_S3_FOLDER_TO_STORE_NEW_MATCH_BUNDLE_INDEXES}/"
+    else:
+        prefix = f"{CRICSHEET_DATA_S3_FOLDER_NAME}/{CRICSHEET_DATA_S3_FOLDER_TO_STORE_PROCESSED_JSON_FILES_ZIP}/"
+    events = [
+        {
+            "source": "aws.s3",
+            "detail-type": "Object Created",
+            "detail": {"bucket": {"name": bucket_name}, "object": {"key": s3_object["Key"], "size": s3_object["Size"], "etag": s3_object["ETag"]}},
+        }
+        for page in s3_client.get_paginator("list_objects_v2").paginate(Bucket=bucket_name, Prefix=prefix)
+        for s3_object in page.get("Contents", [])
+    ]
+    if arguments.upload_mode == "bundle":
+        return [("extract_cricsheet_match_data_of_bundle", extract_cricsheet_match_data_lambda_function.bundle_handler, events)]
+    if arguments.sqs_batch_size:
+        events = [
+            {"Records": [{"messageId": str(uuid.uuid4()), "body": json.dumps(event)} for event in events[index:index + arguments.sqs_batch_size]]}
+            for index in range(0, len(events), arguments.sqs_batch_size)
+        ]
+    handler_name = "batch_handler" if arguments.sqs_batch_size else "handler"
+    if arguments.extraction_mode == "unified":
+        return [("extract_cricsheet_match_data", getattr(extract_cricsheet_match_data_lambda_function, handler_name), events)]
+    return [
+        ("extract_deliverywise_cricsheet_data", getattr(extract_deliverywise_cricsheet_data_lambda_function, handler_name), events),
+        ("extract_matchwise_cricsheet_data", getattr(extract_matchwise_cricsheet_data_lambda_function, handler_name), events),
+    ]
+
+
+def _get_local_kaggle_api_module(output_folder: str) -> types.ModuleType:
+    """
+    Creates the stand-in of the `kaggle.api.kaggle_api_extended` module, whose API keeps every dataset version in a local folder.
+
+    :param output_folder: Folder to keep the latest dataset version in
+    :return: Module with the stand-in of the KaggleApi class
+    """
+
+    class LocalKaggleApi:
+
+        """Stand-in of the Kaggle API, which keeps the published dataset in a local folder instead of publishing it to Kaggle."""
+
+        def authenticate(self) -> None:
+            """Nothing to authenticate against locally."""
+
+        def dataset_create_version(self, folder: str, version_notes: str, delete_old_versions: bool = False) -> None:
+            """
+            :param folder: Folder holding the files of the dataset version and its metadata
+            :param version_notes: Notes of the dataset version
+            :param delete_old_versions: Whether to remove the previously published dataset from the output folder
+            """
+            if delete_old_versions:
+                shutil.rmtree(output_folder, ignore_errors=True)
+            shutil.copytree(folder, output_folder, dirs_exist_ok=True)
+            logging.info(f"Dataset version '{version_notes}' published to {output_folder}")
+
+    module = types.ModuleType("kaggle.api.kaggle_api_extended")
+    module.KaggleApi = LocalKaggleApi  # type: ignore
+    return module
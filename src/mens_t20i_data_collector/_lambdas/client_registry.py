@@ -0,0 +1,120 @@
+import logging
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Set, Tuple
+import boto3
+from botocore.config import Config
+
+if TYPE_CHECKING:
+    from pymongo import MongoClient
+
+# Set up logging
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def _create_boto3_client(service_name: str, max_pool_connections: Optional[int] = None):
+    if max_pool_connections is None:
+        return boto3.client(service_name)
+    return boto3.client(service_name, config=Config(max_pool_connections=max_pool_connections))
+
+
+def _create_mongo_db_client(mongo_db_url: str) -> "MongoClient":
+    # pymongo is imported on demand, as only the lambdas working with MongoDB need it
+    import pymongo  # pylint: disable=import-outside-toplevel
+    return pymongo.MongoClient(mongo_db_url)
+
+
+_DEFAULT_CLIENT_FACTORIES: Dict[str, Callable[..., Any]] = {
+    "boto3_client": _create_boto3_client,
+    "boto3_resource": boto3.resource,
+    "mongo_db_client": _create_mongo_db_client,
+}
+
+# Module level state lives as long as the Lambda execution environment, so the clients are shared by the warm invocations
+_client_factories: Dict[str, Callable[..., Any]] = dict(_DEFAULT_CLIENT_FACTORIES)
+_clients: Dict[Tuple, Any] = {}
+_indexed_mongo_db_fields: Set[Tuple[Any, str]] = set()
+
+
+def get_boto3_client(service_name: str, max_pool_connections: Optional[int] = None):
+    """
+    :param service_name: Name of the AWS service like s3 or sqs
+    :param max_pool_connections: Size of the connection pool of the client, the botocore default when not given
+    :return: boto3 client of the service, created on the first request of the execution environment
+    """
+    return _get_client("boto3_client", service_name, max_pool_connections)
+
+
+def get_boto3_resource(service_name: str):
+    """
+    :param service_name: Name of the AWS service like s3 or dynamodb
+    :return: boto3 resource of the service, created on the first request of the execution environment
+    """
+    return _get_client("boto3_resource", service_name)
+
+
+def get_mongo_db_client(mongo_db_url: str) -> "MongoClient":
+    """
+    Returns the MongoDB client of the given URL, so that its connection pool survives across the warm invocations. A reused
+    client is pinged first, and replaced by a new one when the ping fails, like after the connections went stale while the
+    execution environment was frozen.
+
+    :param mongo_db_url: Connection string of the MongoDB cluster
+    :return: MongoDB client connected to the cluster
+    """
+    import pymongo  # pylint: disable=import-outside-toplevel
+    key = ("mongo_db_client", mongo_db_url)
+    mongo_db_client = _clients.get(key)
+    if mongo_db_client is not None:
+        try:
+            mongo_db_client.admin.command("ping")
+        except pymongo.errors.PyMongoError as e:
+            logger.warning(f"Cached MongoDB client failed its health check, creating a new one: {e}")
+            mongo_db_client.close()
+            del _clients[key]
+    return _get_client("mongo_db_client", mongo_db_url)
+
+
+def create_mongo_db_index(collection, field: str) -> None:
+    """
+    Creates an index on a field of a MongoDB collection the first time it is requested in the execution environment. The index
+    outlives the clients once created, so the warm invocations are spared the round trip to the server.
+
+    :param collection: MongoDB collection to index
+    :param field: Field to index
+    """
+    if (collection, field) not in _indexed_mongo_db_fields:
+        collection.create_index(field)
+        _indexed_mongo_db_fields.add((collection, field))
+
+
+def set_client_factory(kind: str, factory: Callable[..., Any]) -> None:  # noqa: Vulture
+    """
+    Replaces the factory of a kind of client, like with an in-process stand-in in the tests. The cached clients of that kind
+    are discarded, so that the following requests get clients of the new factory.
+
+    :param kind: Kind of the client, one of "boto3_client", "boto3_resource" or "mongo_db_client"
+    :param factory: Callable taking the same arguments as the getter of the kind and returning the client
+    """
+    if kind not in _DEFAULT_CLIENT_FACTORIES:
+        raise ValueError(f"Unknown kind of client '{kind}'")
+    _client_factories[kind] = factory
+    for key in [key for key in _clients if key[0] == kind]:
+        del _clients[key]
+
+
+def reset_client_registry() -> None:  # noqa: Vulture
+    """
+    Restores the default factories and discards the cached clients, along with the record of the indexed fields.
+    """
+    _client_factories.clear()
+    _client_factories.update(_DEFAULT_CLIENT_FACTORIES)
+    _clients.clear()
+    _indexed_mongo_db_fields.clear()
+
+
+def _get_client(kind: str, *args):
+    key = (kind, *args)
+    if key not in _clients:
+        logger.info(f"Creating a new {kind}")
+        _clients[key] = _client_factories[kind](*args)
+    return _clients[key]
@@ -3,19 +3,34 @@ This module defines constants used for downloading and managing CricSheet data.
 
 Constants:
 - `CRICSHEET_DATA_DOWNLOADING_URL`: The URL from which the T20 men's cricket JSON data can be downloaded.
+- `CRICSHEET_RECENTLY_ADDED_DATA_DOWNLOADING_URL`: The URL of the archives of matches recently added to CricSheet, across all formats.
 - `CRICSHEET_DATA_S3_FOLDER_NAME`: The name of the S3 folder where the downloaded CricSheet data is stored.
 - `CRICSHEET_DATA_S3_FOLDER_TO_STORE_NEW_JSON_FILES_ZIP`: The S3 folder where new JSON files, downloaded from CricSheet, are stored as a zip.
+- `CRICSHEET_DATA_S3_FOLDER_TO_STORE_NEW_MATCH_BUNDLES`: The S3 folder where the new JSON files of a run are stored together
+        as a single gzip compressed NDJSON bundle, whose index is stored in `CRICSHEET_DATA_S3_FOLDER_TO_STORE_NEW_MATCH_BUNDLE_INDEXES`.
 - `CRICSHEET_DATA_S3_FOLDER_TO_STORE_PROCESSED_JSON_FILES_ZIP`: The S3 folder where processed JSON files are 
         stored as a zip after being handled by the application.
 
 These constants are primarily used in the context of an AWS-based workflow that involves downloading, storing, and processing CricSheet data.
 """
 
+COMPOSITE_DELIVERY_KEY_COLUMNS = ["match_id", "innings_number", "over_number", "ball_number"]
+CRICSHEET_DATA_DOWNLOAD_CHUNK_SIZE_IN_BYTES: int = 1024 * 1024
+CRICSHEET_DATA_DOWNLOAD_TIMEOUT_IN_SECONDS: int = 30
+CRICSHEET_DATA_DOWNLOAD_STATE_FILE_NAME: str = "cricsheet_download_state.json"
 CRICSHEET_DATA_DOWNLOADING_URL: str = "https://cricsheet.org/downloads/t20s_male_json.zip"
+CRICSHEET_RECENTLY_ADDED_DATA_DOWNLOADING_URL: str = "https://cricsheet.org/downloads/recently_added_{number_of_days}_json.zip"
+CRICSHEET_RECENTLY_ADDED_DATA_WINDOWS_IN_DAYS = [2, 7, 30]
 CRICSHEET_DATA_S3_FOLDER_NAME: str = "cricsheet_data"
+CRICSHEET_DATA_S3_FOLDER_TO_STORE_NEW_MATCH_BUNDLE_INDEXES: str = "bundle_indexes"
+CRICSHEET_DATA_S3_FOLDER_TO_STORE_NEW_MATCH_BUNDLES: str = "bundles"
 CRICSHEET_DATA_S3_FOLDER_TO_STORE_PROCESSED_JSON_FILES_ZIP: str = "processed_data"
 CRICSHEET_DATA_S3_OUTPUT_FOLDER: str = "output"
+CRICSHEET_JSON_DECODERS = ["fast", "standard", "typed"]
+DATASET_OUTPUT_COMPRESSION_CONTENT_TYPES = {"gzip": "application/gzip", "zstd": "application/zstd"}
+DATASET_OUTPUT_COMPRESSION_FILE_EXTENSIONS = {"gzip": ".gz", "none": "", "zstd": ".zst"}
 DELIVERYWISE_DATA_CSV_FILE_NAME: str = "deliverywise_data.csv"
+DELIVERYWISE_DATA_PARQUET_FILE_NAME: str = "deliverywise_data.parquet"
 DELIVERYWISE_DATAFRAME_COLUMNS = [
         "match_id",
         "innings_number",
@@ -38,7 +53,55 @@ DELIVERYWISE_DATAFRAME_COLUMNS = [
         "dismissal_type",
         "fielder_name"
 ]
+DELIVERYWISE_DATAFRAME_INTEGER_COLUMNS = [
+        "match_id",
+        "innings_number",
+        "over_number",
+        "ball_number",
+        "wide_runs",
+        "leg_bye_runs",
+        "bye_runs",
+        "no_ball_runs",
+        "penalty_runs",
+        "batsman_runs",
+        "extra_runs",
+        "total_runs"
+]
+DYNAMODB_TRANSACT_WRITE_ITEMS_LIMIT: int = 100
+EMBEDDED_METRICS_MAXIMUM_VALUES_PER_METRIC: int = 100
+EMBEDDED_METRICS_NAMESPACE: str = "MensT20IDataCollector"
+MATCHES_PER_BULK_WRITE_OF_NEW_MATCH_BUNDLE: int = 25
+# Bundles are extracted by a single invocation, so they are not held to the threshold of the files sent one by one, the
+# catch-up of a complete archive is still better served by the backfill_dataset script
+MATCHES_PER_NEW_MATCH_BUNDLE: int = 2000
+MATCHES_PER_CHUNK_OF_STREAMING_DATASET_EXPORT: int = 200
 MATCHWISE_DATA_CSV_FILE_NAME: str = "matchwise_data.csv"
+MATCHWISE_DATA_PARQUET_FILE_NAME: str = "matchwise_data.parquet"
+MENS_T20I_MATCH_INFO = {"match_type": "T20", "gender": "male", "team_type": "international"}
+PARQUET_ROW_GROUP_SIZE: int = 128 * 1024
+# Renamed along with its format, which holds the content CRC32 of every match ID, so the manifest of the match IDs alone is not misread
+PROCESSED_FILES_MANIFEST_FILE_NAME: str = "processed_match_content_crc32s_manifest.bin"
+REJECTED_FILES_MANIFEST_FILE_NAME: str = "rejected_match_content_crc32s_manifest.bin"
+S3_MULTIPART_UPLOAD_PART_SIZE_IN_BYTES: int = 8 * 1024 * 1024
+TELEGRAM_DIGEST_MAXIMUM_ERROR_MESSAGE_LENGTH: int = 300
+TELEGRAM_DIGEST_MAXIMUM_ERRORS: int = 5
+TELEGRAM_DIGEST_MESSAGE_TEMPLATE: str = """
+<b>🏏 T20I Data Extraction Pipeline Digest</b>
+
+
+<b> Period :</b> {} - {}
+
+<b> Invocations :</b> {} ✅ / {} ❌
+
+<b> Lambdas :</b>
+{}
+
+<b> First Failures :</b>
+{}
+
+-- Automated Message from T20I Data Extraction Pipeline --
+"""
+TELEGRAM_EXECUTION_STATUS_LABELS = {"critical": "ERROR ❌", "failure": "PARTIAL FAILURE ⚠️", "success": "SUCCESS ✅"}
 TELEGRAM_MESSAGE_TEMPLATE: str = """
 <b>🏏 T20I Data Extraction Pipeline Status - {}</b>
 
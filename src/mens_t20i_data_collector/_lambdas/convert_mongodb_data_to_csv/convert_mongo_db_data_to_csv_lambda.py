@@ -1,12 +1,41 @@
 import io
+import json
 import logging
-import boto3
+import os
+from contextlib import ExitStack
+from typing import Callable, Dict, Iterable, List, Optional
 import pandas as pd
-from pymongo import MongoClient
+from mens_t20i_data_collector._lambdas.client_registry import (
+    get_boto3_client,
+    get_boto3_resource,
+    get_mongo_db_client
+)
 from mens_t20i_data_collector._lambdas.constants import (
+    COMPOSITE_DELIVERY_KEY_COLUMNS,
     CRICSHEET_DATA_S3_OUTPUT_FOLDER,
     DELIVERYWISE_DATA_CSV_FILE_NAME,
-    MATCHWISE_DATA_CSV_FILE_NAME
+    DELIVERYWISE_DATA_PARQUET_FILE_NAME,
+    MATCHWISE_DATA_CSV_FILE_NAME,
+    MATCHWISE_DATA_PARQUET_FILE_NAME
+)
+from mens_t20i_data_collector._lambdas.dataset_export_query import (
+    DatasetExportQuery
+)
+from mens_t20i_data_collector._lambdas.dataset_output_compressor import (
+    DatasetOutputCompressor,
+    get_dataset_output_file_name
+)
+from mens_t20i_data_collector._lambdas.execution_metrics import (
+    record_metric,
+    timed_span
+)
+from mens_t20i_data_collector._lambdas.parquet_dataset_writer import (
+    ParquetDatasetWriter,
+    get_deliverywise_data_arrow_schema,
+    get_matchwise_data_arrow_schema
+)
+from mens_t20i_data_collector._lambdas.s3_multipart_upload_writer import (
+    S3MultipartUploadWriter
 )
 from mens_t20i_data_collector._lambdas.utils import (
     exception_handler,
@@ -22,52 +51,188 @@ class DatasetPreparationHandler:
     """Handler to read data from DynamoDB, format it as a DataFrame, and upload as CSV to S3."""
 
     def __init__(self) -> None:
-        self._s3_client = boto3.client("s3")
-        self._s3_resource = boto3.resource("s3")
+        self._s3_client = get_boto3_client("s3")
+        self._s3_resource = get_boto3_resource("s3")
         self._s3_bucket_name = get_environmental_variable_value("DOWNLOAD_BUCKET_NAME")
         self._mongo_db_url = get_environmental_variable_value("MONGO_DB_URL")
         self._mongo_db_name = get_environmental_variable_value("MONGO_DB_NAME")
         self._matchwise_data_collection_name = get_environmental_variable_value("MATCHWISE_DATA_COLLECTION_NAME")
         self._deliverywise_data_collection_name = get_environmental_variable_value("DELIVERYWISE_DATA_COLLECTION_NAME")
-        self._mongo_db_client = MongoClient(self._mongo_db_url)
+        self._mongo_db_client = get_mongo_db_client(self._mongo_db_url)
         self._matchwise_data_mongo_collection = self._mongo_db_client[self._mongo_db_name][self._matchwise_data_collection_name]
         self._deliverywise_data_mongo_collection = self._mongo_db_client[self._mongo_db_name][self._deliverywise_data_collection_name]
+        self._dataset_export_mode = get_environmental_variable_value("DATASET_EXPORT_MODE")
+        self._is_parquet_output_enabled = get_environmental_variable_value("ENABLE_PARQUET_OUTPUT") == "true"
+        self._dataset_output_compression = get_environmental_variable_value("DATASET_OUTPUT_COMPRESSION")
+        # Parquet files compress their pages themselves, with snappy unless another codec is selected
+        self._parquet_compression = "snappy" if self._dataset_output_compression == "none" else self._dataset_output_compression
+        self._dataset_export_query = DatasetExportQuery(
+            self._matchwise_data_mongo_collection,
+            self._deliverywise_data_mongo_collection,
+            int(get_environmental_variable_value("MONGO_DB_EXPORT_CURSOR_BATCH_SIZE"))
+        )
 
     @property
-    def matchwise_data(self):
-        logger.info("Preparing matchwise data.")
-        matchwise_data_cursor = self._matchwise_data_mongo_collection.find()
-        matchwise_dataframe: pd.DataFrame = pd.DataFrame(matchwise_data_cursor)
-        matchwise_dataframe.drop(columns=["_id"], inplace=True)
-        matchwise_dataframe.rename(columns={"index": "match_number"}, inplace=True)
-        matchwise_dataframe.sort_values(by=["date", "match_id"], inplace=True)
-        matchwise_dataframe["match_number"] = range(1, len(matchwise_dataframe) + 1)
-        return matchwise_dataframe
+    def matchwise_data(self) -> pd.DataFrame:
+        return self._dataset_export_query.matchwise_data
 
     @property
-    def deliverywise_data(self):
-        logger.info("Preparing deliverywise data.")
-        deliverywise_data_cursor = self._deliverywise_data_mongo_collection.find()
-        deliverywise_dataframe: pd.DataFrame = pd.DataFrame(deliverywise_data_cursor)
-        deliverywise_dataframe.drop(columns=["_id", "composite_delivery_key"], inplace=True)
-        deliverywise_dataframe = deliverywise_dataframe.merge(self.matchwise_data[["match_number", "match_id"]], on="match_id", how="left")
-        deliverywise_dataframe.sort_values(by=["match_number", "innings_number", "over_number", "ball_number"], inplace=True)
-        return deliverywise_dataframe
-
-    def prepare_dataset(self):
+    def deliverywise_data(self) -> pd.DataFrame:
+        return self._dataset_export_query.deliverywise_data
+
+    def prepare_dataset(self, revised_match_ids: Optional[List[int]] = None):
+        """
+        :param revised_match_ids: Match IDs whose cricsheet files Cricsheet has revised since their previous extraction
+        """
+        if self._dataset_export_mode == "incremental" and self._prepare_dataset_incrementally(revised_match_ids or []):
+            return
+        if self._dataset_export_mode == "streaming":
+            self._prepare_dataset_by_streaming()
+            return
+        self._upload_dataset_to_s3(self.matchwise_data, self.deliverywise_data)
+
+    def _prepare_dataset_incrementally(self, revised_match_ids: List[int]) -> bool:
+        """
+        Prepares the dataset from the previously published CSVs, fetching only the deliveries of the matches which are not
+        exported yet. The match IDs of the previous matchwise CSV act as the watermark of the export, so that matches arriving
+        late with an older date are picked up as well. Every match is renumbered, as such a match shifts the later ones.
+        The deliveries of the revised matches are fetched again, replacing the ones of the previous CSV.
+
+        :param revised_match_ids: Match IDs whose deliveries are fetched again, if they were exported already
+        :return: Whether the dataset could be prepared incrementally, otherwise it needs a full rebuild
+        """
+        previous_matchwise_dataframe = self._read_published_csv_from_s3(MATCHWISE_DATA_CSV_FILE_NAME)
+        previous_deliverywise_dataframe = self._read_published_csv_from_s3(DELIVERYWISE_DATA_CSV_FILE_NAME)
+        if previous_matchwise_dataframe is None or previous_deliverywise_dataframe is None:
+            logger.info("Previously published dataset is not available, falling back to a full rebuild.")
+            return False
+
+        matchwise_dataframe = self.matchwise_data
+        exported_match_ids = set(previous_matchwise_dataframe["match_id"])
+        if not exported_match_ids.issubset(matchwise_dataframe["match_id"]):
+            logger.info("Previously published dataset has matches which are not in MongoDB, falling back to a full rebuild.")
+            return False
+        new_match_ids = [int(match_id) for match_id in matchwise_dataframe["match_id"] if match_id not in exported_match_ids]
+        revised_match_ids = [match_id for match_id in revised_match_ids if match_id in exported_match_ids]
+        if not new_match_ids and not revised_match_ids:
+            logger.info("No new matches since the previous export, the published dataset is up to date.")
+            return True
+
+        logger.info(f"Preparing deliverywise data of {len(new_match_ids)} new matches and {len(revised_match_ids)} revised matches.")
+        deliverywise_dataframe = pd.concat(
+            [
+                previous_deliverywise_dataframe[~previous_deliverywise_dataframe["match_id"].isin(revised_match_ids)].drop(columns=["match_number"]),
+                self._dataset_export_query.get_deliverywise_data_of_matches(new_match_ids + revised_match_ids)
+            ],
+            ignore_index=True
+        )
+        deliverywise_dataframe = self._dataset_export_query.add_match_number_to_deliverywise_data(deliverywise_dataframe)
+        self._upload_dataset_to_s3(matchwise_dataframe, deliverywise_dataframe)
+        return True
+
+    def _prepare_dataset_by_streaming(self):
+        """
+        Prepares the dataset without holding the deliverywise data in memory as a whole. The deliveries are fetched a few matches
+        at a time, encoded to CSV and sent to S3 in fixed size parts of a multipart upload.
+        """
+        logger.info("Streaming dataset for matchwise data.")
+        self._stream_dataframes_to_s3([self.matchwise_data], MATCHWISE_DATA_CSV_FILE_NAME, MATCHWISE_DATA_PARQUET_FILE_NAME, get_matchwise_data_arrow_schema)
+        logger.info("Streaming dataset for deliverywise data.")
+        self._stream_dataframes_to_s3(
+            self._dataset_export_query.iterate_deliverywise_data_in_chunks(),
+            DELIVERYWISE_DATA_CSV_FILE_NAME,
+            DELIVERYWISE_DATA_PARQUET_FILE_NAME,
+            get_deliverywise_data_arrow_schema
+        )
+
+    def _stream_dataframes_to_s3(self, dataframes: Iterable[pd.DataFrame], filename: str, parquet_filename: str, get_arrow_schema: Callable):
+        filename = get_dataset_output_file_name(filename, self._dataset_output_compression)
+        logger.info(f"Streaming DataFrames to '{filename}' in '{self._s3_bucket_name}'")
+        try:
+            compressor = DatasetOutputCompressor(self._dataset_output_compression)
+            with ExitStack() as exit_stack:
+                writer = exit_stack.enter_context(S3MultipartUploadWriter(
+                    self._s3_client, self._s3_bucket_name, f"{CRICSHEET_DATA_S3_OUTPUT_FOLDER}/{filename}", extra_args=compressor.s3_extra_args
+                ))
+                # Entered last so that the Parquet file is uploaded before the CSV file, whose creation triggers the Kaggle upload
+                parquet_writer = exit_stack.enter_context(ParquetDatasetWriter(
+                    self._s3_client,
+                    self._s3_bucket_name,
+                    f"{CRICSHEET_DATA_S3_OUTPUT_FOLDER}/{parquet_filename}",
+                    get_arrow_schema(),
+                    self._parquet_compression
+                )) if self._is_parquet_output_enabled else None
+                for chunk_number, dataframe in enumerate(dataframes):
+                    with timed_span("CsvEncode"):
+                        csv_content = compressor.compress(dataframe.to_csv(index=False, header=chunk_number == 0).encode("utf-8"))
+                    record_metric("RecordsProduced", len(dataframe))
+                    writer.write(csv_content)
+                    if parquet_writer is not None:
+                        parquet_writer.write(dataframe)
+                writer.write(compressor.flush())
+            logger.info(f"CSV file '{filename}' streamed to S3 successfully.")
+
+        except Exception as e:
+            logger.error(f"Failed to stream '{filename}' to S3: {str(e)}", exc_info=True)
+            raise
+
+    def _read_published_csv_from_s3(self, filename: str) -> Optional[pd.DataFrame]:
+        filename = get_dataset_output_file_name(filename, self._dataset_output_compression)
+        try:
+            response = self._s3_client.get_object(Bucket=self._s3_bucket_name, Key=f"{CRICSHEET_DATA_S3_OUTPUT_FOLDER}/{filename}")
+        except self._s3_client.exceptions.NoSuchKey:
+            logger.info(f"Published CSV file '{filename}' not found in S3.")
+            return None
+        # Names like "NA" or "None" are kept as they are, and the key columns stay integers, so that the merged rows are published unchanged
+        return pd.read_csv(
+            response["Body"],
+            compression=None if self._dataset_output_compression == "none" else self._dataset_output_compression,
+            keep_default_na=False,
+            dtype={column: "int64" for column in COMPOSITE_DELIVERY_KEY_COLUMNS + ["match_number"]}
+        )
+
+    def _upload_dataset_to_s3(self, matchwise_dataframe: pd.DataFrame, deliverywise_dataframe: pd.DataFrame):
+        # The deliverywise CSV file is uploaded last, as its creation triggers the Kaggle upload
+        if self._is_parquet_output_enabled:
+            logger.info("Preparing Parquet dataset.")
+            self._convert_dataframe_to_parquet_and_upload_to_s3(matchwise_dataframe, MATCHWISE_DATA_PARQUET_FILE_NAME, get_matchwise_data_arrow_schema())
+            self._convert_dataframe_to_parquet_and_upload_to_s3(
+                deliverywise_dataframe, DELIVERYWISE_DATA_PARQUET_FILE_NAME, get_deliverywise_data_arrow_schema()
+            )
         logger.info("Preparing dataset for matchwise data.")
-        self._convert_dataframe_to_csv_and_upload_to_s3(self.matchwise_data, MATCHWISE_DATA_CSV_FILE_NAME)
+        self._convert_dataframe_to_csv_and_upload_to_s3(matchwise_dataframe, MATCHWISE_DATA_CSV_FILE_NAME)
         logger.info("Preparing dataset for deliverywise data.")
-        self._convert_dataframe_to_csv_and_upload_to_s3(self.deliverywise_data, DELIVERYWISE_DATA_CSV_FILE_NAME)
+        self._convert_dataframe_to_csv_and_upload_to_s3(deliverywise_dataframe, DELIVERYWISE_DATA_CSV_FILE_NAME)
+
+    def _convert_dataframe_to_parquet_and_upload_to_s3(self, dataframe: pd.DataFrame, filename: str, arrow_schema):
+        logger.info(f"Converting DataFrame to '{filename}' and uploading to '{self._s3_bucket_name}'")
+        try:
+            with ParquetDatasetWriter(
+                self._s3_client, self._s3_bucket_name, f"{CRICSHEET_DATA_S3_OUTPUT_FOLDER}/{filename}", arrow_schema, self._parquet_compression
+            ) as writer:
+                writer.write(dataframe)
+            logger.info(f"Parquet file '{filename}' uploaded to S3 successfully.")
+
+        except Exception as e:
+            logger.error(f"Failed to upload '{filename}' to S3: {str(e)}", exc_info=True)
+            raise
 
     def _convert_dataframe_to_csv_and_upload_to_s3(self, dataframe: pd.DataFrame, filename: str):
+        filename = get_dataset_output_file_name(filename, self._dataset_output_compression)
         logger.info(f"Converting DataFrame to '{filename}' and uploading to '{self._s3_bucket_name}'")
         try:
-            csv_buffer = io.StringIO()
-            dataframe.to_csv(csv_buffer, index=False)
-            self._s3_resource.Object(self._s3_bucket_name, f"{CRICSHEET_DATA_S3_OUTPUT_FOLDER}/{filename}").put(    # type: ignore
-                Body=csv_buffer.getvalue()
-            )
+            with timed_span("CsvEncode"):
+                csv_buffer = io.StringIO()
+                dataframe.to_csv(csv_buffer, index=False)
+                compressor = DatasetOutputCompressor(self._dataset_output_compression)
+                csv_content = compressor.compress(csv_buffer.getvalue().encode("utf-8")) + compressor.flush()
+            record_metric("RecordsProduced", len(dataframe))
+            with timed_span("S3Put"):
+                self._s3_resource.Object(self._s3_bucket_name, f"{CRICSHEET_DATA_S3_OUTPUT_FOLDER}/{filename}").put(    # type: ignore
+                    Body=csv_content,
+                    **compressor.s3_extra_args
+                )
+            record_metric("BytesWritten", len(csv_content), "Bytes")
             logger.info(f"CSV file '{filename}' uploaded to S3 successfully.")
 
         except Exception as e:
@@ -76,10 +241,27 @@ class DatasetPreparationHandler:
 
 
 @exception_handler  # noqa: Vulture
-def handler(_, __):     # noqa: Vulture
+def handler(event, _):     # noqa: Vulture
     """
     Lambda function handler to convert MongoDB data to CSV and upload to S3.
     """
     dataset_preparation_handler = DatasetPreparationHandler()
-    dataset_preparation_handler.prepare_dataset()
+    dataset_preparation_handler.prepare_dataset(_get_revised_match_ids_of_event(event))
     return "Datasets prepared and uploaded to S3 successfully."
+
+
+def _get_revised_match_ids_of_event(event: Dict) -> List[int]:
+    """
+    :param event: SQS event of the messages the download lambda sends once it has sent the new and the revised files for processing
+    :return: Match IDs of the revised files of every message
+    """
+    revised_match_ids: List[int] = []
+    for record in event.get("Records", []):
+        try:
+            revised_files = json.loads(record["body"]).get("revised_files", [])
+        except json.JSONDecodeError:
+            # Messages sent before the message body was JSON carry the new files alone
+            logger.warning(f"Message {record.get('messageId')} is not JSON, assuming that it has no revised files")
+            continue
+        revised_match_ids.extend(int(os.path.splitext(file)[0]) for file in revised_files)
+    return revised_match_ids
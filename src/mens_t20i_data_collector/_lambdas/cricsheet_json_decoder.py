@@ -0,0 +1,67 @@
+import functools
+import json
+import logging
+from typing import Callable, Dict, List, TypedDict, Union
+from mens_t20i_data_collector._lambdas.constants import CRICSHEET_JSON_DECODERS
+
+# Set up logging
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+CricsheetJsonDecoder = Callable[[Union[bytes, str]], Dict]
+
+
+# Schema of the fields of a cricsheet JSON file read by the CricsheetMatchDataParser. The typed decoder skips every other field,
+# like the registry of people and the officials, without building Python objects for them
+_Event = TypedDict("_Event", {"name": str}, total=False)
+_Toss = TypedDict("_Toss", {"winner": str, "decision": str}, total=False)
+_Margin = TypedDict("_Margin", {"runs": int, "wickets": int}, total=False)
+_Outcome = TypedDict("_Outcome", {"winner": str, "result": str, "by": _Margin, "method": str}, total=False)
+_Info = TypedDict("_Info", {
+    "teams": List[str], "match_type_number": int, "dates": List[str], "event": _Event, "venue": str, "city": str, "toss": _Toss,
+    "outcome": _Outcome, "player_of_match": List[str], "match_type": str, "gender": str, "team_type": str,
+}, total=False)
+_Extras = TypedDict("_Extras", {"wides": int, "legbyes": int, "byes": int, "noballs": int, "penalty": int}, total=False)
+_Runs = TypedDict("_Runs", {"batter": int, "extras": int, "total": int}, total=False)
+_Fielder = TypedDict("_Fielder", {"name": str}, total=False)
+_Wicket = TypedDict("_Wicket", {"player_out": str, "kind": str, "fielders": List[_Fielder]}, total=False)
+_Delivery = TypedDict("_Delivery", {
+    "batter": str, "bowler": str, "non_striker": str, "extras": _Extras, "runs": _Runs, "wickets": List[_Wicket],
+}, total=False)
+_Over = TypedDict("_Over", {"over": int, "deliveries": List[_Delivery]}, total=False)
+_Innings = TypedDict("_Innings", {"team": str, "overs": List[_Over]}, total=False)
+_CricsheetMatch = TypedDict("_CricsheetMatch", {"info": _Info, "innings": List[_Innings]}, total=False)
+
+
+@functools.lru_cache(maxsize=None)
+def get_cricsheet_json_decoder(decoder_name: str) -> CricsheetJsonDecoder:
+    """
+    Gets the function decoding the content of a cricsheet JSON file into the dictionary read by the CricsheetMatchDataParser.
+    "standard" decodes it with the json module, "fast" with orjson or msgspec, whichever is installed, and "typed" decodes
+    only the fields of the cricsheet schema read by the parser with msgspec. A decoder whose package is not installed falls
+    back to the next faster one, down to the json module.
+
+    :param decoder_name: Name of the decoder, one of CRICSHEET_JSON_DECODERS
+    :return: Function decoding the bytes or the text of a cricsheet JSON file
+    """
+    if decoder_name not in CRICSHEET_JSON_DECODERS:
+        raise ValueError(f"Unsupported cricsheet JSON decoder '{decoder_name}'")
+    if decoder_name == "typed":
+        try:
+            import msgspec  # pylint: disable=import-outside-toplevel
+            return msgspec.json.Decoder(_CricsheetMatch).decode
+        except ImportError:
+            logger.warning("msgspec is not installed, falling back to the fast cricsheet JSON decoder")
+            decoder_name = "fast"
+    if decoder_name == "fast":
+        try:
+            import orjson  # pylint: disable=import-outside-toplevel
+            return orjson.loads  # pylint: disable=no-member
+        except ImportError:
+            pass
+        try:
+            import msgspec  # pylint: disable=import-outside-toplevel
+            return msgspec.json.decode
+        except ImportError:
+            logger.warning("Neither orjson nor msgspec is installed, falling back to the standard cricsheet JSON decoder")
+    return json.loads
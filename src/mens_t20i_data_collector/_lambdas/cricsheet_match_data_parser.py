@@ -0,0 +1,142 @@
+import logging
+from typing import Dict, List, Optional
+from mens_t20i_data_collector._lambdas.delivery_data_accumulator import (
+    DeliveryDataAccumulator
+)
+
+# Set up logging
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+class CricsheetMatchDataParser:
+
+    """Parses the JSON data of a cricsheet match, walking its innings only once for both the deliverywise and the matchwise data."""
+
+    def __init__(self, json_data: Dict, match_id: int) -> None:
+        """
+        :param json_data: The JSON data of the cricsheet match
+        :param match_id: Match ID of the cricsheet match
+        """
+        self._json_data = json_data
+        self._match_id = match_id
+        self._total_runs_by_team: Optional[Dict[str, int]] = None
+        self.delivery_data_accumulator = DeliveryDataAccumulator()
+
+    def parse_innings(self, collect_deliveries: bool = True) -> None:
+        """
+        Walks every delivery of the match once, summing up the runs of every team and optionally collecting the deliveries.
+
+        :param collect_deliveries: Whether the deliveries need to be appended to the delivery data accumulator
+        """
+        teams: List[str] = self._json_data["info"]["teams"]
+        innings_data: List[Dict] = self._json_data.get('innings', [])
+        self._total_runs_by_team = {}
+        for innings_number, innings in enumerate(innings_data, start=1):
+            batting_team = innings.get('team')
+            bowling_team = [team for team in teams if team != batting_team][0]
+            total_runs_of_innings = 0
+            for over_data in innings.get('overs', []):
+                over_number = over_data["over"]
+                for ball_number, ball_data in enumerate(over_data.get('deliveries', []), start=1):
+                    total_runs_of_innings += int(ball_data.get("runs", {}).get("total", 0))
+                    if collect_deliveries:
+                        self.delivery_data_accumulator.append(self._get_delivery_data_of_single_delivery(
+                            ball_data, ball_number, batting_team, bowling_team, innings_number, over_number
+                        ))
+            self._total_runs_by_team[batting_team] = self._total_runs_by_team.get(batting_team, 0) + total_runs_of_innings
+        logger.info(f"Parsed {len(innings_data)} innings of match ID: {self._match_id}")
+
+    def get_match_data(self) -> Dict:
+        """
+        Builds the matchwise data of the match. The innings need to be parsed before.
+
+        :return: The match data
+        """
+        if self._total_runs_by_team is None:
+            raise ValueError("Innings of the match are not parsed yet")
+        info = self._json_data.get('info', {})
+        teams = info.get('teams', [])
+        return {
+            "index": int(info.get('match_type_number')),
+            "match_id": self._match_id,
+            "date": info.get('dates', [None])[0],
+            "event_name": info.get('event', {}).get('name'),
+            "ground_name": info.get('venue'),
+            "ground_city": info.get('city'),
+            "team_1": teams[0] if teams else None,
+            "team_2": teams[1] if len(teams) > 1 else None,
+            "toss_winner": info.get('toss', {}).get('winner'),
+            "toss_decision": info.get('toss', {}).get('decision'),
+            "team_1_total_runs": self._total_runs_by_team.get(teams[0], 0),
+            "team_2_total_runs": self._total_runs_by_team.get(teams[1], 0) if len(teams) > 1 else None,
+            "winner": info.get('outcome', {}).get('winner') or info.get('outcome', {}).get('result'),
+            "margin_runs": info.get('outcome', {}).get('by', {}).get('runs'),
+            "margin_wickets": info.get('outcome', {}).get('by', {}).get('wickets'),
+            "winning_method": info.get('outcome', {}).get('method'),
+            "player_of_the_match": info.get('player_of_match', [None])[0]
+        }
+
+    def _get_delivery_data_of_single_delivery(  # pylint: disable=[too-many-arguments, too-many-locals]
+        self, ball_data: Dict, ball_number: int, batting_team: str, bowling_team: str, innings_number: int, over_number: int
+    ) -> Dict:
+        """
+        Extracts and returns delivery data for a single ball.
+
+        :param ball_data: Ball data from the cricsheet JSON
+        :param ball_number: The ball number in the over
+        :param batting_team: The batting team
+        :param bowling_team: The bowling team
+        :param innings_number: The innings number
+        :param over_number: The over number
+        :return: A dictionary representing a single delivery
+        """
+        batter = ball_data.get("batter")
+        bowler = ball_data.get("bowler")
+        non_striker = ball_data.get("non_striker")
+
+        # Extras
+        extras_data = ball_data.get("extras", {})
+        wide_runs = extras_data.get("wides", 0)
+        leg_bye_runs = extras_data.get("legbyes", 0)
+        bye_runs = extras_data.get("byes", 0)
+        no_ball_runs = extras_data.get("noballs", 0)
+        penalty_runs = extras_data.get("penalty", 0)
+
+        # Runs
+        batsman_runs = ball_data.get("runs", {}).get("batter", 0)
+        extra_runs = ball_data.get("runs", {}).get("extras", 0)
+        total_runs = ball_data.get("runs", {}).get("total", 0)
+
+        # Wickets
+        wickets_data = ball_data.get("wickets", [])
+        player_dismissed = None
+        dismissal_type = None
+        fielder_name = None
+        if wickets_data:
+            player_dismissed = wickets_data[0].get("player_out")
+            dismissal_type = wickets_data[0].get("kind")
+            fielder_name = wickets_data[0].get("fielders", [{}])[0].get("name")
+
+        return {
+            "match_id": self._match_id,
+            "innings_number": innings_number,
+            "batting_team": batting_team,
+            "bowling_team": bowling_team,
+            "over_number": over_number,
+            "ball_number": ball_number,
+            "batter": batter,
+            "bowler": bowler,
+            "non_striker": non_striker,
+            "wide_runs": wide_runs,
+            "leg_bye_runs": leg_bye_runs,
+            "bye_runs": bye_runs,
+            "no_ball_runs": no_ball_runs,
+            "penalty_runs": penalty_runs,
+            "batsman_runs": batsman_runs,
+            "extra_runs": extra_runs,
+            "total_runs": total_runs,
+            "player_dismissed": player_dismissed,
+            "dismissal_type": dismissal_type,
+            "fielder_name": fielder_name
+        }
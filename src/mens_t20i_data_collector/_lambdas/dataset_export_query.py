@@ -0,0 +1,118 @@
+import logging
+from typing import Callable, Dict, Iterable, Iterator, List
+import pandas as pd
+from mens_t20i_data_collector._lambdas.client_registry import (
+    create_mongo_db_index
+)
+from mens_t20i_data_collector._lambdas.constants import (
+    DELIVERYWISE_DATAFRAME_COLUMNS,
+    MATCHES_PER_CHUNK_OF_STREAMING_DATASET_EXPORT
+)
+
+# Set up logging
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+class DatasetExportQuery:
+
+    """
+    Queries the MongoDB collections for the dataset export. Only the fields present in the dataset are fetched, and the prepared
+    dataframes are memoized for the lifetime of the object, so a single export run reads every collection at most once.
+    The memoized dataframes are shared between the callers, which must not modify them in place.
+    """
+
+    def __init__(self, matchwise_data_mongo_collection, deliverywise_data_mongo_collection, cursor_batch_size: int):
+        """
+        :param matchwise_data_mongo_collection: MongoDB collection storing the matchwise data
+        :param deliverywise_data_mongo_collection: MongoDB collection storing the deliverywise data
+        :param cursor_batch_size: Number of documents fetched from MongoDB in every round trip of the cursors
+        """
+        self._matchwise_data_mongo_collection = matchwise_data_mongo_collection
+        self._deliverywise_data_mongo_collection = deliverywise_data_mongo_collection
+        self._cursor_batch_size = cursor_batch_size
+        self._deliverywise_data_projection = {"_id": 0, **{column: 1 for column in DELIVERYWISE_DATAFRAME_COLUMNS}}
+        self._memoized_dataframes: Dict[str, pd.DataFrame] = {}
+
+    @property
+    def matchwise_data(self) -> pd.DataFrame:
+        """
+        :return: Matchwise data sorted by date, with the matches numbered in that order
+        """
+        return self._get_memoized_dataframe("matchwise_data", self._prepare_matchwise_data)
+
+    @property
+    def deliverywise_data(self) -> pd.DataFrame:
+        """
+        :return: Deliverywise data of every match, sorted by the match number and the position of the delivery
+        """
+        return self._get_memoized_dataframe("deliverywise_data", lambda: self.add_match_number_to_deliverywise_data(
+            self._find_deliverywise_data({})
+        ))
+
+    def add_match_number_to_deliverywise_data(self, deliverywise_dataframe: pd.DataFrame) -> pd.DataFrame:
+        """
+        Adds the match number of the matchwise data to the given deliveries and sorts them by it.
+
+        :param deliverywise_dataframe: Deliveries without the match number
+        :return: Deliveries with the match number, sorted by the match number and the position of the delivery
+        """
+        return self.merge_match_number_into_deliverywise_data(deliverywise_dataframe, self.matchwise_data)
+
+    @staticmethod
+    def merge_match_number_into_deliverywise_data(deliverywise_dataframe: pd.DataFrame, matchwise_dataframe: pd.DataFrame) -> pd.DataFrame:
+        """
+        :param deliverywise_dataframe: Deliveries without the match number
+        :param matchwise_dataframe: Matchwise data with the match number, as prepared by `prepare_matchwise_dataframe`
+        :return: Deliveries with the match number, sorted by the match number and the position of the delivery
+        """
+        deliverywise_dataframe = deliverywise_dataframe.merge(matchwise_dataframe[["match_number", "match_id"]], on="match_id", how="left")
+        deliverywise_dataframe.sort_values(by=["match_number", "innings_number", "over_number", "ball_number"], inplace=True)
+        return deliverywise_dataframe
+
+    @staticmethod
+    def prepare_matchwise_dataframe(matchwise_documents: Iterable[Dict]) -> pd.DataFrame:
+        """
+        :param matchwise_documents: Matchwise data of every match, without the MongoDB ID
+        :return: Matchwise data sorted by date, with the matches numbered in that order
+        """
+        matchwise_dataframe = pd.DataFrame(matchwise_documents)
+        matchwise_dataframe.rename(columns={"index": "match_number"}, inplace=True)
+        matchwise_dataframe.sort_values(by=["date", "match_id"], inplace=True)
+        matchwise_dataframe["match_number"] = range(1, len(matchwise_dataframe) + 1)
+        return matchwise_dataframe
+
+    def get_deliverywise_data_of_matches(self, match_ids: List[int]) -> pd.DataFrame:
+        """
+        :param match_ids: Match IDs whose deliveries need to be fetched
+        :return: Deliveries of the given matches, without the match number
+        """
+        logger.info(f"Fetching deliverywise data of {len(match_ids)} matches from MongoDB")
+        return self._find_deliverywise_data({"match_id": {"$in": match_ids}})
+
+    def iterate_deliverywise_data_in_chunks(self, matches_per_chunk: int = MATCHES_PER_CHUNK_OF_STREAMING_DATASET_EXPORT) -> Iterator[pd.DataFrame]:
+        """
+        Fetches the deliverywise data a few matches at a time, in the order of the match number, so that only the deliveries
+        of a single chunk of matches are held in memory. The chunks are fetched through an index on the match ID.
+
+        :param matches_per_chunk: Number of matches whose deliveries are fetched together
+        :return: Iterator of the chunks of deliveries, each with the match number and sorted like the deliverywise data
+        """
+        create_mongo_db_index(self._deliverywise_data_mongo_collection, "match_id")
+        match_ids = [int(match_id) for match_id in self.matchwise_data["match_id"]]
+        for index in range(0, len(match_ids), matches_per_chunk):
+            yield self.add_match_number_to_deliverywise_data(self.get_deliverywise_data_of_matches(match_ids[index:index + matches_per_chunk]))
+
+    def _find_deliverywise_data(self, query: Dict) -> pd.DataFrame:
+        cursor = self._deliverywise_data_mongo_collection.find(query, self._deliverywise_data_projection).batch_size(self._cursor_batch_size)
+        # The columns are given, so that the dataframe of matches without deliveries still has them
+        return pd.DataFrame(cursor, columns=DELIVERYWISE_DATAFRAME_COLUMNS)
+
+    def _get_memoized_dataframe(self, name: str, prepare_dataframe: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        if name not in self._memoized_dataframes:
+            logger.info(f"Preparing {name}.")
+            self._memoized_dataframes[name] = prepare_dataframe()
+        return self._memoized_dataframes[name]
+
+    def _prepare_matchwise_data(self) -> pd.DataFrame:
+        return self.prepare_matchwise_dataframe(self._matchwise_data_mongo_collection.find({}, {"_id": 0}).batch_size(self._cursor_batch_size))
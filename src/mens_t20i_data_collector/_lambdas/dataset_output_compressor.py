@@ -0,0 +1,57 @@
+import zlib
+from typing import Dict
+from mens_t20i_data_collector._lambdas.constants import (
+    DATASET_OUTPUT_COMPRESSION_CONTENT_TYPES,
+    DATASET_OUTPUT_COMPRESSION_FILE_EXTENSIONS
+)
+
+
+class DatasetOutputCompressor:
+
+    """Incremental compressor of a dataset output file with the selected codec, which is either gzip, zstd or none."""
+
+    def __init__(self, codec: str) -> None:
+        """
+        :param codec: Compression codec of the dataset output
+        """
+        if codec not in DATASET_OUTPUT_COMPRESSION_FILE_EXTENSIONS:
+            raise ValueError(f"Unsupported dataset output compression '{codec}'")
+        self._codec = codec
+        self._compressor = None
+        if codec == "gzip":
+            self._compressor = zlib.compressobj(wbits=31)   # 31 writes the gzip header and trailer
+        elif codec == "zstd":
+            import zstandard  # pylint: disable=import-outside-toplevel
+            self._compressor = zstandard.ZstdCompressor().compressobj()
+
+    @property
+    def s3_extra_args(self) -> Dict[str, str]:
+        """
+        The compressed file is stored as an archive of its own type rather than as a content encoded CSV, so that clients
+        downloading the .csv.gz or .csv.zst file keep it compressed instead of transparently decoding it.
+
+        :return: Arguments of the S3 upload describing the type of the compressed file
+        """
+        return {"ContentType": DATASET_OUTPUT_COMPRESSION_CONTENT_TYPES[self._codec]} if self._compressor is not None else {}
+
+    def compress(self, data: bytes) -> bytes:
+        """
+        :param data: Next bytes of the output file
+        :return: Compressed bytes available so far, possibly empty
+        """
+        return data if self._compressor is None else self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        """
+        :return: Remaining compressed bytes, which end the compressed output file
+        """
+        return b"" if self._compressor is None else self._compressor.flush()
+
+
+def get_dataset_output_file_name(file_name: str, codec: str) -> str:
+    """
+    :param file_name: Name of the uncompressed dataset output file
+    :param codec: Compression codec of the dataset output
+    :return: Name of the dataset output file, carrying the extension of the codec
+    """
+    return f"{file_name}{DATASET_OUTPUT_COMPRESSION_FILE_EXTENSIONS[codec]}"
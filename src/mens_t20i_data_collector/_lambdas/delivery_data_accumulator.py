@@ -0,0 +1,52 @@
+import logging
+from array import array
+from typing import Dict, List, Union
+from mens_t20i_data_collector._lambdas.constants import (
+    COMPOSITE_DELIVERY_KEY_COLUMNS,
+    DELIVERYWISE_DATAFRAME_COLUMNS,
+    DELIVERYWISE_DATAFRAME_INTEGER_COLUMNS
+)
+
+# Set up logging
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+class DeliveryDataAccumulator:
+
+    """Column oriented buffer which collects the deliveries of a match and materialises them in one step."""
+
+    def __init__(self) -> None:
+        self._columns: Dict[str, Union[array, List]] = {
+            column: array("q") if column in DELIVERYWISE_DATAFRAME_INTEGER_COLUMNS else []
+            for column in DELIVERYWISE_DATAFRAME_COLUMNS
+        }
+
+    def __len__(self) -> int:
+        return len(self._columns[DELIVERYWISE_DATAFRAME_COLUMNS[0]])
+
+    def append(self, delivery_record: Dict) -> None:
+        """
+        Appends a single delivery to the buffer.
+
+        :param delivery_record: A dictionary representing a single delivery, keyed by the deliverywise dataframe columns
+        """
+        for column, values in self._columns.items():
+            values.append(delivery_record[column])
+
+    def to_mongo_documents(self) -> List[Dict]:
+        """
+        Builds the MongoDB documents of the buffered deliveries without pandas, identified by their composite delivery key.
+
+        :return: Documents keyed by the deliverywise dataframe columns, along with the composite delivery key as ID
+        """
+        columns = list(self._columns)
+        documents = []
+        for values in zip(*self._columns.values()):
+            document = dict(zip(columns, values))
+            composite_delivery_key = f"({', '.join(str(document[column]) for column in COMPOSITE_DELIVERY_KEY_COLUMNS)})"
+            document["composite_delivery_key"] = composite_delivery_key
+            document["_id"] = composite_delivery_key
+            documents.append(document)
+        logger.info(f"Built {len(documents)} delivery documents")
+        return documents
@@ -1,13 +1,40 @@
+import gzip
+import json
 import logging
 import os
+import threading
+import time
 import zipfile
-from typing import List, Set
-import boto3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
 import requests
+from mens_t20i_data_collector._lambdas.client_registry import (
+    get_boto3_client,
+    get_boto3_resource
+)
 from mens_t20i_data_collector._lambdas.constants import (
+    CRICSHEET_DATA_DOWNLOAD_CHUNK_SIZE_IN_BYTES,
+    CRICSHEET_DATA_DOWNLOAD_STATE_FILE_NAME,
+    CRICSHEET_DATA_DOWNLOAD_TIMEOUT_IN_SECONDS,
     CRICSHEET_DATA_DOWNLOADING_URL,
     CRICSHEET_DATA_S3_FOLDER_NAME,
-    CRICSHEET_DATA_S3_FOLDER_TO_STORE_PROCESSED_JSON_FILES_ZIP
+    CRICSHEET_DATA_S3_FOLDER_TO_STORE_NEW_MATCH_BUNDLE_INDEXES,
+    CRICSHEET_DATA_S3_FOLDER_TO_STORE_NEW_MATCH_BUNDLES,
+    CRICSHEET_DATA_S3_FOLDER_TO_STORE_PROCESSED_JSON_FILES_ZIP,
+    CRICSHEET_RECENTLY_ADDED_DATA_DOWNLOADING_URL,
+    CRICSHEET_RECENTLY_ADDED_DATA_WINDOWS_IN_DAYS,
+    MATCHES_PER_NEW_MATCH_BUNDLE,
+    MENS_T20I_MATCH_INFO,
+    REJECTED_FILES_MANIFEST_FILE_NAME
+)
+from mens_t20i_data_collector._lambdas.execution_metrics import (
+    record_metric,
+    timed_span
+)
+from mens_t20i_data_collector._lambdas.processed_files_manifest import (
+    ProcessedFilesManifest,
+    get_content_crc32_of_dynamodb_item
 )
 from mens_t20i_data_collector._lambdas.utils import (
     exception_handler,
@@ -19,110 +46,356 @@ logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 
-class DownloadDataFromCricsheetHandler:
+class DownloadDataFromCricsheetHandler:  # pylint: disable=too-many-instance-attributes
 
     def __init__(self) -> None:
         self._cricsheet_url = CRICSHEET_DATA_DOWNLOADING_URL
-        dynamodb_client = boto3.resource("dynamodb")
-        self._dynamo_db_to_store_file_data_extraction_status = dynamodb_client.Table(   # type: ignore
+        self._dynamodb_client = get_boto3_resource("dynamodb")
+        self._dynamo_db_to_store_file_data_extraction_status = self._dynamodb_client.Table(   # type: ignore
             get_environmental_variable_value("DYNAMODB_TABLE_NAME")
         )
         self._s3_bucket_name = get_environmental_variable_value("DOWNLOAD_BUCKET_NAME")
         self._threshold_for_number_of_files_to_be_sent_for_processing = int(get_environmental_variable_value(
             "THRESHOLD_FOR_NUMBER_OF_FILES_TO_BE_SENT_FOR_PROCESSING"
         ))
-        self._s3_client = boto3.client("s3")
+        self._is_bundled_upload_enabled = get_environmental_variable_value("CRICSHEET_DATA_UPLOAD_MODE") == "bundle"
+        self._is_incremental_download_enabled = get_environmental_variable_value("CRICSHEET_DATA_DOWNLOAD_MODE") == "incremental"
+        self._s3_upload_concurrency = int(get_environmental_variable_value("S3_UPLOAD_CONCURRENCY"))
+        # The client is shared by the upload threads, so its connection pool is sized to the upload concurrency
+        self._s3_client = get_boto3_client("s3", max_pool_connections=self._s3_upload_concurrency)
+        self._processed_files_manifest = ProcessedFilesManifest(self._s3_client, self._s3_bucket_name)
+        # Files of the archives of recently added matches which are not men's T20Is, so that they are parsed only once
+        self._rejected_files_manifest = ProcessedFilesManifest(self._s3_client, self._s3_bucket_name, REJECTED_FILES_MANIFEST_FILE_NAME)
         self._temp_folder: str = "/tmp"
-        self._extraction_directory: str = f"{self._temp_folder}/extracted_files"
         self._s3_folder_to_store_cricsheet_data: str = CRICSHEET_DATA_S3_FOLDER_NAME
         self._s3_folder_to_store_processed_json_files_zip: str = CRICSHEET_DATA_S3_FOLDER_TO_STORE_PROCESSED_JSON_FILES_ZIP
+        self._download_state_s3_key = f"{self._s3_folder_to_store_cricsheet_data}/{CRICSHEET_DATA_DOWNLOAD_STATE_FILE_NAME}"
+        self._download_state: Dict = {}
+        self._download_validators_of_current_run: Dict[str, str] = {}
+        self._all_new_files_sent_for_processing: bool = False
 
-    def download_data_from_cricsheet(self) -> str:
-        try:
-            logger.info(f"Starting download from {self._cricsheet_url}")
-            response = requests.get(self._cricsheet_url, timeout=10)
-            response.raise_for_status()
-        except requests.RequestException as e:
-            logger.error(f"Failed to download data from Cricsheet: {e}")
-            raise
+    def download_data_from_cricsheet(self) -> Optional[str]:
+        """
+        Downloads the zip file from Cricsheet in chunks straight to the disk. The request is conditional on the ETag and
+        Last-Modified values of the previous download, so nothing is downloaded when Cricsheet has not changed the file.
+
+        In incremental mode, the smallest archive of recently added matches covering the time since the last successful run
+        is downloaded instead of the complete archive, which is still used when no such archive covers the gap.
 
+        :return: Path of the downloaded zip file, or None when the file has not changed since the previous download
+        """
+        self._download_state = self._get_download_state_of_previous_run()
+        self._cricsheet_url = self._get_cricsheet_url_to_download()
         zip_file_name = os.path.basename(self._cricsheet_url)
         zip_file_path = f"{self._temp_folder}/{zip_file_name}"
+        previous_download_validators = self._download_state.get("download_validators", {}).get(self._cricsheet_url, {})
+        conditional_request_headers = {
+            "If-None-Match": previous_download_validators.get("ETag"),
+            "If-Modified-Since": previous_download_validators.get("Last-Modified"),
+        }
 
         try:
-            with open(zip_file_path, "wb") as file:
-                file.write(response.content)
-            logger.info(f"File downloaded successfully from cricsheet and placed in {zip_file_path}")
-            return zip_file_path
+            logger.info(f"Starting download from {self._cricsheet_url}")
+            with requests.get(
+                self._cricsheet_url,
+                headers={header: value for header, value in conditional_request_headers.items() if value},
+                stream=True,
+                timeout=CRICSHEET_DATA_DOWNLOAD_TIMEOUT_IN_SECONDS,
+            ) as response:
+                if response.status_code == 304:
+                    logger.info("Cricsheet data has not changed since the previous download")
+                    self._all_new_files_sent_for_processing = True
+                    return None
+                response.raise_for_status()
+                with timed_span("CricsheetDownload"), open(zip_file_path, "wb") as file:
+                    for chunk in response.iter_content(chunk_size=CRICSHEET_DATA_DOWNLOAD_CHUNK_SIZE_IN_BYTES):
+                        file.write(chunk)
+                record_metric("BytesRead", os.path.getsize(zip_file_path), "Bytes")
+                self._download_validators_of_current_run = {
+                    header: response.headers[header] for header in ("ETag", "Last-Modified") if header in response.headers
+                }
+        except requests.RequestException as e:
+            logger.error(f"Failed to download data from Cricsheet: {e}")
+            raise
         except IOError as e:
             logger.error(f"Failed to write downloaded data to {zip_file_path}: {e}")
             raise
 
+        logger.info(f"File downloaded successfully from cricsheet and placed in {zip_file_path}")
+        return zip_file_path
+
+    def store_download_state(self) -> None:
+        """
+        Stores the time of the current run along with the ETag and Last-Modified values of the downloaded file in S3, for the
+        incremental and the conditional download of the next run. They are stored only once all the new files are sent for
+        processing, otherwise the next run would skip the files held back by the threshold.
+        """
+        if not self._all_new_files_sent_for_processing:
+            logger.info("Download state is not stored, as some of the new files are still pending for processing")
+            return
+        self._download_state["last_successful_download_time"] = datetime.now(timezone.utc).isoformat()
+        if self._download_validators_of_current_run:
+            self._download_state.setdefault("download_validators", {})[self._cricsheet_url] = self._download_validators_of_current_run
+        self._s3_client.put_object(
+            Bucket=self._s3_bucket_name,
+            Key=self._download_state_s3_key,
+            Body=json.dumps(self._download_state),
+        )
+        logger.info(f"Download state {self._download_state} stored in {self._download_state_s3_key}")
+
     def upload_new_json_data_files_for_data_processing(self, downloaded_zip_file_path: str):
 
         try:
+            # Only the central directory of the zip file is read to find the new files, which are then streamed
+            # from the archive to S3 without extracting the whole archive to the disk
             with zipfile.ZipFile(downloaded_zip_file_path, "r") as zip_file_content:
-                zip_file_content.extractall(self._extraction_directory)
-            logger.info(f"Downloaded zip file is extracted successfully to {self._extraction_directory}")
+                new_files, revised_files = self._seggregate_new_and_revised_files_from_downloaded_zip(zip_file_content)
+                # Revised files are sent first, so that a backlog of new files does not hold back the corrections of Cricsheet
+                files_to_process = revised_files + new_files
+                if self._is_bundled_upload_enabled and files_to_process:
+                    maximum_number_of_files_to_send = MATCHES_PER_NEW_MATCH_BUNDLE
+                    self._upload_new_json_files_to_s3_as_bundle(
+                        zip_file_content=zip_file_content, new_files=files_to_process[:maximum_number_of_files_to_send]
+                    )
+                else:
+                    maximum_number_of_files_to_send = self._threshold_for_number_of_files_to_be_sent_for_processing
+                    self._upload_new_json_files_to_s3(zip_file_content=zip_file_content, new_files=files_to_process[:maximum_number_of_files_to_send])
+                self._all_new_files_sent_for_processing = len(files_to_process) <= maximum_number_of_files_to_send
 
         except zipfile.BadZipFile as e:
-            logger.error(f"Failed to extract the downloaded zip file: {e}")
+            logger.error(f"Failed to read the downloaded zip file: {e}")
             raise
 
-        new_files = self._seggregate_new_files_from_downloaded_zip()
-        self._upload_new_json_files_to_s3(new_files=new_files)
-        if new_files:
-            self._trigger_an_sqs_message_whenever_new_file_is_downloaded(new_files=new_files)
+        if files_to_process:
+            self._trigger_an_sqs_message_whenever_new_file_is_downloaded(new_files=new_files, revised_files=revised_files)
             return "Data file has been downloaded and placed successfully for processing"
         logger.info("No new files to process")
         return "No new files to process"
 
-    def _list_all_files_from_dynamo_db(self) -> Set:
-        response = self._dynamo_db_to_store_file_data_extraction_status.scan(ProjectionExpression="file_name")
-        return set(item["file_name"] for item in response["Items"])
-
-    def _seggregate_new_files_from_downloaded_zip(self) -> List:
-        new_files: List = []
-        processed_files = self._list_all_files_from_dynamo_db()
-        logger.info(f"Total available processed files = {len(processed_files)}")
-        for _, _, files in os.walk(self._extraction_directory):
-            for file in files:
-                if file.endswith(".json"):
-                    if file not in processed_files:
-                        new_files.append(file)
-        logger.info(f"Total newly downloaded files: {len(new_files)}")
-        return new_files
-
-    def _trigger_an_sqs_message_whenever_new_file_is_downloaded(self, new_files: List[str]):
-        """
-        This function will trigger an SQS message whenever a new file is downloaded
+    def _get_cricsheet_url_to_download(self) -> str:
+        if not self._is_incremental_download_enabled:
+            return CRICSHEET_DATA_DOWNLOADING_URL
+        last_successful_download_time = self._download_state.get("last_successful_download_time")
+        if last_successful_download_time is None:
+            logger.info("No successful download found from a previous run, falling back to the complete archive")
+            return CRICSHEET_DATA_DOWNLOADING_URL
+        time_since_last_successful_download = datetime.now(timezone.utc) - datetime.fromisoformat(last_successful_download_time)
+        for number_of_days in sorted(CRICSHEET_RECENTLY_ADDED_DATA_WINDOWS_IN_DAYS):
+            # A day is left as margin for the matches added to Cricsheet around the time of the previous run
+            if time_since_last_successful_download < timedelta(days=number_of_days - 1):
+                return CRICSHEET_RECENTLY_ADDED_DATA_DOWNLOADING_URL.format(number_of_days=number_of_days)
+        logger.info(f"Last successful download was {time_since_last_successful_download} ago, falling back to the complete archive")
+        return CRICSHEET_DATA_DOWNLOADING_URL
+
+    def _get_download_state_of_previous_run(self) -> Dict:
+        try:
+            response = self._s3_client.get_object(Bucket=self._s3_bucket_name, Key=self._download_state_s3_key)
+            return json.loads(response["Body"].read())
+        except self._s3_client.exceptions.NoSuchKey:
+            logger.info("No download state found from a previous run")
+            return {}
+
+    def _is_mens_t20i_match(self, zip_file_content: zipfile.ZipFile, member: zipfile.ZipInfo) -> bool:
+        with zip_file_content.open(member) as member_file:
+            match_info = json.load(member_file).get("info", {})
+        return all(match_info.get(field) == value for field, value in MENS_T20I_MATCH_INFO.items())
+
+    def _get_content_crc32s_of_processed_files_from_dynamo_db(self, files: List[str]) -> Dict[str, Optional[int]]:
+        """
+        Looks up the given files in DynamoDB, in batches of the maximum number of keys allowed by BatchGetItem.
+
+        :param files: Names of the files to look up
+        :return: CRC32 of the processed content of the given files which are present in DynamoDB, None for the files
+            processed before it was recorded
+        """
+        content_crc32s_of_processed_files: Dict[str, Optional[int]] = {}
+        table_name = self._dynamo_db_to_store_file_data_extraction_status.name
+        for index in range(0, len(files), 100):
+            request_items = {
+                table_name: {"Keys": [{"file_name": file} for file in files[index:index + 100]], "ProjectionExpression": "file_name, content_crc32"}
+            }
+            while request_items:
+                response = self._dynamodb_client.batch_get_item(RequestItems=request_items)
+                content_crc32s_of_processed_files.update(
+                    (item["file_name"], get_content_crc32_of_dynamodb_item(item)) for item in response["Responses"].get(table_name, [])
+                )
+                request_items = response.get("UnprocessedKeys")
+        return content_crc32s_of_processed_files
+
+    def _get_content_crc32s_of_files_to_look_up(self, zip_file_content: zipfile.ZipFile) -> Dict[str, int]:
+        """
+        Finds the files of the archive which are not in the processed files manifest, along with the files of the manifest whose
+        CRC32 differs. The files of an archive of recently added matches which are not men's T20Is are recorded as rejected, so
+        that they are parsed again only once Cricsheet has revised their content.
+
+        :param zip_file_content: The downloaded zip file
+        :return: CRC32 of the content of every file to look up in DynamoDB
+        """
+        content_crc32s_of_files_to_look_up: Dict[str, int] = {}
+        content_crc32s_of_rejected_files: Dict[str, int] = {}
+        # Archives of recently added matches hold every format, unlike the complete archive of men's T20Is
+        is_recently_added_data = self._cricsheet_url != CRICSHEET_DATA_DOWNLOADING_URL
+        if is_recently_added_data:
+            self._rejected_files_manifest.load()
+        for member in zip_file_content.infolist():
+            file = os.path.basename(member.filename)
+            if member.is_dir() or not file.endswith(".json"):
+                continue
+            if file in self._processed_files_manifest:
+                if self._processed_files_manifest.get_content_crc32(file) != member.CRC:
+                    content_crc32s_of_files_to_look_up[file] = member.CRC
+            elif is_recently_added_data and self._rejected_files_manifest.get_content_crc32(file) == member.CRC:
+                continue
+            elif not is_recently_added_data or self._is_mens_t20i_match(zip_file_content, member):
+                content_crc32s_of_files_to_look_up[file] = member.CRC
+            else:
+                content_crc32s_of_rejected_files[file] = member.CRC
+        if content_crc32s_of_rejected_files:
+            logger.info(f"Recording {len(content_crc32s_of_rejected_files)} files which are not men's T20Is as rejected")
+            self._rejected_files_manifest.add(content_crc32s_of_rejected_files)
+            self._rejected_files_manifest.save()
+        return content_crc32s_of_files_to_look_up
+
+    def _seggregate_new_and_revised_files_from_downloaded_zip(self, zip_file_content: zipfile.ZipFile) -> Tuple[List[str], List[str]]:
+        """
+        Finds the files of the archive which are not processed yet, along with the processed files whose content Cricsheet
+        has revised since. The CRC32 of every file is read from the central directory of the archive and compared against the
+        CRC32 of its processed content in the manifest, so only the files which differ are looked up in DynamoDB, which has
+        the CRC32 of the files processed since the manifest was saved.
+
+        :param zip_file_content: The downloaded zip file
+        :return: Names of the new files and of the revised files
+        """
+        self._processed_files_manifest.load()
+        logger.info(f"Total available processed files = {len(self._processed_files_manifest)}")
+        content_crc32s_of_files_to_look_up = self._get_content_crc32s_of_files_to_look_up(zip_file_content)
+
+        content_crc32s_of_processed_files = self._get_content_crc32s_of_processed_files_from_dynamo_db(list(content_crc32s_of_files_to_look_up))
+        new_files: List[str] = []
+        revised_files: List[str] = []
+        content_crc32s_of_unchanged_files: Dict[str, int] = {}
+        for file, content_crc32 in content_crc32s_of_files_to_look_up.items():
+            if file not in content_crc32s_of_processed_files and file not in self._processed_files_manifest:
+                new_files.append(file)
+                continue
+            processed_content_crc32 = content_crc32s_of_processed_files.get(file)
+            if processed_content_crc32 is None:
+                processed_content_crc32 = self._processed_files_manifest.get_content_crc32(file)
+            # The files processed before the content CRC32 was recorded take the CRC32 of the current archive as their baseline
+            if processed_content_crc32 is None or processed_content_crc32 == content_crc32:
+                content_crc32s_of_unchanged_files[file] = content_crc32
+            else:
+                revised_files.append(file)
+
+        # Files sent for processing in the previous runs are added to the manifest once DynamoDB has their status
+        if content_crc32s_of_unchanged_files:
+            self._processed_files_manifest.add(content_crc32s_of_unchanged_files)
+            self._processed_files_manifest.save()
+        logger.info(f"Total newly downloaded files: {len(new_files)}, revised files: {len(revised_files)}")
+        return new_files, revised_files
+
+    def _trigger_an_sqs_message_whenever_new_file_is_downloaded(self, new_files: List[str], revised_files: List[str]):
+        """
+        This function will trigger an SQS message whenever a new file is downloaded or a processed file is revised
         :param new_files: List of new files downloaded
+        :param revised_files: List of processed files whose content has been revised by Cricsheet
         :return: None
         """
-        sqs_client = boto3.client("sqs")
+        sqs_client = get_boto3_client("sqs")
         queue_url = get_environmental_variable_value("DELAYED_SQS_QUEUE_URL")
         message_body = {
             "message": "New files downloaded from Cricsheet",
             "new_files": new_files,
+            "revised_files": revised_files,
         }
         response = sqs_client.send_message(
             QueueUrl=queue_url,
-            MessageBody=str(message_body)
+            MessageBody=json.dumps(message_body)
         )
         logger.info(f"Message sent to SQS: {response['MessageId']}")
 
-    def _upload_new_json_files_to_s3(self, new_files: List):
-        for file in new_files[:self._threshold_for_number_of_files_to_be_sent_for_processing]:
-            file_path = f"{self._extraction_directory}/{file}"
-            key = f"{self._s3_folder_to_store_cricsheet_data}/{self._s3_folder_to_store_processed_json_files_zip}/{file}"
-            self._s3_client.upload_file(Bucket=self._s3_bucket_name, Key=key, Filename=file_path)
-            logger.info(f"File {file} uploaded to {key}")
+    def _upload_json_file_to_s3(self, zip_file_content: zipfile.ZipFile, member_name: str, zip_file_lock: threading.Lock) -> int:
+        """
+        Uploads a single JSON file of the downloaded zip file to S3.
+
+        :param zip_file_content: The downloaded zip file
+        :param member_name: Name of the JSON file in the zip file
+        :param zip_file_lock: Lock guarding the reads of the zip file across the upload threads
+        :return: Size of the uploaded file in bytes
+        """
+        file = os.path.basename(member_name)
+        key = f"{self._s3_folder_to_store_cricsheet_data}/{self._s3_folder_to_store_processed_json_files_zip}/{file}"
+        with zip_file_lock:
+            file_content = zip_file_content.read(member_name)
+        upload_start_time = time.perf_counter()
+        with timed_span("S3Put"):
+            self._s3_client.put_object(Body=file_content, Bucket=self._s3_bucket_name, Key=key)
+        upload_time = time.perf_counter() - upload_start_time
+        record_metric("BytesWritten", len(file_content), "Bytes")
+        logger.info(f"File {file} uploaded to {key} ({len(file_content)} bytes in {upload_time:.3f}s)")
+        return len(file_content)
+
+    def _upload_new_json_files_to_s3(self, zip_file_content: zipfile.ZipFile, new_files: List):
+        member_names = {os.path.basename(name): name for name in zip_file_content.namelist()}
+        zip_file_lock = threading.Lock()
+        upload_start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self._s3_upload_concurrency) as executor:
+            uploaded_bytes = sum(executor.map(
+                lambda file: self._upload_json_file_to_s3(zip_file_content, member_names[file], zip_file_lock), new_files
+            ))
+        upload_time = max(time.perf_counter() - upload_start_time, 1e-9)
+        logger.info(
+            f"Uploaded {len(new_files)} files ({uploaded_bytes} bytes) in {upload_time:.2f}s with {self._s3_upload_concurrency} threads - "
+            f"{len(new_files) / upload_time:.1f} files/s, {uploaded_bytes / upload_time / 1024:.1f} KiB/s"
+        )
+
+    def _upload_new_json_files_to_s3_as_bundle(self, zip_file_content: zipfile.ZipFile, new_files: List):
+        """
+        Uploads the new JSON files to S3 as a single gzip compressed bundle with one match per line, followed by a small index
+        listing the files of the bundle in the same order, along with the CRC32 of their content in the archive. The index is
+        uploaded last, as its creation triggers the extraction.
+
+        :param zip_file_content: The downloaded zip file
+        :param new_files: Names of the new and the revised JSON files
+        """
+        member_names = {os.path.basename(name): name for name in zip_file_content.namelist()}
+        bundle_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        bundle_key = f"{self._s3_folder_to_store_cricsheet_data}/{CRICSHEET_DATA_S3_FOLDER_TO_STORE_NEW_MATCH_BUNDLES}/{bundle_id}.ndjson.gz"
+        bundle_index_key = f"{self._s3_folder_to_store_cricsheet_data}/{CRICSHEET_DATA_S3_FOLDER_TO_STORE_NEW_MATCH_BUNDLE_INDEXES}/{bundle_id}.json"
+        bundle_file_path = f"{self._temp_folder}/{bundle_id}.ndjson.gz"
+
+        with gzip.open(bundle_file_path, "wt", encoding="utf-8") as bundle_file:
+            for file in new_files:
+                with zip_file_content.open(member_names[file]) as member_file:
+                    # Cricsheet files are indented, so they are re-serialised to fit in a single line
+                    bundle_file.write(json.dumps(json.load(member_file), separators=(",", ":")) + "\n")
+        with timed_span("S3Put"):
+            self._s3_client.upload_file(Filename=bundle_file_path, Bucket=self._s3_bucket_name, Key=bundle_key)
+        record_metric("BytesWritten", os.path.getsize(bundle_file_path), "Bytes")
+        logger.info(f"Bundle of {len(new_files)} files ({os.path.getsize(bundle_file_path)} bytes) uploaded to {bundle_key}")
+        os.remove(bundle_file_path)
+
+        self._s3_client.put_object(
+            Bucket=self._s3_bucket_name,
+            Key=bundle_index_key,
+            Body=json.dumps({
+                "bundle_key": bundle_key,
+                "files": new_files,
+                "content_crc32s": [zip_file_content.getinfo(member_names[file]).CRC for file in new_files],
+            }),
+        )
+        logger.info(f"Bundle index uploaded to {bundle_index_key}")
 
 
 @exception_handler      # noqa: Vulture
 def handler(_, __):
     downloader = DownloadDataFromCricsheetHandler()
     zip_file_path = downloader.download_data_from_cricsheet()
+    if zip_file_path is None:
+        downloader.store_download_state()
+        logging.shutdown()
+        return "No changes in Cricsheet data since the previous download"
     output = downloader.upload_new_json_data_files_for_data_processing(zip_file_path)
+    downloader.store_download_state()
     logging.shutdown()
     return output
@@ -0,0 +1,93 @@
+import contextlib
+import json
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterator, List, Optional
+from mens_t20i_data_collector._lambdas.constants import (
+    EMBEDDED_METRICS_MAXIMUM_VALUES_PER_METRIC,
+    EMBEDDED_METRICS_NAMESPACE
+)
+
+# A module is imported once per lambda execution environment, so only its first invocation is a cold start
+_is_cold_start = True  # pylint: disable=invalid-name
+_metrics_lock = threading.Lock()
+_metric_values: Dict[str, List[float]] = defaultdict(list)
+_metric_units: Dict[str, str] = {}
+
+
+def record_metric(name: str, value: float, unit: str = "Count") -> None:
+    """
+    Records a value of a metric of the current invocation. Every value of a metric is kept, so that CloudWatch aggregates them
+    into the statistics of the metric. The values can be recorded from the threads of the invocation as well.
+
+    :param name: Name of the metric
+    :param value: Value of the metric
+    :param unit: CloudWatch unit of the metric
+    """
+    with _metrics_lock:
+        _metric_values[name].append(value)
+        _metric_units[name] = unit
+
+
+@contextlib.contextmanager
+def timed_span(name: str) -> Iterator[None]:
+    """
+    Records the duration of the wrapped block as the `<name>Duration` metric of the current invocation, even when it fails.
+
+    :param name: Name of the span, like S3Get or MongoWrite
+    """
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_metric(f"{name}Duration", (time.perf_counter() - start_time) * 1000, "Milliseconds")
+
+
+def reset_invocation_metrics() -> None:
+    """
+    Discards the metrics recorded so far, which belong to an earlier invocation of the execution environment.
+    """
+    with _metrics_lock:
+        _metric_values.clear()
+        _metric_units.clear()
+
+
+def emit_invocation_metrics(function_name: str, duration_in_milliseconds: float, batch_item_failures: Optional[int] = None) -> None:
+    """
+    Prints the metrics of the current invocation as CloudWatch embedded metric format log lines, from which CloudWatch creates
+    the metrics without any call to its API. The lines are printed rather than logged, since the prefix of the lambda log
+    format would keep CloudWatch from parsing them.
+
+    :param function_name: Name of the lambda function, which is the dimension of the metrics
+    :param duration_in_milliseconds: Duration of the invocation
+    :param batch_item_failures: Number of SQS messages of the invocation which failed, if the invocation handled an SQS batch
+    """
+    global _is_cold_start  # pylint: disable=global-statement
+    record_metric("ColdStart", int(_is_cold_start))
+    record_metric("InvocationDuration", duration_in_milliseconds, "Milliseconds")
+    if batch_item_failures is not None:
+        record_metric("BatchItemFailures", batch_item_failures)
+    _is_cold_start = False
+    with _metrics_lock:
+        metric_values = dict(_metric_values)
+        metric_units = dict(_metric_units)
+    # CloudWatch accepts a limited number of values per metric in a log line, so the values of a busy invocation are split across lines
+    number_of_log_lines = -(-max(len(values) for values in metric_values.values()) // EMBEDDED_METRICS_MAXIMUM_VALUES_PER_METRIC)
+    for log_line_number in range(number_of_log_lines):
+        offset = log_line_number * EMBEDDED_METRICS_MAXIMUM_VALUES_PER_METRIC
+        values_of_log_line = {
+            name: values[offset:offset + EMBEDDED_METRICS_MAXIMUM_VALUES_PER_METRIC] for name, values in metric_values.items() if len(values) > offset
+        }
+        print(json.dumps({
+            "_aws": {
+                "Timestamp": int(time.time() * 1000),
+                "CloudWatchMetrics": [{
+                    "Namespace": EMBEDDED_METRICS_NAMESPACE,
+                    "Dimensions": [["FunctionName"]],
+                    "Metrics": [{"Name": name, "Unit": metric_units[name]} for name in values_of_log_line],
+                }],
+            },
+            "FunctionName": function_name,
+            **{name: values[0] if len(values) == 1 else values for name, values in values_of_log_line.items()},
+        }), flush=True)
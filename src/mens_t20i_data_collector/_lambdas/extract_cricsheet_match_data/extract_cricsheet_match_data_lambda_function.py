@@ -0,0 +1,265 @@
+import gzip
+import itertools
+import json
+import logging
+import os
+import zlib
+from typing import IO, Dict, Iterator, List, Optional, Tuple
+from mens_t20i_data_collector._lambdas.client_registry import (
+    get_boto3_client,
+    get_boto3_resource,
+    get_mongo_db_client
+)
+from mens_t20i_data_collector._lambdas.constants import (
+    MATCHES_PER_BULK_WRITE_OF_NEW_MATCH_BUNDLE
+)
+from mens_t20i_data_collector._lambdas.cricsheet_json_decoder import (
+    get_cricsheet_json_decoder
+)
+from mens_t20i_data_collector._lambdas.cricsheet_match_data_parser import (
+    CricsheetMatchDataParser
+)
+from mens_t20i_data_collector._lambdas.execution_metrics import (
+    record_metric,
+    timed_span
+)
+from mens_t20i_data_collector._lambdas.utils import (
+    exception_handler,
+    get_environmental_variable_value,
+    make_dynamodb_entries_for_file_data_extraction_status_of_multiple_matches,
+    parse_eventbridge_event_message,
+    parse_sqs_batched_eventbridge_event_messages,
+    read_s3_object,
+    upsert_documents_of_multiple_matches_in_mongodb
+)
+
+# Set up logging
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+class CricsheetMatchDataExtractionHandler:
+
+    """Handler to extract both the matchwise and the deliverywise data from a single read and parse of a cricsheet JSON file."""
+
+    def __init__(self):
+        """
+        Initializes the handler and sets up required resources like S3, MongoDB and DynamoDB.
+        """
+        self._s3_bucket_name = get_environmental_variable_value("DOWNLOAD_BUCKET_NAME")
+        self._mongo_db_url = get_environmental_variable_value("MONGO_DB_URL")
+        self._mongo_db_name = get_environmental_variable_value("MONGO_DB_NAME")
+        self._mongo_db_bulk_write_chunk_size = int(get_environmental_variable_value("MONGO_DB_BULK_WRITE_CHUNK_SIZE"))
+        self._mongo_db_client = get_mongo_db_client(self._mongo_db_url)
+        self._matchwise_data_mongo_collection = self._mongo_db_client[self._mongo_db_name][
+            get_environmental_variable_value("MATCHWISE_DATA_COLLECTION_NAME")
+        ]
+        self._deliverywise_data_mongo_collection = self._mongo_db_client[self._mongo_db_name][
+            get_environmental_variable_value("DELIVERYWISE_DATA_COLLECTION_NAME")
+        ]
+        self._s3_client = get_boto3_client("s3")
+        self._decode_cricsheet_json = get_cricsheet_json_decoder(get_environmental_variable_value("CRICSHEET_JSON_DECODER"))
+        self._source_etags_by_match_id: Dict[int, str] = {}
+        self._content_crc32s_by_match_id: Dict[int, int] = {}
+        dynamodb_client = get_boto3_resource("dynamodb")
+        self._dynamo_db_to_store_file_data_extraction_status = dynamodb_client.Table(   # type: ignore
+            get_environmental_variable_value("DYNAMODB_TABLE_NAME")
+        )
+
+    def extract_cricsheet_match_data(self, json_s3_file_key: str, match_id: int) -> None:
+        """
+        Extracts the matchwise and deliverywise data from the S3 JSON file and stores them in MongoDB.
+
+        :param json_s3_file_key: The S3 file key for the cricsheet JSON file
+        :param match_id: Match ID for which the data needs to be extracted
+        """
+        logger.info(f"Extracting cricsheet match data from {json_s3_file_key}")
+        try:
+            match_data, delivery_records = self._get_match_data_and_delivery_records_of_given_match(json_s3_file_key, match_id)
+            logger.info(f"Storing {len(delivery_records)} delivery records of match {match_id} in MongoDB...")
+            if upsert_documents_of_multiple_matches_in_mongodb(
+                self._deliverywise_data_mongo_collection,
+                {str(match_id): delivery_records},
+                self._mongo_db_bulk_write_chunk_size,
+                remove_stale_documents=True
+            ):
+                raise RuntimeError(f"Failed to store the delivery records of match {match_id} in MongoDB")
+            with timed_span("MongoWrite"):
+                self._matchwise_data_mongo_collection.replace_one({"_id": match_data["_id"]}, match_data, upsert=True)
+            logger.info("Data stored in MongoDB successfully")
+            if make_dynamodb_entries_for_file_data_extraction_status_of_multiple_matches(
+                table=self._dynamo_db_to_store_file_data_extraction_status,
+                match_ids_by_message_id={str(match_id): match_id},
+                fields=["deliverywise_data_extraction_status", "matchwise_data_extraction_status"],
+                source_etags_by_match_id=self._source_etags_by_match_id,
+                content_crc32s_by_match_id=self._content_crc32s_by_match_id
+            ):
+                raise RuntimeError(f"Failed to update the DynamoDB entry of match {match_id}")
+        except Exception as e:
+            logger.error(f"Failed to extract cricsheet match data of match {match_id}: {e}", exc_info=True)
+            raise
+
+    def extract_cricsheet_match_data_of_multiple_matches(self, s3_objects: Dict[str, Tuple[str, int]]) -> List[str]:
+        """
+        Extracts the matchwise and deliverywise data of a batch of S3 JSON files, with one bulk write per MongoDB collection
+        for the whole batch. Files which fail are reported back without affecting the rest of the batch.
+
+        :param s3_objects: Mapping of SQS message ID to the S3 file key and match ID of the cricsheet JSON file
+        :return: SQS message IDs of the failed files
+        """
+        delivery_records_by_message_id: Dict[str, List[Dict]] = {}
+        match_data_by_message_id: Dict[str, List[Dict]] = {}
+        failed_message_ids: List[str] = []
+        for message_id, (json_s3_file_key, match_id) in s3_objects.items():
+            logger.info(f"Extracting cricsheet match data from {json_s3_file_key}")
+            try:
+                match_data, delivery_records = self._get_match_data_and_delivery_records_of_given_match(json_s3_file_key, match_id)
+                match_data_by_message_id[message_id] = [match_data]
+                delivery_records_by_message_id[message_id] = delivery_records
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                logger.error(f"Failed to extract cricsheet match data from {json_s3_file_key}: {e}", exc_info=True)
+                failed_message_ids.append(message_id)
+        failed_message_ids.extend(self._store_data_of_multiple_matches(match_data_by_message_id, delivery_records_by_message_id))
+        return failed_message_ids
+
+    def extract_cricsheet_match_data_of_bundle(self, bundle_index_s3_file_key: str) -> List[str]:
+        """
+        Extracts the matchwise and deliverywise data of every match in a bundle of new cricsheet files. The bundle is streamed
+        from S3 and its matches are stored in MongoDB with one bulk write per collection for every few matches.
+
+        :param bundle_index_s3_file_key: The S3 file key for the index of the bundle
+        :return: Names of the files of the bundle which failed, including the ones missing from a truncated bundle
+        """
+        bundle_index = json.loads(self._s3_client.get_object(Bucket=self._s3_bucket_name, Key=bundle_index_s3_file_key)["Body"].read())
+        files: List[str] = bundle_index["files"]
+        logger.info(f"Extracting cricsheet match data of {len(files)} files from the bundle {bundle_index['bundle_key']}")
+        bundle_response = self._s3_client.get_object(Bucket=self._s3_bucket_name, Key=bundle_index["bundle_key"])
+        # The files of a bundle are not stored in S3 on their own, so their source is the bundle they were extracted from
+        self._source_etags_by_match_id.update({int(os.path.splitext(file)[0]): bundle_response["ETag"] for file in files})
+        # The lines of a bundle are re-serialised, so the CRC32 of every file is taken from the archive by the download lambda
+        self._content_crc32s_by_match_id.update(zip((int(os.path.splitext(file)[0]) for file in files), bundle_index.get("content_crc32s", [])))
+        delivery_records_by_file: Dict[str, List[Dict]] = {}
+        match_data_by_file: Dict[str, List[Dict]] = {}
+        failed_files: List[str] = []
+        with gzip.GzipFile(fileobj=bundle_response["Body"]) as bundle_file:
+            for file, line in self._get_lines_of_files_of_bundle(bundle_file, files):
+                if line is None:
+                    logger.error(f"{file} is missing from the bundle {bundle_index['bundle_key']}")
+                    failed_files.append(file)
+                    continue
+                record_metric("BytesRead", len(line), "Bytes")
+                try:
+                    with timed_span("JsonParse"):
+                        json_data = self._decode_cricsheet_json(line)
+                    match_data, delivery_records = self._get_match_data_and_delivery_records_of_json_data(json_data, int(os.path.splitext(file)[0]))
+                    match_data_by_file[file] = [match_data]
+                    delivery_records_by_file[file] = delivery_records
+                except Exception as e:  # pylint: disable=broad-exception-caught
+                    logger.error(f"Failed to extract cricsheet match data of {file} from the bundle: {e}", exc_info=True)
+                    failed_files.append(file)
+                if len(match_data_by_file) == MATCHES_PER_BULK_WRITE_OF_NEW_MATCH_BUNDLE:
+                    failed_files.extend(self._store_data_of_multiple_matches(match_data_by_file, delivery_records_by_file))
+                    delivery_records_by_file, match_data_by_file = {}, {}
+        failed_files.extend(self._store_data_of_multiple_matches(match_data_by_file, delivery_records_by_file))
+        return failed_files
+
+    @staticmethod
+    def _get_lines_of_files_of_bundle(bundle_file: IO[bytes], files: List[str]) -> Iterator[Tuple[str, Optional[bytes]]]:
+        """
+        Pairs every file of the index of a bundle with its line in the bundle, which should have exactly one line per file.
+
+        :param bundle_file: The decompressed bundle
+        :param files: Names of the files of the bundle, in the order of their lines
+        :return: Iterator of the name and the line of every file, the line is None for the files missing from the bundle
+        """
+        for file, line in itertools.zip_longest(files, bundle_file):
+            if file is None:
+                raise ValueError(f"Bundle has more lines than the {len(files)} files of its index")
+            yield file, line
+
+    def _get_match_data_and_delivery_records_of_given_match(self, json_s3_file_key: str, match_id: int) -> Tuple[Dict, List[Dict]]:
+        """
+        Reads and parses the S3 JSON file of the given match once, and prepares its match data and delivery records for MongoDB.
+
+        :param json_s3_file_key: The S3 file key for the cricsheet JSON file
+        :param match_id: Match ID of the cricsheet JSON file
+        :return: The match data and the delivery records of the match
+        """
+        bytes_buffer, self._source_etags_by_match_id[match_id] = read_s3_object(self._s3_client, self._s3_bucket_name, json_s3_file_key)
+        self._content_crc32s_by_match_id[match_id] = zlib.crc32(bytes_buffer)
+        with timed_span("JsonParse"):
+            json_data = self._decode_cricsheet_json(bytes_buffer)
+        return self._get_match_data_and_delivery_records_of_json_data(json_data, match_id)
+
+    @staticmethod
+    def _get_match_data_and_delivery_records_of_json_data(json_data: Dict, match_id: int) -> Tuple[Dict, List[Dict]]:
+        with timed_span("Extraction"):
+            cricsheet_match_data_parser = CricsheetMatchDataParser(json_data, match_id)
+            cricsheet_match_data_parser.parse_innings()
+            match_data = cricsheet_match_data_parser.get_match_data()
+            match_data["_id"] = match_data["match_id"]
+            delivery_records = cricsheet_match_data_parser.delivery_data_accumulator.to_mongo_documents()
+        record_metric("RecordsProduced", 1 + len(delivery_records))
+        return match_data, delivery_records
+
+    def _store_data_of_multiple_matches(
+        self, match_data_by_message_id: Dict[str, List[Dict]], delivery_records_by_message_id: Dict[str, List[Dict]]
+    ) -> List[str]:
+        """
+        Stores the match data and the delivery records of several matches in MongoDB and creates their DynamoDB entries.
+
+        :param match_data_by_message_id: Match data of every match, keyed by an identifier of the match like its SQS message ID
+        :param delivery_records_by_message_id: Delivery records of every match, keyed by the same identifier
+        :return: Identifiers of the matches which failed
+        """
+        failed_message_ids: List[str] = []
+        failed_message_ids_of_bulk_writes = set(upsert_documents_of_multiple_matches_in_mongodb(
+            self._deliverywise_data_mongo_collection, delivery_records_by_message_id, self._mongo_db_bulk_write_chunk_size, remove_stale_documents=True
+        ))
+        failed_message_ids_of_bulk_writes.update(upsert_documents_of_multiple_matches_in_mongodb(
+            self._matchwise_data_mongo_collection, match_data_by_message_id, self._mongo_db_bulk_write_chunk_size
+        ))
+        failed_message_ids.extend(failed_message_ids_of_bulk_writes)
+        match_ids_by_message_id = {
+            message_id: match_data[0]["match_id"] for message_id, match_data in match_data_by_message_id.items()
+            if message_id not in failed_message_ids_of_bulk_writes
+        }
+        failed_message_ids.extend(make_dynamodb_entries_for_file_data_extraction_status_of_multiple_matches(
+            table=self._dynamo_db_to_store_file_data_extraction_status,
+            match_ids_by_message_id=match_ids_by_message_id,
+            fields=["deliverywise_data_extraction_status", "matchwise_data_extraction_status"],
+            source_etags_by_match_id=self._source_etags_by_match_id,
+            content_crc32s_by_match_id=self._content_crc32s_by_match_id
+        ))
+        return failed_message_ids
+
+
+@exception_handler      # noqa: Vulture
+@parse_eventbridge_event_message
+def handler(json_file_key, match_id):
+    extractor = CricsheetMatchDataExtractionHandler()
+    extractor.extract_cricsheet_match_data(json_file_key, match_id)
+    return f"Matchwise and deliverywise data have been successfully extracted for match_id - {match_id}."
+
+
+@exception_handler      # noqa: Vulture
+@parse_sqs_batched_eventbridge_event_messages
+def batch_handler(s3_objects):
+    extractor = CricsheetMatchDataExtractionHandler()
+    failed_message_ids = extractor.extract_cricsheet_match_data_of_multiple_matches(s3_objects)
+    return (
+        f"Matchwise and deliverywise data have been successfully extracted for {len(s3_objects) - len(failed_message_ids)} of {len(s3_objects)} matches.",
+        failed_message_ids
+    )
+
+
+@exception_handler      # noqa: Vulture
+def bundle_handler(event, _):
+    bundle_index_s3_file_key = event["detail"]["object"]["key"]
+    logger.info(f"Bundle index file key: {bundle_index_s3_file_key}")
+    extractor = CricsheetMatchDataExtractionHandler()
+    failed_files = extractor.extract_cricsheet_match_data_of_bundle(bundle_index_s3_file_key)
+    if failed_files:
+        # The matches of a bundle are upserted, so the whole bundle can be extracted again once the failure is looked into
+        raise RuntimeError(f"Failed to extract cricsheet match data of {len(failed_files)} files from the bundle {bundle_index_s3_file_key}: {failed_files}")
+    return f"Matchwise and deliverywise data have been successfully extracted for every file of the bundle {bundle_index_s3_file_key}."
@@ -1,17 +1,34 @@
 import json
 import logging
-from typing import Dict
-import boto3
-import pandas as pd
-from pymongo import MongoClient
-from mens_t20i_data_collector._lambdas.constants import (
-    DELIVERYWISE_DATAFRAME_COLUMNS
+import zlib
+from typing import Dict, List, Optional, Tuple
+from mens_t20i_data_collector._lambdas.client_registry import (
+    get_boto3_client,
+    get_boto3_resource,
+    get_mongo_db_client
+)
+from mens_t20i_data_collector._lambdas.cricsheet_json_decoder import (
+    get_cricsheet_json_decoder
+)
+from mens_t20i_data_collector._lambdas.cricsheet_match_data_parser import (
+    CricsheetMatchDataParser
+)
+from mens_t20i_data_collector._lambdas.delivery_data_accumulator import (
+    DeliveryDataAccumulator
+)
+from mens_t20i_data_collector._lambdas.execution_metrics import (
+    record_metric,
+    timed_span
 )
 from mens_t20i_data_collector._lambdas.utils import (
     exception_handler,
     get_environmental_variable_value,
+    make_dynamodb_entries_for_file_data_extraction_status_of_multiple_matches,
     make_dynamodb_entry_for_file_data_extraction_status,
-    parse_eventbridge_event_message
+    parse_eventbridge_event_message,
+    parse_sqs_batched_eventbridge_event_messages,
+    read_s3_object,
+    upsert_documents_of_multiple_matches_in_mongodb
 )
 
 # Set up logging
@@ -21,44 +38,47 @@ logger.setLevel(logging.INFO)
 
 class DeliverywiseCricsheetDataExtractionHandler:
 
-    def __init__(self, match_id: int):
+    def __init__(self):
         """
-        Initializes the handler with the match ID and sets up required resources like S3 and DynamoDB.
-
-        :param match_id: Match ID for which delivery data needs to be extracted
+        Initializes the handler and sets up required resources like S3 and DynamoDB.
         """
-        self._match_id = match_id
+        self._match_id: Optional[int] = None
         self._s3_bucket_name = get_environmental_variable_value("DOWNLOAD_BUCKET_NAME")
         self._mongo_db_url = get_environmental_variable_value("MONGO_DB_URL")
         self._mongo_db_name = get_environmental_variable_value("MONGO_DB_NAME")
         self.collection_name = get_environmental_variable_value("DELIVERYWISE_DATA_COLLECTION_NAME")
-        self._mongo_db_client = MongoClient(self._mongo_db_url)
+        self._mongo_db_client = get_mongo_db_client(self._mongo_db_url)
         self._deliverywise_data_mongo_collection = self._mongo_db_client[self._mongo_db_name][self.collection_name]
-        self._s3_client = boto3.client("s3")
-        self._deliveries_dataframe: pd.DataFrame = pd.DataFrame(columns=DELIVERYWISE_DATAFRAME_COLUMNS) # type: ignore
-        dynamodb_client = boto3.resource("dynamodb")
+        self._mongo_db_bulk_write_chunk_size = int(get_environmental_variable_value("MONGO_DB_BULK_WRITE_CHUNK_SIZE"))
+        self._s3_client = get_boto3_client("s3")
+        self._decode_cricsheet_json = get_cricsheet_json_decoder(get_environmental_variable_value("CRICSHEET_JSON_DECODER"))
+        self._delivery_data_accumulator = DeliveryDataAccumulator()
+        self._delivery_records: Optional[List[Dict]] = None
+        self._content_crc32s_by_match_id: Dict[int, int] = {}
+        dynamodb_client = get_boto3_resource("dynamodb")
         self._dynamo_db_to_store_file_data_extraction_status = dynamodb_client.Table(   # type: ignore
             get_environmental_variable_value("DYNAMODB_TABLE_NAME")
         )
+        self._source_etags_by_match_id: Dict[int, str] = {}
 
-    def extract_deliverywise_cricsheet_data(self, json_s3_file_key: str) -> None:
+    def extract_deliverywise_cricsheet_data(self, json_s3_file_key: str, match_id: int) -> None:
         """
         Extracts delivery data from the S3 JSON file, processes it, and stores the data in DynamoDB.
 
         :param json_s3_file_key: The S3 file key for the cricsheet JSON file
+        :param match_id: Match ID for which delivery data needs to be extracted
         """
         logger.info(f"Extracting deliverywise cricsheet data from {json_s3_file_key}")
         try:
-            bytes_buffer = self._s3_client.get_object(Bucket=self._s3_bucket_name, Key=json_s3_file_key)["Body"].read()
-            json_data = json.loads(bytes_buffer)
-            self._get_delivery_data_of_given_match_id(json_data)
-            self._correct_datatypes_and_create_composite_delivery_key_to_store_dataframe_in_dynamo_db()
-            self._store_dataframe_in_mongodb()
+            self._prepare_deliverywise_data_of_given_match(json_s3_file_key, match_id)
+            self._store_documents_in_mongodb()
             make_dynamodb_entry_for_file_data_extraction_status(
                 table=self._dynamo_db_to_store_file_data_extraction_status,
                 file_name=f"{self._match_id}.json",
                 field="deliverywise_data_extraction_status",
-                status=True
+                status=True,
+                source_etag=self._source_etags_by_match_id.get(match_id),
+                content_crc32=self._content_crc32s_by_match_id.get(match_id)
             )
         except json.JSONDecodeError as e:
             logger.error(f"Invalid JSON format in the file: {e}")
@@ -67,28 +87,91 @@ class DeliverywiseCricsheetDataExtractionHandler:
             logger.error(f"Unexpected error occurred: {e}", exc_info=True)
             raise
 
-    def _correct_datatypes_and_create_composite_delivery_key_to_store_dataframe_in_dynamo_db(self) -> None:
+    def extract_deliverywise_cricsheet_data_of_multiple_matches(self, s3_objects: Dict[str, Tuple[str, int]]) -> List[str]:
+        """
+        Extracts delivery data of several S3 JSON files and stores the data of all of them in MongoDB with a single bulk write.
+        A file which fails does not stop the remaining ones from being processed.
+
+        :param s3_objects: The S3 file key and match ID of every cricsheet JSON file, keyed by its SQS message ID
+        :return: SQS message IDs of the files which could not be processed
+        """
+        failed_message_ids: List[str] = []
+        records_by_message_id: Dict[str, List[Dict]] = {}
+        match_ids_by_message_id: Dict[str, int] = {}
+        for message_id, (json_s3_file_key, match_id) in s3_objects.items():
+            logger.info(f"Extracting deliverywise cricsheet data from {json_s3_file_key}")
+            try:
+                self._prepare_deliverywise_data_of_given_match(json_s3_file_key, match_id)
+                records_by_message_id[message_id] = self._get_delivery_records()
+                match_ids_by_message_id[message_id] = match_id
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                logger.error(f"Failed to extract deliverywise data from {json_s3_file_key}: {e}", exc_info=True)
+                failed_message_ids.append(message_id)
+
+        failed_message_ids_of_bulk_write = upsert_documents_of_multiple_matches_in_mongodb(
+            self._deliverywise_data_mongo_collection, records_by_message_id, self._mongo_db_bulk_write_chunk_size, remove_stale_documents=True
+        )
+        failed_message_ids.extend(failed_message_ids_of_bulk_write)
+        failed_message_ids.extend(make_dynamodb_entries_for_file_data_extraction_status_of_multiple_matches(
+            table=self._dynamo_db_to_store_file_data_extraction_status,
+            match_ids_by_message_id={
+                message_id: match_id for message_id, match_id in match_ids_by_message_id.items() if message_id not in failed_message_ids_of_bulk_write
+            },
+            fields=["deliverywise_data_extraction_status"],
+            source_etags_by_match_id=self._source_etags_by_match_id,
+            content_crc32s_by_match_id=self._content_crc32s_by_match_id
+        ))
+        return failed_message_ids
+
+    def _build_delivery_documents(self) -> None:
         """
-        Corrects the datatypes in the dataframe and creates a composite key for storing in DynamoDB.
+        Builds the delivery records of the match along with their composite key, without going through a dataframe.
         """
 
-        logger.info("Correcting datatypes and creating composite delivery key...")
-        primary_key_columns = ["match_id", "innings_number", "over_number", "ball_number"]
-        self._deliveries_dataframe["composite_delivery_key"] = self._deliveries_dataframe[primary_key_columns].apply(tuple, axis=1)
-        self._deliveries_dataframe["composite_delivery_key"] = self._deliveries_dataframe["composite_delivery_key"].astype(str)
-        logger.info("Composite delivery key created successfully")
+        logger.info("Building delivery documents with their composite delivery key...")
+        self._delivery_records = self._delivery_data_accumulator.to_mongo_documents()
+        logger.info("Delivery documents built successfully")
+
+    def _get_delivery_records(self) -> List[Dict]:
+        """
+        Returns the delivery records of the match as MongoDB documents identified by the composite delivery key.
+        """
+        if self._delivery_records is None:
+            raise ValueError("Delivery records are not prepared yet")
+        return self._delivery_records
 
-    def _store_dataframe_in_mongodb(self) -> None:
+    def _prepare_deliverywise_data_of_given_match(self, json_s3_file_key: str, match_id: int) -> None:
         """
-        Stores the deliveries dataframe in MongoDB.
+        Reads the S3 JSON file of the given match and prepares its delivery records.
+
+        :param json_s3_file_key: The S3 file key for the cricsheet JSON file
+        :param match_id: Match ID for which delivery data needs to be extracted
         """
-        logger.info(f"Storing {len(self._deliveries_dataframe)} records in MongoDB...")
+        self._match_id = match_id
+        self._delivery_records = None
+        bytes_buffer, self._source_etags_by_match_id[match_id] = read_s3_object(self._s3_client, self._s3_bucket_name, json_s3_file_key)
+        self._content_crc32s_by_match_id[match_id] = zlib.crc32(bytes_buffer)
+        with timed_span("JsonParse"):
+            json_data = self._decode_cricsheet_json(bytes_buffer)
+        with timed_span("Extraction"):
+            self._get_delivery_data_of_given_match_id(json_data)
+            self._build_delivery_documents()
+        record_metric("RecordsProduced", len(self._get_delivery_records()))
+
+    def _store_documents_in_mongodb(self) -> None:
+        """
+        Stores the delivery records in MongoDB, replacing the deliveries of the match stored previously.
+        """
+        records = self._get_delivery_records()
+        logger.info(f"Storing {len(records)} records in MongoDB...")
         try:
-            df_with_id = self._deliveries_dataframe.copy()
-            df_with_id['_id'] = df_with_id['composite_delivery_key']
-            records = df_with_id.to_dict("records")
-            self._deliverywise_data_mongo_collection.insert_many(records)
-            logger.info("Data stored in MongoDB successfully")
+            if upsert_documents_of_multiple_matches_in_mongodb(
+                self._deliverywise_data_mongo_collection,
+                {str(self._match_id): records},
+                self._mongo_db_bulk_write_chunk_size,
+                remove_stale_documents=True
+            ):
+                raise RuntimeError(f"Failed to store the delivery records of match {self._match_id} in MongoDB")
         except Exception as e:
             logger.error(f"Failed to store data in MongoDB: {e}")
             raise
@@ -97,114 +180,29 @@ class DeliverywiseCricsheetDataExtractionHandler:
 
         logger.info(f"Extracting delivery data for match ID: {self._match_id}")
         try:
-            teams = json_data["info"]["teams"]
-            innings_data = json_data["innings"]
-            for innings_number, innings in enumerate(innings_data, start=1):
-                batting_team = innings.get('team')
-                bowling_team = [team for team in teams if team != batting_team][0]
-                self._get_delivery_data_of_single_innings(batting_team, bowling_team, innings, innings_number)
+            cricsheet_match_data_parser = CricsheetMatchDataParser(json_data, self._match_id)  # type: ignore
+            cricsheet_match_data_parser.parse_innings()
+            self._delivery_data_accumulator = cricsheet_match_data_parser.delivery_data_accumulator
 
         except KeyError as e:
             logger.error(f"Missing expected key in JSON data: {e}")
             raise
 
-    def _get_delivery_data_of_single_innings(self, batting_team: str, bowling_team: str, innings_data: Dict, innings_number: int) -> None:
-        """
-        Processes delivery data for a single innings and appends it to the dataframe.
-
-        :param batting_team: The batting team for the innings
-        :param bowling_team: The bowling team for the innings
-        :param innings_data: The innings data from the cricsheet JSON
-        :param innings_number: The innings number (1 or 2)
-        """
-        overs_data = innings_data.get('overs', [])
-        for over_data in overs_data:
-            self._get_delivery_data_of_given_over(batting_team, bowling_team, innings_number, over_data)
-
-    def _get_delivery_data_of_given_over(self, batting_team: str, bowling_team: str, innings_number: int, over_data: Dict) -> None:
-        """
-        Processes delivery data for a given over and appends it to the dataframe.
-
-        :param batting_team: The batting team
-        :param bowling_team: The bowling team
-        :param innings_number: The innings number
-        :param over_data: The over data from the cricsheet JSON
-        """
-        over_number = over_data["over"]
-        deliveries_data = over_data.get('deliveries', [])
-
-        for ball_no, ball_data in enumerate(deliveries_data, start=1):
-            delivery_record = self._get_delivery_data_of_single_delivery(ball_data, ball_no, batting_team, bowling_team, innings_number, over_number)
-            self._deliveries_dataframe = pd.concat([self._deliveries_dataframe, pd.DataFrame([delivery_record])], ignore_index=True)
-
-    def _get_delivery_data_of_single_delivery(  # pylint: disable=[too-many-arguments, too-many-locals]
-        self, ball_data: Dict, ball_number: int, batting_team: str, bowling_team: str, innings_number: int, over_number: int
-    ) -> Dict:
-        """
-        Extracts and returns delivery data for a single ball.
-
-        :param ball_data: Ball data from the cricsheet JSON
-        :param ball_number: The ball number in the over
-        :param batting_team: The batting team
-        :param bowling_team: The bowling team
-        :param innings_number: The innings number
-        :param over_number: The over number
-        :return: A dictionary representing a single delivery
-        """
-        batter = ball_data.get("batter")
-        bowler = ball_data.get("bowler")
-        non_striker = ball_data.get("non_striker")
-
-        # Extras
-        extras_data = ball_data.get("extras", {})
-        wide_runs = extras_data.get("wides", 0)
-        leg_bye_runs = extras_data.get("legbyes", 0)
-        bye_runs = extras_data.get("byes", 0)
-        no_ball_runs = extras_data.get("noballs", 0)
-        penalty_runs = extras_data.get("penalty", 0)
-
-        # Runs
-        batsman_runs = ball_data.get("runs", {}).get("batter", 0)
-        extra_runs = ball_data.get("runs", {}).get("extras", 0)
-        total_runs = ball_data.get("runs", {}).get("total", 0)
-
-        # Wickets
-        wickets_data = ball_data.get("wickets", [])
-        player_dismissed = None
-        dismissal_type = None
-        fielder_name = None
-        if wickets_data:
-            player_dismissed = wickets_data[0].get("player_out")
-            dismissal_type = wickets_data[0].get("kind")
-            fielder_name = wickets_data[0].get("fielders", [{}])[0].get("name")
-
-        return {
-            "match_id": self._match_id,
-            "innings_number": innings_number,
-            "batting_team": batting_team,
-            "bowling_team": bowling_team,
-            "over_number": over_number,
-            "ball_number": ball_number,
-            "batter": batter,
-            "bowler": bowler,
-            "non_striker": non_striker,
-            "wide_runs": wide_runs,
-            "leg_bye_runs": leg_bye_runs,
-            "bye_runs": bye_runs,
-            "no_ball_runs": no_ball_runs,
-            "penalty_runs": penalty_runs,
-            "batsman_runs": batsman_runs,
-            "extra_runs": extra_runs,
-            "total_runs": total_runs,
-            "player_dismissed": player_dismissed,
-            "dismissal_type": dismissal_type,
-            "fielder_name": fielder_name
-        }
-
 
 @exception_handler      # noqa: Vulture
 @parse_eventbridge_event_message
 def handler(json_file_key, match_id):
-    extractor = DeliverywiseCricsheetDataExtractionHandler(match_id)
-    extractor.extract_deliverywise_cricsheet_data(json_file_key)
+    extractor = DeliverywiseCricsheetDataExtractionHandler()
+    extractor.extract_deliverywise_cricsheet_data(json_file_key, match_id)
     return f"Deliverywise data has been successfully extracted for match_id - {match_id}."
+
+
+@exception_handler      # noqa: Vulture
+@parse_sqs_batched_eventbridge_event_messages
+def batch_handler(s3_objects):
+    extractor = DeliverywiseCricsheetDataExtractionHandler()
+    failed_message_ids = extractor.extract_deliverywise_cricsheet_data_of_multiple_matches(s3_objects)
+    return (
+        f"Deliverywise data has been successfully extracted for {len(s3_objects) - len(failed_message_ids)} of {len(s3_objects)} matches.",
+        failed_message_ids
+    )
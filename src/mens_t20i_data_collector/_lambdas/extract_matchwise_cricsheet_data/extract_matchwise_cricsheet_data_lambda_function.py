@@ -1,13 +1,30 @@
-import json
 import logging
-from typing import Dict
-import boto3
-from pymongo import MongoClient
+import zlib
+from typing import Dict, List, Optional, Tuple
+from mens_t20i_data_collector._lambdas.client_registry import (
+    get_boto3_client,
+    get_boto3_resource,
+    get_mongo_db_client
+)
+from mens_t20i_data_collector._lambdas.cricsheet_json_decoder import (
+    get_cricsheet_json_decoder
+)
+from mens_t20i_data_collector._lambdas.cricsheet_match_data_parser import (
+    CricsheetMatchDataParser
+)
+from mens_t20i_data_collector._lambdas.execution_metrics import (
+    record_metric,
+    timed_span
+)
 from mens_t20i_data_collector._lambdas.utils import (
     exception_handler,
     get_environmental_variable_value,
+    make_dynamodb_entries_for_file_data_extraction_status_of_multiple_matches,
     make_dynamodb_entry_for_file_data_extraction_status,
-    parse_eventbridge_event_message
+    parse_eventbridge_event_message,
+    parse_sqs_batched_eventbridge_event_messages,
+    read_s3_object,
+    upsert_documents_of_multiple_matches_in_mongodb
 )
 
 # Set up logging
@@ -16,95 +33,128 @@ logger.setLevel(logging.INFO)
 
 class MatchwiseCricsheetDataExtractionHandler:
 
-    def __init__(self, match_id: int):
+    def __init__(self):
         """
-        Initializes the handler with the match ID and sets up required resources like S3 and DynamoDB.
-        :param match_id: Match ID for which delivery data needs to be extracted
+        Initializes the handler and sets up required resources like S3 and DynamoDB.
         """
-        self._match_id = match_id
+        self._match_id: Optional[int] = None
         self._s3_bucket_name = get_environmental_variable_value("DOWNLOAD_BUCKET_NAME")
         self._mongo_db_url = get_environmental_variable_value("MONGO_DB_URL")
         self._mongo_db_name = get_environmental_variable_value("MONGO_DB_NAME")
         self._mongo_collection_name = get_environmental_variable_value("MATCHWISE_DATA_COLLECTION_NAME")
-        self._mongo_db_client = MongoClient(self._mongo_db_url)
+        self._mongo_db_client = get_mongo_db_client(self._mongo_db_url)
         self._matchwise_data_mongo_collection = self._mongo_db_client[self._mongo_db_name][self._mongo_collection_name]
-        self._s3_client = boto3.client("s3")
-        dynamodb_client = boto3.resource("dynamodb")
+        self._mongo_db_bulk_write_chunk_size = int(get_environmental_variable_value("MONGO_DB_BULK_WRITE_CHUNK_SIZE"))
+        self._s3_client = get_boto3_client("s3")
+        self._decode_cricsheet_json = get_cricsheet_json_decoder(get_environmental_variable_value("CRICSHEET_JSON_DECODER"))
+        dynamodb_client = get_boto3_resource("dynamodb")
         self._dynamo_db_to_store_file_data_extraction_status = dynamodb_client.Table(   # type: ignore
             get_environmental_variable_value("DYNAMODB_TABLE_NAME")
         )
+        self._source_etags_by_match_id: Dict[int, str] = {}
+        self._content_crc32s_by_match_id: Dict[int, int] = {}
 
-    def extract_matchwise_cricsheet_data(self, json_s3_file_key: str) -> None:
+    def extract_matchwise_cricsheet_data(self, json_s3_file_key: str, match_id: int) -> None:
         """
         Extracts matchwise data from the S3 JSON file, processes it, and stores the data in DynamoDB.
         :param json_s3_file_key: The S3 file key for the cricsheet JSON file
+        :param match_id: Match ID for which match data needs to be extracted
         """
         logger.info(f"Extracting matchwise cricsheet data from {json_s3_file_key}")
         try:
-            bytes_buffer = self._s3_client.get_object(Bucket=self._s3_bucket_name, Key=json_s3_file_key)["Body"].read()
-            json_data = json.loads(bytes_buffer)
+            json_data = self._read_json_data_of_given_match(json_s3_file_key, match_id)
             self._get_match_data_of_given_match_id_and_store_in_dynamodb(json_data)
         except Exception as e:
             logger.error(f"Unexpected error occurred: {e}", exc_info=True)
             raise
 
+    def extract_matchwise_cricsheet_data_of_multiple_matches(self, s3_objects: Dict[str, Tuple[str, int]]) -> List[str]:
+        """
+        Extracts matchwise data of several S3 JSON files and stores the data of all of them in MongoDB with a single bulk write.
+        A file which fails does not stop the remaining ones from being processed.
+        :param s3_objects: The S3 file key and match ID of every cricsheet JSON file, keyed by its SQS message ID
+        :return: SQS message IDs of the files which could not be processed
+        """
+        failed_message_ids: List[str] = []
+        match_data_by_message_id: Dict[str, List[Dict]] = {}
+        for message_id, (json_s3_file_key, match_id) in s3_objects.items():
+            logger.info(f"Extracting matchwise cricsheet data from {json_s3_file_key}")
+            try:
+                json_data = self._read_json_data_of_given_match(json_s3_file_key, match_id)
+                match_data = self._get_match_data_of_given_match_id(json_data)
+                match_data['_id'] = match_data['match_id']
+                match_data_by_message_id[message_id] = [match_data]
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                logger.error(f"Failed to extract matchwise data from {json_s3_file_key}: {e}", exc_info=True)
+                failed_message_ids.append(message_id)
+
+        failed_message_ids_of_bulk_write = upsert_documents_of_multiple_matches_in_mongodb(
+            self._matchwise_data_mongo_collection, match_data_by_message_id, self._mongo_db_bulk_write_chunk_size
+        )
+        failed_message_ids.extend(failed_message_ids_of_bulk_write)
+        failed_message_ids.extend(make_dynamodb_entries_for_file_data_extraction_status_of_multiple_matches(
+            table=self._dynamo_db_to_store_file_data_extraction_status,
+            match_ids_by_message_id={
+                message_id: match_data[0]["match_id"] for message_id, match_data in match_data_by_message_id.items()
+                if message_id not in failed_message_ids_of_bulk_write
+            },
+            fields=["matchwise_data_extraction_status"],
+            source_etags_by_match_id=self._source_etags_by_match_id,
+            content_crc32s_by_match_id=self._content_crc32s_by_match_id
+        ))
+        return failed_message_ids
+
+    def _get_match_data_of_given_match_id(self, json_data: Dict) -> Dict:
+        """
+        Processes the JSON data into the match data of the match.
+        :param json_data: The JSON data containing match information
+        :return: The match data
+        """
+        with timed_span("Extraction"):
+            cricsheet_match_data_parser = CricsheetMatchDataParser(json_data, self._match_id)  # type: ignore
+            cricsheet_match_data_parser.parse_innings(collect_deliveries=False)
+            match_data = cricsheet_match_data_parser.get_match_data()
+        record_metric("RecordsProduced", 1)
+        return match_data
+
     def _get_match_data_of_given_match_id_and_store_in_dynamodb(self, json_data: Dict) -> None:
         """
         Processes the JSON data and stores it in DynamoDB.
         :param json_data: The JSON data containing match information
         """
-        info = json_data.get('info', {})
-        teams = info.get('teams', [])
-        match_data = {
-            "index": int(info.get('match_type_number')),
-            "match_id": self._match_id,
-            "date": info.get('dates', [None])[0],
-            "event_name": info.get('event', {}).get('name'),
-            "ground_name": info.get('venue'),
-            "ground_city": info.get('city'),
-            "team_1": teams[0] if teams else None,
-            "team_2": teams[1] if len(teams) > 1 else None,
-            "toss_winner": info.get('toss', {}).get('winner'),
-            "toss_decision": info.get('toss', {}).get('decision'),
-            "team_1_total_runs": self._get_total_runs_scored_by_given_team(json_data, teams[0]),
-            "team_2_total_runs": self._get_total_runs_scored_by_given_team(json_data, teams[1]) if len(teams) > 1 else None,
-            "winner": info.get('outcome', {}).get('winner') or info.get('outcome', {}).get('result'),
-            "margin_runs": info.get('outcome', {}).get('by', {}).get('runs'),
-            "margin_wickets": info.get('outcome', {}).get('by', {}).get('wickets'),
-            "winning_method": info.get('outcome', {}).get('method'),
-            "player_of_the_match": info.get('player_of_match', [None])[0]
-        }
-        self._store_dataframe_in_mongodb(match_data)
+        match_data = self._get_match_data_of_given_match_id(json_data)
+        self._store_documents_in_mongodb(match_data)
         make_dynamodb_entry_for_file_data_extraction_status(
             table=self._dynamo_db_to_store_file_data_extraction_status,
             file_name=f"{self._match_id}.json",
             field="matchwise_data_extraction_status",
-            status=True
+            status=True,
+            source_etag=self._source_etags_by_match_id.get(self._match_id),  # type: ignore
+            content_crc32=self._content_crc32s_by_match_id.get(self._match_id)  # type: ignore
         )
 
-    def _get_total_runs_scored_by_given_team(self, json_data: Dict, team_name: str) -> int:
+    def _read_json_data_of_given_match(self, json_s3_file_key: str, match_id: int) -> Dict:
         """
-        Calculates the total runs scored by a given team.
-        :param json_data: The JSON data containing match information
-        :param team_name: The name of the team
-        :return: The total runs scored by the team
+        Reads the S3 JSON file of the given match.
+        :param json_s3_file_key: The S3 file key for the cricsheet JSON file
+        :param match_id: Match ID of the cricsheet JSON file
+        :return: The JSON data of the match
         """
-        total_runs = 0
-        for inning in json_data.get('innings', []):
-            if inning.get('team') == team_name:
-                for over in inning.get('overs', []):
-                    for delivery in over.get('deliveries', []):
-                        total_runs += int(delivery.get('runs', {}).get('total', 0))
-        return total_runs
+        self._match_id = match_id
+        bytes_buffer, self._source_etags_by_match_id[match_id] = read_s3_object(self._s3_client, self._s3_bucket_name, json_s3_file_key)
+        self._content_crc32s_by_match_id[match_id] = zlib.crc32(bytes_buffer)
+        with timed_span("JsonParse"):
+            return self._decode_cricsheet_json(bytes_buffer)
 
-    def _store_dataframe_in_mongodb(self, match_data: Dict) -> None:
+    def _store_documents_in_mongodb(self, match_data: Dict) -> None:
         """
-        Stores the match dataframe in MongoDB.
+        Stores the match document in MongoDB, replacing the one stored previously.
         """
         match_data['_id'] = match_data['match_id']
-        logger.info(f"Inserting match data for match {match_data['match_id']} in MongoDB...")
+        logger.info(f"Upserting match data for match {match_data['match_id']} in MongoDB...")
         try:
-            self._matchwise_data_mongo_collection.insert_one(match_data)
+            with timed_span("MongoWrite"):
+                self._matchwise_data_mongo_collection.replace_one({"_id": match_data["_id"]}, match_data, upsert=True)
             logger.info("Data stored in MongoDB successfully")
         except Exception as e:
             logger.error(f"Failed to store data in MongoDB: {e}")
@@ -114,6 +164,17 @@ class MatchwiseCricsheetDataExtractionHandler:
 @exception_handler      # noqa: Vulture
 @parse_eventbridge_event_message  # noqa: Vulture
 def handler(json_file_key, match_id):
-    matchwise_cricsheet_data_extraction_handler = MatchwiseCricsheetDataExtractionHandler(match_id)
-    matchwise_cricsheet_data_extraction_handler.extract_matchwise_cricsheet_data(json_file_key)
+    matchwise_cricsheet_data_extraction_handler = MatchwiseCricsheetDataExtractionHandler()
+    matchwise_cricsheet_data_extraction_handler.extract_matchwise_cricsheet_data(json_file_key, match_id)
     return f"Matchwise data has been successfully extracted for match_id - {match_id}."
+
+
+@exception_handler      # noqa: Vulture
+@parse_sqs_batched_eventbridge_event_messages  # noqa: Vulture
+def batch_handler(s3_objects):
+    matchwise_cricsheet_data_extraction_handler = MatchwiseCricsheetDataExtractionHandler()
+    failed_message_ids = matchwise_cricsheet_data_extraction_handler.extract_matchwise_cricsheet_data_of_multiple_matches(s3_objects)
+    return (
+        f"Matchwise data has been successfully extracted for {len(s3_objects) - len(failed_message_ids)} of {len(s3_objects)} matches.",
+        failed_message_ids
+    )
@@ -0,0 +1,111 @@
+import json
+import logging
+from collections import Counter
+from typing import Dict, List
+from mens_t20i_data_collector._lambdas.client_registry import get_boto3_client
+from mens_t20i_data_collector._lambdas.constants import (
+    TELEGRAM_DIGEST_MAXIMUM_ERROR_MESSAGE_LENGTH,
+    TELEGRAM_DIGEST_MAXIMUM_ERRORS,
+    TELEGRAM_DIGEST_MESSAGE_TEMPLATE
+)
+
+# Set up logging
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# SQS returns at most 10 messages per receive, the drain stops after this many of them to stay within the lambda timeout
+_MAXIMUM_RECEIVE_CALLS_PER_DIGEST = 500
+
+
+def queue_execution_status_event(queue_url: str, function_name: str, timestamp: str, status: str, message: str) -> None:
+    """
+    Queues the execution status of a lambda invocation for the next notification digest.
+
+    :param queue_url: URL of the SQS queue collecting the execution status events
+    :param function_name: Name of the lambda function
+    :param timestamp: Time of the invocation
+    :param status: Execution status, either SUCCESS or FAILURE
+    :param message: Response message of the invocation
+    """
+    get_boto3_client("sqs").send_message(
+        QueueUrl=queue_url,
+        MessageBody=json.dumps({"function_name": function_name, "timestamp": timestamp, "status": status, "message": message})
+    )
+
+
+class NotificationDigest:
+
+    """Summary of the execution status events of a run, which is sent as a single Telegram message."""
+
+    def __init__(self) -> None:
+        self._events: List[Dict] = []
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def add(self, event: Dict) -> None:
+        """
+        :param event: Execution status event as queued by `queue_execution_status_event`
+        """
+        self._events.append(event)
+
+    def to_message(self) -> str:
+        """
+        :return: Telegram message with the success and failure counts of every lambda and the first few failures
+        """
+        events = sorted(self._events, key=lambda event: event["timestamp"])
+        counts = Counter((event["function_name"], event["status"]) for event in events)
+        function_names = sorted({event["function_name"] for event in events})
+        failures = [event for event in events if event["status"] != "SUCCESS"]
+        counts_by_function = "\n".join(
+            f"• {function_name}: {counts[(function_name, 'SUCCESS')]} ✅ / {counts[(function_name, 'FAILURE')]} ❌" for function_name in function_names
+        )
+        first_failures = "\n".join(
+            f"• {event['timestamp']} {event['function_name']}: {event['message'][:TELEGRAM_DIGEST_MAXIMUM_ERROR_MESSAGE_LENGTH]}"
+            for event in failures[:TELEGRAM_DIGEST_MAXIMUM_ERRORS]
+        )
+        return TELEGRAM_DIGEST_MESSAGE_TEMPLATE.format(
+            events[0]["timestamp"] if events else "-",
+            events[-1]["timestamp"] if events else "-",
+            len(events) - len(failures),
+            len(failures),
+            counts_by_function or "-",
+            first_failures or "-"
+        )
+
+
+def receive_execution_status_events(queue_url: str) -> Dict[str, Dict]:
+    """
+    Receives the execution status events queued so far, without deleting them from the queue.
+
+    :param queue_url: URL of the SQS queue collecting the execution status events
+    :return: Execution status events keyed by the receipt handle of their SQS message
+    """
+    sqs_client = get_boto3_client("sqs")
+    events_by_receipt_handle: Dict[str, Dict] = {}
+    for _ in range(_MAXIMUM_RECEIVE_CALLS_PER_DIGEST):
+        messages = sqs_client.receive_message(QueueUrl=queue_url, MaxNumberOfMessages=10, WaitTimeSeconds=1).get("Messages", [])
+        if not messages:
+            break
+        for message in messages:
+            events_by_receipt_handle[message["ReceiptHandle"]] = json.loads(message["Body"])
+    logger.info(f"Received {len(events_by_receipt_handle)} execution status events")
+    return events_by_receipt_handle
+
+
+def delete_execution_status_events(queue_url: str, receipt_handles: List[str]) -> None:
+    """
+    Deletes the execution status events which made it into a sent digest.
+
+    :param queue_url: URL of the SQS queue collecting the execution status events
+    :param receipt_handles: Receipt handles of the SQS messages of the events
+    """
+    sqs_client = get_boto3_client("sqs")
+    for index in range(0, len(receipt_handles), 10):
+        sqs_client.delete_message_batch(
+            QueueUrl=queue_url,
+            Entries=[
+                {"Id": str(entry_number), "ReceiptHandle": receipt_handle}
+                for entry_number, receipt_handle in enumerate(receipt_handles[index:index + 10])
+            ]
+        )
@@ -0,0 +1,123 @@
+import logging
+import os
+import tempfile
+from typing import TYPE_CHECKING
+import pandas as pd
+from mens_t20i_data_collector._lambdas.constants import (
+    DELIVERYWISE_DATAFRAME_COLUMNS,
+    DELIVERYWISE_DATAFRAME_INTEGER_COLUMNS,
+    PARQUET_ROW_GROUP_SIZE
+)
+from mens_t20i_data_collector._lambdas.execution_metrics import (
+    record_metric,
+    timed_span
+)
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+# Set up logging
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def _get_dictionary_encoded_string_type() -> "pa.DataType":
+    """
+    :return: Arrow type of the string columns, which repeat a few thousand distinct values like team and player names and are therefore dictionary encoded
+    """
+    import pyarrow as pa  # pylint: disable=import-outside-toplevel
+    return pa.dictionary(pa.int32(), pa.string())
+
+
+def get_deliverywise_data_arrow_schema() -> "pa.Schema":
+    """
+    :return: Arrow schema of the deliverywise dataset
+    """
+    import pyarrow as pa  # pylint: disable=import-outside-toplevel
+    return pa.schema(
+        [
+            (column, pa.int32() if column in DELIVERYWISE_DATAFRAME_INTEGER_COLUMNS else _get_dictionary_encoded_string_type())
+            for column in DELIVERYWISE_DATAFRAME_COLUMNS
+        ]
+        + [("match_number", pa.int32())]
+    )
+
+
+def get_matchwise_data_arrow_schema() -> "pa.Schema":
+    """
+    :return: Arrow schema of the matchwise dataset
+    """
+    import pyarrow as pa  # pylint: disable=import-outside-toplevel
+    dictionary_encoded_string = _get_dictionary_encoded_string_type()
+    return pa.schema([
+        ("match_number", pa.int32()),
+        ("match_id", pa.int32()),
+        ("date", pa.date32()),
+        ("event_name", dictionary_encoded_string),
+        ("ground_name", dictionary_encoded_string),
+        ("ground_city", dictionary_encoded_string),
+        ("team_1", dictionary_encoded_string),
+        ("team_2", dictionary_encoded_string),
+        ("toss_winner", dictionary_encoded_string),
+        ("toss_decision", dictionary_encoded_string),
+        ("team_1_total_runs", pa.int32()),
+        ("team_2_total_runs", pa.int32()),
+        ("winner", dictionary_encoded_string),
+        ("margin_runs", pa.int32()),
+        ("margin_wickets", pa.int32()),
+        ("winning_method", dictionary_encoded_string),
+        ("player_of_the_match", dictionary_encoded_string),
+    ])
+
+
+class ParquetDatasetWriter:
+
+    """
+    Writes dataframes of a dataset to a Parquet file with a fixed schema, one or more row groups with statistics per written
+    dataframe, and uploads the file to S3 once closed. The file is staged in the temporary directory rather than in memory.
+    pyarrow is only imported once a writer is created, so that the lambdas which do not write Parquet files do not load it.
+    """
+
+    def __init__(self, s3_client, s3_bucket_name: str, key: str, schema: "pa.Schema", compression: str = "snappy") -> None:  # pylint: disable=too-many-arguments
+        """
+        :param s3_client: S3 client to upload with
+        :param s3_bucket_name: Name of the S3 bucket to upload to
+        :param key: S3 key of the uploaded Parquet file
+        :param schema: Arrow schema of the dataset
+        :param compression: Compression codec of the pages of the Parquet file
+        """
+        self._s3_client = s3_client
+        self._s3_bucket_name = s3_bucket_name
+        self._key = key
+        import pyarrow.parquet as pq  # pylint: disable=import-outside-toplevel
+        self._schema = schema
+        self._file_path = os.path.join(tempfile.gettempdir(), os.path.basename(key))
+        self._parquet_writer = pq.ParquetWriter(self._file_path, schema, compression=compression, use_dictionary=True, write_statistics=True)
+
+    def __enter__(self) -> "ParquetDatasetWriter":
+        return self
+
+    def __exit__(self, exc_type, *_) -> None:
+        self._parquet_writer.close()
+        if exc_type is None:
+            with timed_span("S3Put"):
+                self._s3_client.upload_file(Filename=self._file_path, Bucket=self._s3_bucket_name, Key=self._key)
+            record_metric("BytesWritten", os.path.getsize(self._file_path), "Bytes")
+            logger.info(f"Parquet file of {os.path.getsize(self._file_path)} bytes uploaded to '{self._key}'")
+        os.remove(self._file_path)
+
+    def write(self, dataframe: pd.DataFrame) -> None:
+        """
+        :param dataframe: Dataframe holding the columns of the schema, as prepared for the CSV output
+        """
+        import pyarrow as pa  # pylint: disable=import-outside-toplevel
+        columns = {}
+        for field in self._schema:
+            column = dataframe[field.name]
+            if pa.types.is_date(field.type):
+                column = pd.to_datetime(column).dt.date
+            elif pa.types.is_integer(field.type):
+                column = column.astype("Int32")
+            columns[field.name] = column
+        table = pa.Table.from_pandas(pd.DataFrame(columns), schema=self._schema, preserve_index=False)
+        self._parquet_writer.write_table(table, row_group_size=PARQUET_ROW_GROUP_SIZE)
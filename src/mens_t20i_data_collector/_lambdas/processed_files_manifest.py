@@ -0,0 +1,145 @@
+import logging
+import os
+from array import array
+from typing import Dict, Optional
+from mens_t20i_data_collector._lambdas.client_registry import (
+    get_boto3_client,
+    get_boto3_resource
+)
+from mens_t20i_data_collector._lambdas.constants import (
+    CRICSHEET_DATA_S3_FOLDER_NAME,
+    PROCESSED_FILES_MANIFEST_FILE_NAME
+)
+from mens_t20i_data_collector._lambdas.utils import (
+    get_environmental_variable_value
+)
+
+# Set up logging
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+class ProcessedFilesManifest:
+
+    """
+    Compact map of the match IDs whose cricsheet JSON files are processed to the CRC32 of the processed content of the files,
+    stored in S3 as an array of unsigned 32 bit integers holding the match ID and the CRC32 of every file, sorted by match ID.
+    A CRC32 of 0 stands for a file processed before the content CRC32 was recorded. DynamoDB stays the record of the data
+    extraction status of every file, and the manifest can always be rebuilt from it.
+    Stored under another file name, the same format records the files which are skipped rather than processed.
+    """
+
+    def __init__(self, s3_client, s3_bucket_name: str, manifest_file_name: str = PROCESSED_FILES_MANIFEST_FILE_NAME) -> None:
+        """
+        :param s3_client: S3 client to load and store the manifest with
+        :param s3_bucket_name: Name of the S3 bucket holding the manifest
+        :param manifest_file_name: Name of the manifest file in the cricsheet data folder of the bucket
+        """
+        self._s3_client = s3_client
+        self._s3_bucket_name = s3_bucket_name
+        self._manifest_s3_key = f"{CRICSHEET_DATA_S3_FOLDER_NAME}/{manifest_file_name}"
+        self._content_crc32s_by_match_id: Dict[int, int] = {}
+
+    def __contains__(self, file_name: str) -> bool:
+        return self._get_match_id_of_file(file_name) in self._content_crc32s_by_match_id
+
+    def __len__(self) -> int:
+        return len(self._content_crc32s_by_match_id)
+
+    def add(self, content_crc32s_by_file_name: Dict[str, Optional[int]]) -> None:
+        """
+        Adds the given processed files to the manifest, replacing the CRC32 of the files already in it. Files not named after
+        a match ID are skipped.
+
+        :param content_crc32s_by_file_name: CRC32 of the processed content of every cricsheet JSON file, None when not known
+        """
+        for file_name, content_crc32 in content_crc32s_by_file_name.items():
+            match_id = self._get_match_id_of_file(file_name)
+            if match_id is not None:
+                self._content_crc32s_by_match_id[match_id] = content_crc32 or 0
+
+    def get_content_crc32(self, file_name: str) -> Optional[int]:
+        """
+        :param file_name: Name of the cricsheet JSON file
+        :return: CRC32 of the processed content of the file, None when the file is not in the manifest or its CRC32 is not known
+        """
+        return self._content_crc32s_by_match_id.get(self._get_match_id_of_file(file_name)) or None  # type: ignore
+
+    def load(self) -> None:
+        """
+        Loads the manifest from S3 with a single GET. A missing manifest is loaded as an empty one.
+        """
+        try:
+            response = self._s3_client.get_object(Bucket=self._s3_bucket_name, Key=self._manifest_s3_key)
+        except self._s3_client.exceptions.NoSuchKey:
+            logger.info(f"No processed files manifest found in {self._manifest_s3_key}")
+            self._content_crc32s_by_match_id = {}
+            return
+        match_ids_and_content_crc32s = array("I")
+        match_ids_and_content_crc32s.frombytes(response["Body"].read())
+        self._content_crc32s_by_match_id = dict(zip(match_ids_and_content_crc32s[0::2], match_ids_and_content_crc32s[1::2]))
+        logger.info(f"Loaded {len(self._content_crc32s_by_match_id)} processed match IDs from {self._manifest_s3_key}")
+
+    def rebuild_from_dynamodb(self, table) -> None:
+        """
+        Rebuilds the manifest from every file present in the DynamoDB table of file data extraction status.
+
+        :param table: DynamoDB table storing the file data extraction status
+        """
+        self._content_crc32s_by_match_id = {}
+        self.add(list_content_crc32s_of_all_files_from_dynamodb(table))
+        logger.info(f"Rebuilt the processed files manifest with {len(self._content_crc32s_by_match_id)} match IDs")
+
+    def save(self) -> None:
+        """
+        Stores the manifest in S3.
+        """
+        self._s3_client.put_object(
+            Bucket=self._s3_bucket_name,
+            Key=self._manifest_s3_key,
+            Body=array("I", [
+                value for match_id in sorted(self._content_crc32s_by_match_id) for value in (match_id, self._content_crc32s_by_match_id[match_id])
+            ]).tobytes(),
+        )
+        logger.info(f"Stored {len(self._content_crc32s_by_match_id)} processed match IDs in {self._manifest_s3_key}")
+
+    @staticmethod
+    def _get_match_id_of_file(file_name: str) -> Optional[int]:
+        match_id = os.path.splitext(os.path.basename(file_name))[0]
+        return int(match_id) if match_id.isdigit() else None
+
+
+def list_content_crc32s_of_all_files_from_dynamodb(table) -> Dict[str, Optional[int]]:
+    """
+    Lists the CRC32 of the processed content of all the files in the DynamoDB table of file data extraction status,
+    following the scan pagination.
+
+    :param table: DynamoDB table storing the file data extraction status
+    :return: CRC32 of the processed content of every file, None for the files processed before it was recorded
+    """
+    content_crc32s_by_file_name: Dict[str, Optional[int]] = {}
+    scan_kwargs = {"ProjectionExpression": "file_name, content_crc32"}
+    while True:
+        response = table.scan(**scan_kwargs)
+        content_crc32s_by_file_name.update((item["file_name"], get_content_crc32_of_dynamodb_item(item)) for item in response["Items"])
+        if "LastEvaluatedKey" not in response:
+            return content_crc32s_by_file_name
+        scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def get_content_crc32_of_dynamodb_item(item: Dict) -> Optional[int]:
+    """
+    :param item: Item of the DynamoDB table of file data extraction status
+    :return: CRC32 of the processed content of the file, None when it was processed before the CRC32 was recorded
+    """
+    # DynamoDB numbers are read as decimals
+    return int(item["content_crc32"]) if "content_crc32" in item else None
+
+
+def rebuild_processed_files_manifest():   # noqa: Vulture
+    """Rebuilds the processed files manifest in S3 from the DynamoDB table of file data extraction status."""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    table = get_boto3_resource("dynamodb").Table(get_environmental_variable_value("DYNAMODB_TABLE_NAME"))   # type: ignore
+    manifest = ProcessedFilesManifest(get_boto3_client("s3"), get_environmental_variable_value("DOWNLOAD_BUCKET_NAME"))
+    manifest.rebuild_from_dynamodb(table)
+    manifest.save()
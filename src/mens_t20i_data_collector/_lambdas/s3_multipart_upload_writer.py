@@ -0,0 +1,98 @@
+import logging
+from typing import Dict, List, Optional
+from mens_t20i_data_collector._lambdas.constants import (
+    S3_MULTIPART_UPLOAD_PART_SIZE_IN_BYTES
+)
+from mens_t20i_data_collector._lambdas.execution_metrics import (
+    record_metric,
+    timed_span
+)
+
+# Set up logging
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+class S3MultipartUploadWriter:
+
+    """
+    File-like writer which uploads the written bytes to S3 in fixed size parts of a multipart upload, so that only a single part
+    is held in memory at any time. Content smaller than a part is uploaded with a single PUT instead.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self, s3_client, s3_bucket_name: str, key: str, part_size: int = S3_MULTIPART_UPLOAD_PART_SIZE_IN_BYTES, extra_args: Optional[Dict] = None
+    ) -> None:
+        """
+        :param s3_client: S3 client to upload with
+        :param s3_bucket_name: Name of the S3 bucket to upload to
+        :param key: S3 key of the uploaded object
+        :param part_size: Size of every part but the last one, which S3 requires to be at least 5 MB
+        :param extra_args: Additional arguments of the upload like the content encoding of the object
+        """
+        self._s3_client = s3_client
+        self._s3_bucket_name = s3_bucket_name
+        self._key = key
+        self._part_size = part_size
+        self._extra_args = extra_args or {}
+        self._buffer = bytearray()
+        self._upload_id: Optional[str] = None
+        self._parts: List[Dict] = []
+        self.bytes_written = 0
+
+    def __enter__(self) -> "S3MultipartUploadWriter":
+        return self
+
+    def __exit__(self, exc_type, *_) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, data: bytes) -> int:
+        """
+        :param data: Bytes to append to the uploaded object
+        :return: Number of bytes written
+        """
+        self._buffer.extend(data)
+        self.bytes_written += len(data)
+        while len(self._buffer) >= self._part_size:
+            self._upload_part(bytes(self._buffer[:self._part_size]))
+            del self._buffer[:self._part_size]
+        return len(data)
+
+    def close(self) -> None:
+        """
+        Uploads the remaining bytes and completes the upload.
+        """
+        if self._upload_id is None:
+            with timed_span("S3Put"):
+                self._s3_client.put_object(Bucket=self._s3_bucket_name, Key=self._key, Body=bytes(self._buffer), **self._extra_args)
+        else:
+            if self._buffer:
+                self._upload_part(bytes(self._buffer))
+            self._s3_client.complete_multipart_upload(
+                Bucket=self._s3_bucket_name, Key=self._key, UploadId=self._upload_id, MultipartUpload={"Parts": self._parts}
+            )
+        self._buffer = bytearray()
+        record_metric("BytesWritten", self.bytes_written, "Bytes")
+        logger.info(f"Uploaded {self.bytes_written} bytes to '{self._key}' in {max(len(self._parts), 1)} parts")
+
+    def abort(self) -> None:
+        """
+        Aborts the upload, discarding the parts uploaded so far.
+        """
+        if self._upload_id is not None:
+            self._s3_client.abort_multipart_upload(Bucket=self._s3_bucket_name, Key=self._key, UploadId=self._upload_id)
+            logger.info(f"Aborted the multipart upload of '{self._key}'")
+        self._buffer = bytearray()
+
+    def _upload_part(self, part: bytes) -> None:
+        if self._upload_id is None:
+            self._upload_id = self._s3_client.create_multipart_upload(Bucket=self._s3_bucket_name, Key=self._key, **self._extra_args)["UploadId"]
+        part_number = len(self._parts) + 1
+        with timed_span("S3Put"):
+            response = self._s3_client.upload_part(
+                Bucket=self._s3_bucket_name, Key=self._key, UploadId=self._upload_id, PartNumber=part_number, Body=part
+            )
+        self._parts.append({"ETag": response["ETag"], "PartNumber": part_number})
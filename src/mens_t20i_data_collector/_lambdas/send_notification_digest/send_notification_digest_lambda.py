@@ -0,0 +1,57 @@
+import logging
+from mens_t20i_data_collector._lambdas.notification_digest import (
+    NotificationDigest,
+    delete_execution_status_events,
+    receive_execution_status_events
+)
+from mens_t20i_data_collector._lambdas.utils import (
+    get_environmental_variable_value,
+    send_alert_via_telegram_bot
+)
+
+# Set up logging
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+class NotificationDigestSender:
+
+    """Handler to send the execution status events queued since the previous digest as a single Telegram message."""
+
+    def __init__(self) -> None:
+        self._queue_url = get_environmental_variable_value("TELEGRAM_NOTIFICATION_QUEUE_URL")
+        self._telegram_chat_id = get_environmental_variable_value("TELEGRAM_CHAT_ID")
+        self._telegram_bot_token = get_environmental_variable_value("TELEGRAM_BOT_TOKEN")
+
+    def send_notification_digest(self) -> int:
+        """
+        Sends the digest of the queued execution status events. The events are deleted from the queue only once the digest is
+        sent, so that they are part of the next digest otherwise.
+
+        :return: Number of events in the sent digest
+        """
+        events_by_receipt_handle = receive_execution_status_events(self._queue_url)
+        if not events_by_receipt_handle:
+            logger.info("No execution status events since the previous digest.")
+            return 0
+        notification_digest = NotificationDigest()
+        for event in events_by_receipt_handle.values():
+            notification_digest.add(event)
+        if not send_alert_via_telegram_bot(
+            chat_id=self._telegram_chat_id, message=notification_digest.to_message(), telegram_bot_token=self._telegram_bot_token
+        ):
+            raise RuntimeError(f"Failed to send the notification digest of {len(notification_digest)} execution status events")
+        delete_execution_status_events(self._queue_url, list(events_by_receipt_handle))
+        return len(notification_digest)
+
+
+def handler(_, __):     # noqa: Vulture
+    """
+    Lambda function handler to send the notification digest. It is not wrapped by the exception handler, whose status
+    notification would end up in the digest itself.
+    """
+    number_of_events = NotificationDigestSender().send_notification_digest()
+    return {
+        "statusCode": 200,
+        "body": f"Notification digest of {number_of_events} execution status events sent."
+    }
@@ -3,12 +3,16 @@ import logging
 import os
 import tempfile
 from datetime import datetime
-import boto3
-import pandas as pd
+from mens_t20i_data_collector._lambdas.client_registry import get_boto3_client
 from mens_t20i_data_collector._lambdas.constants import (
     CRICSHEET_DATA_S3_OUTPUT_FOLDER,
     DELIVERYWISE_DATA_CSV_FILE_NAME,
-    MATCHWISE_DATA_CSV_FILE_NAME
+    DELIVERYWISE_DATA_PARQUET_FILE_NAME,
+    MATCHWISE_DATA_CSV_FILE_NAME,
+    MATCHWISE_DATA_PARQUET_FILE_NAME
+)
+from mens_t20i_data_collector._lambdas.dataset_output_compressor import (
+    get_dataset_output_file_name
 )
 from mens_t20i_data_collector._lambdas.utils import (
     exception_handler,
@@ -29,10 +33,16 @@ class KaggleDatasetUploader:
         self._s3_bucket_name = get_environmental_variable_value("DOWNLOAD_BUCKET_NAME")
         self._kaggle_username = get_environmental_variable_value("KAGGLE_USERNAME")
         self._create_kaggle_json_file()
-        self._matchwise_data_csv_file_s3_key = f"{CRICSHEET_DATA_S3_OUTPUT_FOLDER}/{MATCHWISE_DATA_CSV_FILE_NAME}"
-        self._deliverywise_data_csv_file_s3_key = f"{CRICSHEET_DATA_S3_OUTPUT_FOLDER}/{DELIVERYWISE_DATA_CSV_FILE_NAME}"
+        # CSV files are published the way the convert lambda compressed them, pandas reads them based on their extension
+        dataset_output_compression = get_environmental_variable_value("DATASET_OUTPUT_COMPRESSION")
+        self._matchwise_data_csv_file_name = get_dataset_output_file_name(MATCHWISE_DATA_CSV_FILE_NAME, dataset_output_compression)
+        self._dataset_file_names = [
+            self._matchwise_data_csv_file_name, get_dataset_output_file_name(DELIVERYWISE_DATA_CSV_FILE_NAME, dataset_output_compression)
+        ]
+        if get_environmental_variable_value("ENABLE_PARQUET_OUTPUT") == "true":
+            self._dataset_file_names.extend([MATCHWISE_DATA_PARQUET_FILE_NAME, DELIVERYWISE_DATA_PARQUET_FILE_NAME])
         self._folder_to_keep_the_files_to_upload = os.path.join(self._temporary_directory, "files_to_upload_to_kaggle")
-        self._s3_client = boto3.client("s3")
+        self._s3_client = get_boto3_client("s3")
 
     def upload_dataset_to_kaggle(self):
         """
@@ -104,25 +114,22 @@ class KaggleDatasetUploader:
         Downloads the dataset files from S3.
         """
         logger.info("Downloading dataset files from S3...")
-        self._s3_client.download_file(
-            self._s3_bucket_name,
-            self._matchwise_data_csv_file_s3_key,
-            os.path.join(self._folder_to_keep_the_files_to_upload, MATCHWISE_DATA_CSV_FILE_NAME)
-        )
-        self._s3_client.download_file(
-            self._s3_bucket_name,
-            self._deliverywise_data_csv_file_s3_key,
-            os.path.join(self._folder_to_keep_the_files_to_upload, DELIVERYWISE_DATA_CSV_FILE_NAME)
-        )
-        logger.info("Dataset files downloaded from S3")
+        for file_name in self._dataset_file_names:
+            self._s3_client.download_file(
+                self._s3_bucket_name,
+                f"{CRICSHEET_DATA_S3_OUTPUT_FOLDER}/{file_name}",
+                os.path.join(self._folder_to_keep_the_files_to_upload, file_name)
+            )
+        logger.info(f"Dataset files {self._dataset_file_names} downloaded from S3")
 
     def _get_last_match_details(self):
         """
         Gets the last match details from the matchwise data.
         """
         logger.info("Getting last match details...")
+        import pandas as pd  # pylint: disable=import-outside-toplevel
         matchwise_data = pd.read_csv(
-            os.path.join(self._folder_to_keep_the_files_to_upload, MATCHWISE_DATA_CSV_FILE_NAME)
+            os.path.join(self._folder_to_keep_the_files_to_upload, self._matchwise_data_csv_file_name)
         )
         last_match_details = matchwise_data.iloc[-1]
         logger.info(f"Last match details: {last_match_details}")
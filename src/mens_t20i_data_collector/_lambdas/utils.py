@@ -1,13 +1,32 @@
 import datetime
 import functools
+import json
 import logging
 import os
-from typing import Any
-import requests
+import time
+from collections import defaultdict
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Tuple, Union
 from botocore.exceptions import ClientError
+from mens_t20i_data_collector._lambdas.client_registry import (
+    create_mongo_db_index
+)
 from mens_t20i_data_collector._lambdas.constants import (
+    DYNAMODB_TRANSACT_WRITE_ITEMS_LIMIT,
+    TELEGRAM_EXECUTION_STATUS_LABELS,
     TELEGRAM_MESSAGE_TEMPLATE
 )
+from mens_t20i_data_collector._lambdas.execution_metrics import (
+    emit_invocation_metrics,
+    record_metric,
+    reset_invocation_metrics,
+    timed_span
+)
+from mens_t20i_data_collector._lambdas.notification_digest import (
+    queue_execution_status_event
+)
+
+if TYPE_CHECKING:
+    from pymongo import DeleteMany, ReplaceOne
 
 # Set up logging
 logger = logging.getLogger()
@@ -17,52 +36,60 @@ logger.setLevel(logging.INFO)
 def exception_handler(function):
     """
     Decorator to wrap the handler with a try-except block and provides error logging and a standardized response.
+    The metrics of every invocation, along with the ones recorded by the handler, are emitted in the CloudWatch embedded metric format.
     """
     @functools.wraps(function)
     def wrapper(*args, **kwargs):
         current_time = datetime.datetime.now()
+        start_time = time.perf_counter()
+        reset_invocation_metrics()
         function_name = "unknown_function"
         for arg in args:
             if hasattr(arg, "function_name"):
                 function_name = arg.function_name
                 break
-        try:
-            response_body = function(*args, **kwargs)
-            send_alert_via_telegram_bot(
-                chat_id=get_environmental_variable_value("TELEGRAM_CHAT_ID"),
-                message=TELEGRAM_MESSAGE_TEMPLATE.format(
-                    current_time.strftime("%d-%m-%Y"),
-                    current_time.strftime("%H:%M:%S"),
-                    function_name,
-                    "SUCCESS ✅",
-                    response_body
-                ),
-                telegram_bot_token=get_environmental_variable_value("TELEGRAM_BOT_TOKEN")
-            )
-            return {
-                "statusCode": 200,
-                "body": response_body
-            }
-        except Exception as e:  # pylint: disable=broad-exception-caught
-            logger.error(f"Error occurred: {str(e)}", exc_info=True)
-            send_alert_via_telegram_bot(
-                chat_id=get_environmental_variable_value("TELEGRAM_CHAT_ID"),
-                message=TELEGRAM_MESSAGE_TEMPLATE.format(
-                    current_time.strftime("%d-%m-%Y"),
-                    current_time.strftime("%H:%M:%S"),
-                    function_name,
-                    "ERROR ❌",
-                    str(e)
-                ),
-                telegram_bot_token=get_environmental_variable_value("TELEGRAM_BOT_TOKEN")
-            )
-            return {
-                "statusCode": 500,
-                "body": f"Internal Server Error: {str(e)}"
-            }
+        response = _get_response_of_handler(function, current_time, function_name, *args, **kwargs)
+        emit_invocation_metrics(
+            function_name,
+            (time.perf_counter() - start_time) * 1000,
+            len(response["batchItemFailures"]) if "batchItemFailures" in response else None
+        )
+        return response
     return wrapper
 
 
+def _get_response_of_handler(function, current_time: datetime.datetime, function_name: str, *args, **kwargs) -> Dict[str, Any]:
+    """
+    Runs the handler, notifies its execution status and returns its response, with the SQS messages to retry if it failed.
+    """
+    try:
+        response_body = function(*args, **kwargs)
+        batch_item_failures = None
+        if isinstance(response_body, dict) and "batchItemFailures" in response_body:
+            batch_item_failures = response_body["batchItemFailures"]
+            response_body = response_body["message"]
+        _notify_execution_status(current_time, function_name, response_body, "failure" if batch_item_failures else "success")
+        response = {
+            "statusCode": 200,
+            "body": response_body
+        }
+        if batch_item_failures is not None:
+            response["batchItemFailures"] = batch_item_failures
+        return response
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.error(f"Error occurred: {str(e)}", exc_info=True)
+        _notify_execution_status(current_time, function_name, str(e), "critical")
+        response = {
+            "statusCode": 500,
+            "body": f"Internal Server Error: {str(e)}"
+        }
+        sqs_message_ids = _get_sqs_message_ids_of_event(args)
+        if sqs_message_ids:
+            # The whole SQS batch has to be retried when the handler itself fails
+            response["batchItemFailures"] = [{"itemIdentifier": message_id} for message_id in sqs_message_ids]
+        return response
+
+
 def get_environmental_variable_value(variable_name: str) -> Any:
     value = os.getenv(variable_name)
     if value is None:
@@ -71,24 +98,195 @@ def get_environmental_variable_value(variable_name: str) -> Any:
     return value
 
 
-def make_dynamodb_entry_for_file_data_extraction_status(table, file_name: str, field: str, status: bool):
+def read_s3_object(s3_client, s3_bucket_name: str, key: str) -> Tuple[bytes, str]:
+    """
+    Reads the content of an S3 object, recording the time taken and the bytes read as the metrics of the invocation.
+
+    :param s3_client: S3 client to read with
+    :param s3_bucket_name: Name of the S3 bucket of the object
+    :param key: S3 key of the object
+    :return: Content and ETag of the object
+    """
+    with timed_span("S3Get"):
+        response = s3_client.get_object(Bucket=s3_bucket_name, Key=key)
+        content = response["Body"].read()
+    record_metric("BytesRead", len(content), "Bytes")
+    return content, response["ETag"]
+
+
+def upsert_documents_of_multiple_matches_in_mongodb(
+    collection, documents_by_message_id: Dict[str, List[Dict]], chunk_size: int, remove_stale_documents: bool = False
+) -> List[str]:
+    """
+    Upserts the documents of several matches into MongoDB with unordered bulk writes of at most the given number of operations.
+
+    Every document replaces the one with the same deterministic ID, so a retried message or a revised cricsheet file of an
+    already stored match overwrites it instead of failing on a duplicate key.
+
+    :param collection: MongoDB collection to upsert the documents into
+    :param documents_by_message_id: Documents of every match, keyed by the SQS message ID of the match
+    :param chunk_size: Maximum number of operations sent to MongoDB in a single bulk write
+    :param remove_stale_documents: Whether to delete the documents of the matches which are not among their given documents,
+        like the deliveries dropped from a revised cricsheet file. The deletes look the documents up by an index on the match ID
+    :return: SQS message IDs of the matches whose documents could not be stored
+    """
+    import pymongo  # pylint: disable=import-outside-toplevel
+    message_ids: List[str] = []
+    operations: List[Union["DeleteMany", "ReplaceOne"]] = []
+    for message_id, documents_of_match in documents_by_message_id.items():
+        operations_of_match: List[Union["DeleteMany", "ReplaceOne"]] = [
+            pymongo.ReplaceOne({"_id": document["_id"]}, document, upsert=True) for document in documents_of_match
+        ]
+        if remove_stale_documents and documents_of_match:
+            operations_of_match.append(pymongo.DeleteMany({
+                "match_id": documents_of_match[0]["match_id"], "_id": {"$nin": [document["_id"] for document in documents_of_match]}
+            }))
+        message_ids.extend([message_id] * len(operations_of_match))
+        operations.extend(operations_of_match)
+    if not operations:
+        return []
+    logger.info(f"Upserting the records of {len(documents_by_message_id)} matches in MongoDB with {len(operations)} operations...")
+    if remove_stale_documents:
+        create_mongo_db_index(collection, "match_id")
+    failed_message_ids: Set[str] = set()
+    for offset in range(0, len(operations), chunk_size):
+        try:
+            with timed_span("MongoWrite"):
+                collection.bulk_write(operations[offset:offset + chunk_size], ordered=False)
+        except pymongo.errors.BulkWriteError as e:
+            # Concurrent upserts of the same document can race on its ID, in which case the document is stored either way
+            write_errors = [error for error in e.details.get("writeErrors", []) if error.get("code") != 11000]
+            if write_errors:
+                logger.error(f"Failed to store {len(write_errors)} records in MongoDB: {write_errors[0].get('errmsg')}")
+            failed_message_ids.update(message_ids[offset + error["index"]] for error in write_errors)
+    if not failed_message_ids:
+        logger.info("Data stored in MongoDB successfully")
+    return sorted(failed_message_ids)
+
+
+def make_dynamodb_entries_for_file_data_extraction_status_of_multiple_matches(
+    table, match_ids_by_message_id: Dict[str, int], fields: List[str], source_etags_by_match_id: Optional[Dict[int, str]] = None,
+    content_crc32s_by_match_id: Optional[Dict[int, int]] = None
+) -> List[str]:
+    """
+    Creates the DynamoDB entries for file data extraction status of several matches. The entries are written as transactions
+    of up to 100 updates, so the number of requests grows with the batches rather than with the files. The entries of a
+    transaction which fails are written one at a time, so that a single bad entry does not fail the rest of the batch.
+    Every status field is stored along with the time of its update, the ETag of the S3 object the match was extracted from and
+    the CRC32 of its content, against which the download lambda finds the files revised by Cricsheet.
+
+    :param table: DynamoDB table to store the file data extraction status
+    :param match_ids_by_message_id: Match ID of every successfully extracted match, keyed by its SQS message ID
+    :param fields: Status fields to set
+    :param source_etags_by_match_id: ETag of the S3 object every match was extracted from
+    :param content_crc32s_by_match_id: CRC32 of the cricsheet JSON file every match was extracted from
+    :return: SQS message IDs of the matches whose entries could not be created
+    """
+    # Duplicate deliveries of an S3 event carry the same match, while a transaction can update every item only once
+    message_ids_by_file_name: Dict[str, List[str]] = defaultdict(list)
+    updates_by_file_name: Dict[str, Dict[str, Any]] = {}
+    source_etags_by_match_id = source_etags_by_match_id or {}
+    content_crc32s_by_match_id = content_crc32s_by_match_id or {}
+    updated_at = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    for message_id, match_id in match_ids_by_message_id.items():
+        message_ids_by_file_name[f"{match_id}.json"].append(message_id)
+        updates_by_file_name[f"{match_id}.json"] = _get_update_of_file_data_extraction_status(
+            fields, True, updated_at, source_etags_by_match_id.get(match_id), content_crc32s_by_match_id.get(match_id)
+        )
+    failed_file_names = _update_dynamodb_entries_for_file_data_extraction_status(table, updates_by_file_name)
+    logger.info(f"Updated {fields} of {len(updates_by_file_name) - len(failed_file_names)} of {len(updates_by_file_name)} DynamoDB entries")
+    return [message_id for file_name in failed_file_names for message_id in message_ids_by_file_name[file_name]]
+
+
+def make_dynamodb_entry_for_file_data_extraction_status(  # pylint: disable=too-many-arguments
+    table, file_name: str, field: str, status: bool, source_etag: Optional[str] = None, content_crc32: Optional[int] = None
+):
     """
     Creates a DynamoDB entry for file data extraction status.
+
+    :param table: DynamoDB table to store the file data extraction status
+    :param file_name: Name of the cricsheet JSON file
+    :param field: Status field to set
+    :param status: Status to set
+    :param source_etag: ETag of the S3 object the file data was extracted from
+    :param content_crc32: CRC32 of the cricsheet JSON file the file data was extracted from
     """
     try:
-        response = table.update_item(
+        table.update_item(
             Key={"file_name": file_name},
-            UpdateExpression=f"set {field} = :val",
-            ExpressionAttributeValues={":val": status},
-            ReturnValues="UPDATED_NEW"
+            **_get_update_of_file_data_extraction_status(
+                [field], status, datetime.datetime.now(datetime.timezone.utc).isoformat(), source_etag, content_crc32
+            )
         )
-        logger.info(f"Updated DynamoDB entry: {response}")
+        logger.info(f"Updated {field} of the DynamoDB entry of {file_name}")
         return
     except ClientError as e:
         logger.error(f"Failed to update DynamoDB entry: {e.response['Error']['Message']}")
         raise
 
 
+def _update_dynamodb_entries_for_file_data_extraction_status(table, updates_by_file_name: Dict[str, Dict[str, Any]]) -> List[str]:
+    """
+    Applies the updates of several DynamoDB entries in transactions, falling back to one update at a time for a failed transaction.
+
+    :param table: DynamoDB table to store the file data extraction status
+    :param updates_by_file_name: UpdateExpression and ExpressionAttributeValues of every entry, keyed by its file name
+    :return: Names of the files whose entries could not be updated
+    """
+    file_names = list(updates_by_file_name)
+    file_names_to_update_one_at_a_time: List[str] = []
+    for index in range(0, len(file_names), DYNAMODB_TRANSACT_WRITE_ITEMS_LIMIT):
+        file_names_of_transaction = file_names[index:index + DYNAMODB_TRANSACT_WRITE_ITEMS_LIMIT]
+        # A transaction costs twice the write capacity of its updates, which is not worth it for a single update
+        if len(file_names_of_transaction) == 1:
+            file_names_to_update_one_at_a_time.extend(file_names_of_transaction)
+            continue
+        try:
+            table.meta.client.transact_write_items(TransactItems=[
+                {"Update": {"TableName": table.name, "Key": {"file_name": file_name}, **updates_by_file_name[file_name]}}
+                for file_name in file_names_of_transaction
+            ])
+        except ClientError as e:
+            logger.warning(
+                f"Failed to update {len(file_names_of_transaction)} DynamoDB entries in a transaction, updating them one at a time: "
+                f"{e.response['Error']['Message']}"
+            )
+            file_names_to_update_one_at_a_time.extend(file_names_of_transaction)
+    failed_file_names: List[str] = []
+    for file_name in file_names_to_update_one_at_a_time:
+        try:
+            table.update_item(Key={"file_name": file_name}, **updates_by_file_name[file_name])
+        except ClientError as e:
+            logger.error(f"Failed to update DynamoDB entry of {file_name}: {e.response['Error']['Message']}")
+            failed_file_names.append(file_name)
+    return failed_file_names
+
+
+def _get_update_of_file_data_extraction_status(
+    fields: List[str], status: bool, updated_at: str, source_etag: Optional[str], content_crc32: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Prepares the update expression which sets the status fields of a file along with the time of the update, the source ETag
+    and the content CRC32.
+
+    :param fields: Status fields to set
+    :param status: Status to set
+    :param updated_at: Time of the update in ISO format, stored as `<field>_updated_at` next to every field
+    :param source_etag: ETag of the S3 object the file data was extracted from, left untouched when not known
+    :param content_crc32: CRC32 of the cricsheet JSON file the file data was extracted from, left untouched when not known
+    :return: UpdateExpression and ExpressionAttributeValues of the update
+    """
+    assignments = [f"{field} = :status, {field}_updated_at = :updated_at" for field in fields]
+    expression_attribute_values: Dict[str, Any] = {":status": status, ":updated_at": updated_at}
+    if source_etag is not None:
+        assignments.append("source_etag = :source_etag")
+        expression_attribute_values[":source_etag"] = source_etag
+    if content_crc32 is not None:
+        assignments.append("content_crc32 = :content_crc32")
+        expression_attribute_values[":content_crc32"] = content_crc32
+    return {"UpdateExpression": f"set {', '.join(assignments)}", "ExpressionAttributeValues": expression_attribute_values}
+
+
 def parse_eventbridge_event_message(function):
     """
     Decorator to parse the EventBridge event and passes the json_file_key and match_id to the decorated handler function.
@@ -98,7 +296,7 @@ def parse_eventbridge_event_message(function):
         logger.info(f"Received event: {event}")
         s3_bucket_name = event["detail"]["bucket"]["name"]
         json_file_key = event["detail"]["object"]["key"]
-        match_id = int(os.path.splitext(os.path.basename(json_file_key))[0])
+        match_id = _get_match_id_from_json_file_key(json_file_key)
         logger.info(f"S3 bucket name: {s3_bucket_name}")
         logger.info(f"JSON file key: {json_file_key}")
         return function(json_file_key, match_id)
@@ -106,14 +304,48 @@ def parse_eventbridge_event_message(function):
     return wrapper
 
 
-def send_alert_via_telegram_bot(chat_id: str,  message: str, telegram_bot_token: str, ) -> None:
+def parse_sqs_batched_eventbridge_event_messages(function):
+    """
+    Decorator to parse a batch of SQS messages carrying EventBridge events. Passes the json_file_key and match_id of every message,
+    keyed by the SQS message ID, to the decorated handler function and reports the failed messages as partial batch failures.
+
+    The decorated handler function has to return the response message along with the list of failed SQS message IDs.
+    """
+    @functools.wraps(function)
+    def wrapper(event, _):
+        records = event.get("Records", [])
+        logger.info(f"Received {len(records)} SQS messages")
+        s3_objects: Dict[str, Tuple[str, int]] = {}
+        failed_message_ids: List[str] = []
+        for record in records:
+            try:
+                eventbridge_event = json.loads(record["body"])
+                json_file_key = eventbridge_event["detail"]["object"]["key"]
+                s3_objects[record["messageId"]] = (json_file_key, _get_match_id_from_json_file_key(json_file_key))
+            except (KeyError, ValueError) as e:
+                logger.error(f"Failed to parse the SQS message {record['messageId']}: {e}")
+                failed_message_ids.append(record["messageId"])
+        logger.info(f"JSON file keys: {[json_file_key for json_file_key, _ in s3_objects.values()]}")
+        message, failed_message_ids_of_handler = function(s3_objects)
+        failed_message_ids.extend(failed_message_ids_of_handler)
+        return {
+            "message": message,
+            "batchItemFailures": [{"itemIdentifier": message_id} for message_id in failed_message_ids]
+        }
+
+    return wrapper
+
+
+def send_alert_via_telegram_bot(chat_id: str,  message: str, telegram_bot_token: str, ) -> bool:
     """
     Sends the statsu of the function execution through an alert to a Telegram chat.
 
     :param telegram_bot_token: Telegram bot token
     :param chat_id: Chat ID
     :param message: Message to send in HTML format
+    :return: Whether the message was sent
     """
+    import requests  # pylint: disable=import-outside-toplevel
     url = f"https://api.telegram.org/bot{telegram_bot_token}/sendMessage"
     payload = {
         "chat_id": chat_id,
@@ -123,3 +355,58 @@ def send_alert_via_telegram_bot(chat_id: str,  message: str, telegram_bot_token:
     response = requests.post(url, json=payload, timeout=10)
     if response.status_code != 200:
         print(f"Failed to send message: {response.text}")
+    return response.status_code == 200
+
+
+def _notify_execution_status(current_time: datetime.datetime, function_name: str, message: str, severity: str) -> None:
+    """
+    Sends the execution status of a handler to Telegram right away, or queues it for the notification digest when the digest
+    is enabled. Critical failures of a handler are always sent right away, and so is a status which could not be queued.
+    A notification which fails is only logged, so that it does not turn the result of the handler into a failure, which
+    would have a processed SQS batch retried.
+
+    :param current_time: Time of the invocation
+    :param function_name: Name of the lambda function
+    :param message: Response message of the invocation
+    :param severity: "success", "failure" when a part of a batch failed, or "critical" when the handler itself failed
+    """
+    try:
+        _send_execution_status(current_time, function_name, message, severity)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.error(f"Failed to notify the execution status of {function_name}: {e}", exc_info=True)
+
+
+def _send_execution_status(current_time: datetime.datetime, function_name: str, message: str, severity: str) -> None:
+    if severity != "critical" and get_environmental_variable_value("ENABLE_TELEGRAM_NOTIFICATION_DIGEST") == "true":
+        try:
+            queue_execution_status_event(
+                queue_url=get_environmental_variable_value("TELEGRAM_NOTIFICATION_QUEUE_URL"),
+                function_name=function_name,
+                timestamp=current_time.strftime("%Y-%m-%d %H:%M:%S"),
+                status="SUCCESS" if severity == "success" else "FAILURE",
+                message=str(message)
+            )
+            return
+        except ClientError as e:
+            logger.error(f"Failed to queue the execution status for the notification digest: {e}")
+    send_alert_via_telegram_bot(
+        chat_id=get_environmental_variable_value("TELEGRAM_CHAT_ID"),
+        message=TELEGRAM_MESSAGE_TEMPLATE.format(
+            current_time.strftime("%d-%m-%Y"),
+            current_time.strftime("%H:%M:%S"),
+            function_name,
+            TELEGRAM_EXECUTION_STATUS_LABELS[severity],
+            message
+        ),
+        telegram_bot_token=get_environmental_variable_value("TELEGRAM_BOT_TOKEN")
+    )
+
+
+def _get_match_id_from_json_file_key(json_file_key: str) -> int:
+    return int(os.path.splitext(os.path.basename(json_file_key))[0])
+
+
+def _get_sqs_message_ids_of_event(args) -> List[str]:
+    if not args or not isinstance(args[0], dict):
+        return []
+    return [record["messageId"] for record in args[0].get("Records", []) if "messageId" in record]
@@ -0,0 +1,64 @@
+import copy
+import json
+import sys
+import zipfile
+import mongomock
+import pandas as pd
+from build.backfill_dataset import backfill_dataset
+from mens_t20i_data_collector._lambdas import client_registry
+from tests.unit.test_cricsheet_match_data_parser import (
+    CRICSHEET_MATCH_JSON_DATA
+)
+
+
+def _write_cricsheet_zip(cricsheet_zip_path):
+    t20i_json_data = copy.deepcopy(CRICSHEET_MATCH_JSON_DATA)
+    t20i_json_data["info"].update({"match_type": "T20", "gender": "male", "team_type": "international"})
+    odi_json_data = copy.deepcopy(t20i_json_data)
+    odi_json_data["info"]["match_type"] = "ODI"
+    with zipfile.ZipFile(cricsheet_zip_path, "w") as cricsheet_zip_file:
+        for match_id in (1001, 1002, 1003):
+            cricsheet_zip_file.writestr(f"{match_id}.json", json.dumps(t20i_json_data))
+        cricsheet_zip_file.writestr("1004.json", json.dumps(odi_json_data))
+
+
+def test_dataset_files_are_written_from_the_mens_t20is_of_the_archive(tmp_path, monkeypatch):
+    cricsheet_zip_path = tmp_path / "t20s_male_json.zip"
+    _write_cricsheet_zip(cricsheet_zip_path)
+    output_folder = tmp_path / "dataset"
+    monkeypatch.setattr(sys, "argv", [
+        "backfill_dataset", "--cricsheet-zip", str(cricsheet_zip_path), "--output-folder", str(output_folder), "--workers", "2", "--matches-per-task", "2"
+    ])
+
+    backfill_dataset()
+
+    matchwise_data = pd.read_csv(output_folder / "matchwise_data.csv")
+    deliverywise_data = pd.read_csv(output_folder / "deliverywise_data.csv")
+    assert sorted(matchwise_data["match_id"]) == [1001, 1002, 1003]
+    assert list(matchwise_data["match_number"]) == [1, 2, 3]
+    assert set(deliverywise_data["match_id"]) == {1001, 1002, 1003}
+    assert list(deliverywise_data.columns)[-1] == "match_number"
+
+
+def test_matches_of_the_archive_are_loaded_into_mongo_db(tmp_path, monkeypatch):
+    cricsheet_zip_path = tmp_path / "t20s_male_json.zip"
+    _write_cricsheet_zip(cricsheet_zip_path)
+    mongo_db_client = mongomock.MongoClient()
+    client_registry.set_client_factory("mongo_db_client", lambda _: mongo_db_client)
+    for variable_name, value in {
+        "MONGO_DB_URL": "mongodb://localhost:27017",
+        "MONGO_DB_NAME": "mens_t20i_dataset",
+        "MATCHWISE_DATA_COLLECTION_NAME": "matchwise_data",
+        "DELIVERYWISE_DATA_COLLECTION_NAME": "deliverywise_data",
+        "MONGO_DB_BULK_WRITE_CHUNK_SIZE": "1000",
+    }.items():
+        monkeypatch.setenv(variable_name, value)
+    monkeypatch.setattr(sys, "argv", ["backfill_dataset", "--cricsheet-zip", str(cricsheet_zip_path), "--workers", "2"])
+
+    try:
+        backfill_dataset()
+    finally:
+        client_registry.reset_client_registry()
+
+    assert sorted(mongo_db_client["mens_t20i_dataset"]["matchwise_data"].distinct("_id")) == [1001, 1002, 1003]
+    assert sorted(mongo_db_client["mens_t20i_dataset"]["deliverywise_data"].distinct("match_id")) == [1001, 1002, 1003]
@@ -0,0 +1,73 @@
+import pytest
+from pymongo.errors import ConnectionFailure
+from mens_t20i_data_collector._lambdas import client_registry
+
+
+class _StandInMongoClient:
+
+    def __init__(self, mongo_db_url):
+        self.mongo_db_url = mongo_db_url
+        self.is_healthy = True
+        self.is_closed = False
+        self.admin = self
+
+    def command(self, command_name):
+        if not self.is_healthy:
+            raise ConnectionFailure(f"{command_name} failed")
+        return {"ok": 1}
+
+    def close(self):
+        self.is_closed = True
+
+
+@pytest.fixture(autouse=True)
+def stand_in_mongo_db_client():
+    client_registry.set_client_factory("mongo_db_client", _StandInMongoClient)
+    yield
+    client_registry.reset_client_registry()
+
+
+def test_clients_are_reused_across_requests():
+    mongo_db_client = client_registry.get_mongo_db_client("mongodb://cluster")
+
+    assert client_registry.get_mongo_db_client("mongodb://cluster") is mongo_db_client
+    assert client_registry.get_mongo_db_client("mongodb://another-cluster") is not mongo_db_client
+
+
+def test_client_failing_its_health_check_is_replaced():
+    mongo_db_client = client_registry.get_mongo_db_client("mongodb://cluster")
+    mongo_db_client.is_healthy = False
+
+    new_mongo_db_client = client_registry.get_mongo_db_client("mongodb://cluster")
+
+    assert new_mongo_db_client is not mongo_db_client
+    assert mongo_db_client.is_closed
+
+
+def test_stand_in_factory_receives_the_arguments_of_the_getter():
+    client_registry.set_client_factory("boto3_client", lambda service_name, max_pool_connections: (service_name, max_pool_connections))
+
+    assert client_registry.get_boto3_client("s3", max_pool_connections=8) == ("s3", 8)
+    with pytest.raises(ValueError):
+        client_registry.set_client_factory("sqs_client", lambda: None)
+
+
+class _IndexRecordingCollection:
+
+    def __init__(self):
+        self.indexes = []
+
+    def create_index(self, keys):
+        self.indexes.append(keys)
+
+
+def test_index_is_created_once_per_execution_environment():
+    collection = _IndexRecordingCollection()
+
+    client_registry.create_mongo_db_index(collection, "match_id")
+    client_registry.create_mongo_db_index(collection, "match_id")
+
+    assert collection.indexes == ["match_id"]
+    client_registry.reset_client_registry()
+    client_registry.create_mongo_db_index(collection, "match_id")
+    assert collection.indexes == ["match_id", "match_id"]
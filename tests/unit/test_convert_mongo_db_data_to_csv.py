@@ -0,0 +1,133 @@
+import boto3
+import mongomock
+import pandas as pd
+import pytest
+from moto import mock_aws
+from mens_t20i_data_collector._lambdas import client_registry
+from mens_t20i_data_collector._lambdas.constants import (
+    DELIVERYWISE_DATAFRAME_COLUMNS
+)
+from mens_t20i_data_collector._lambdas.convert_mongodb_data_to_csv.convert_mongo_db_data_to_csv_lambda import (
+    DatasetPreparationHandler
+)
+
+DOWNLOAD_BUCKET_NAME = "mens-t20i-dataset-test"
+
+
+@pytest.fixture(name="mongo_db")
+def stand_in_mongo_db(monkeypatch):
+    for variable_name, value in {
+        "AWS_DEFAULT_REGION": "us-east-1",
+        "DATASET_EXPORT_MODE": "full",
+        "DATASET_OUTPUT_COMPRESSION": "none",
+        "DELIVERYWISE_DATA_COLLECTION_NAME": "deliverywise_data",
+        "DOWNLOAD_BUCKET_NAME": DOWNLOAD_BUCKET_NAME,
+        "ENABLE_PARQUET_OUTPUT": "false",
+        "MATCHWISE_DATA_COLLECTION_NAME": "matchwise_data",
+        "MONGO_DB_EXPORT_CURSOR_BATCH_SIZE": "2",
+        "MONGO_DB_NAME": "mens_t20i_dataset",
+        "MONGO_DB_URL": "mongodb://localhost:27017",
+    }.items():
+        monkeypatch.setenv(variable_name, value)
+    client_registry.reset_client_registry()
+    mongo_db_client = mongomock.MongoClient()
+    client_registry.set_client_factory("mongo_db_client", lambda _: mongo_db_client)
+    yield mongo_db_client["mens_t20i_dataset"]
+    client_registry.reset_client_registry()
+
+
+def _store_match(mongo_db, match_id, date, batters):
+    mongo_db["matchwise_data"].replace_one({"_id": match_id}, {"_id": match_id, "match_id": match_id, "date": date}, upsert=True)
+    mongo_db["deliverywise_data"].delete_many({"match_id": match_id})
+    mongo_db["deliverywise_data"].insert_many([
+        {**{column: 0 for column in DELIVERYWISE_DATAFRAME_COLUMNS}, "match_id": match_id, "innings_number": 1, "ball_number": ball_number, "batter": batter}
+        for ball_number, batter in enumerate(batters, start=1)
+    ])
+
+
+def _read_published_csv(s3_client, filename):
+    return pd.read_csv(s3_client.get_object(Bucket=DOWNLOAD_BUCKET_NAME, Key=f"output/{filename}")["Body"])
+
+
+def _get_published_csv_lines(s3_client, filename):
+    return s3_client.get_object(Bucket=DOWNLOAD_BUCKET_NAME, Key=f"output/{filename}")["Body"].read().decode("utf-8").splitlines()
+
+
+def _get_batters_by_match_id(deliverywise_data):
+    return {match_id: list(deliveries["batter"]) for match_id, deliveries in deliverywise_data.groupby("match_id", sort=False)}
+
+
+def _publish_dataset_of_matches_1001_and_1002(mongo_db):
+    _store_match(mongo_db, 1001, "2024-01-01", ["A", "A"])
+    _store_match(mongo_db, 1002, "2024-01-03", ["A", "A"])
+    s3_client = boto3.client("s3")
+    s3_client.create_bucket(Bucket=DOWNLOAD_BUCKET_NAME)
+    DatasetPreparationHandler().prepare_dataset()
+    return s3_client
+
+
+def test_deliveries_of_the_new_matches_are_merged_into_the_published_dataset(mongo_db, monkeypatch):
+    with mock_aws():
+        s3_client = _publish_dataset_of_matches_1001_and_1002(mongo_db)
+        # 1003 arrives late with an older date than 1002, and the deliveries of 1001 changed without it being reported as revised
+        _store_match(mongo_db, 1003, "2024-01-02", ["A"])
+        _store_match(mongo_db, 1001, "2024-01-01", ["C", "C"])
+        monkeypatch.setenv("DATASET_EXPORT_MODE", "incremental")
+
+        DatasetPreparationHandler().prepare_dataset()
+
+        matchwise_data = _read_published_csv(s3_client, "matchwise_data.csv")
+        deliverywise_data = _read_published_csv(s3_client, "deliverywise_data.csv")
+    assert list(matchwise_data["match_id"]) == [1001, 1003, 1002]
+    assert list(matchwise_data["match_number"]) == [1, 2, 3]
+    assert _get_batters_by_match_id(deliverywise_data) == {1001: ["A", "A"], 1003: ["A"], 1002: ["A", "A"]}
+    assert list(deliverywise_data["match_number"]) == [1, 1, 2, 3, 3]
+    assert list(deliverywise_data.columns) == DELIVERYWISE_DATAFRAME_COLUMNS + ["match_number"]
+
+
+def test_deliveries_of_the_revised_matches_replace_their_published_rows(mongo_db, monkeypatch):
+    with mock_aws():
+        s3_client = _publish_dataset_of_matches_1001_and_1002(mongo_db)
+        # The revision of 1002 drops one of its deliveries, while 1003 is new and 9999 was never stored
+        _store_match(mongo_db, 1002, "2024-01-03", ["B"])
+        _store_match(mongo_db, 1003, "2024-01-04", ["A"])
+        monkeypatch.setenv("DATASET_EXPORT_MODE", "incremental")
+
+        DatasetPreparationHandler().prepare_dataset(revised_match_ids=[1002, 1003, 9999])
+
+        matchwise_data = _read_published_csv(s3_client, "matchwise_data.csv")
+        deliverywise_data = _read_published_csv(s3_client, "deliverywise_data.csv")
+    assert list(matchwise_data["match_id"]) == [1001, 1002, 1003]
+    assert _get_batters_by_match_id(deliverywise_data) == {1001: ["A", "A"], 1002: ["B"], 1003: ["A"]}
+    assert list(deliverywise_data["match_number"]) == [1, 1, 2, 3]
+
+
+def test_dataset_is_rebuilt_when_no_dataset_is_published_yet(mongo_db, monkeypatch):
+    monkeypatch.setenv("DATASET_EXPORT_MODE", "incremental")
+    _store_match(mongo_db, 1001, "2024-01-01", ["A", "A"])
+
+    with mock_aws():
+        s3_client = boto3.client("s3")
+        s3_client.create_bucket(Bucket=DOWNLOAD_BUCKET_NAME)
+
+        DatasetPreparationHandler().prepare_dataset(revised_match_ids=[1001])
+
+        deliverywise_data = _read_published_csv(s3_client, "deliverywise_data.csv")
+    assert _get_batters_by_match_id(deliverywise_data) == {1001: ["A", "A"]}
+
+
+def test_published_rows_which_look_like_missing_values_are_merged_unchanged(mongo_db, monkeypatch):
+    _store_match(mongo_db, 1001, "2024-01-01", ["NA", "None", "null"])
+    with mock_aws():
+        s3_client = boto3.client("s3")
+        s3_client.create_bucket(Bucket=DOWNLOAD_BUCKET_NAME)
+        DatasetPreparationHandler().prepare_dataset()
+        published_lines = _get_published_csv_lines(s3_client, "deliverywise_data.csv")
+        _store_match(mongo_db, 1002, "2024-01-02", ["A"])
+        monkeypatch.setenv("DATASET_EXPORT_MODE", "incremental")
+
+        DatasetPreparationHandler().prepare_dataset()
+
+        merged_lines = _get_published_csv_lines(s3_client, "deliverywise_data.csv")
+    assert merged_lines[:len(published_lines)] == published_lines
+    assert len(merged_lines) == len(published_lines) + 1
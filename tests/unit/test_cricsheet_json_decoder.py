@@ -0,0 +1,33 @@
+import json
+from pathlib import Path
+import pytest
+from mens_t20i_data_collector._lambdas.cricsheet_json_decoder import (
+    get_cricsheet_json_decoder
+)
+from mens_t20i_data_collector._lambdas.cricsheet_match_data_parser import (
+    CricsheetMatchDataParser
+)
+
+CRICSHEET_MATCH_FIXTURES = sorted(Path("tests/fixtures/cricsheet_matches").glob("*.json"))
+
+
+def _parse(json_data):
+    cricsheet_match_data_parser = CricsheetMatchDataParser(json_data, 1)
+    cricsheet_match_data_parser.parse_innings()
+    return cricsheet_match_data_parser.get_match_data(), cricsheet_match_data_parser.delivery_data_accumulator.to_mongo_documents()
+
+
+@pytest.mark.parametrize("decoder_name", ["fast", "typed"])
+@pytest.mark.parametrize("fixture_path", CRICSHEET_MATCH_FIXTURES, ids=lambda fixture_path: fixture_path.stem)
+def test_every_decoder_extracts_the_same_data_as_the_json_module(decoder_name, fixture_path):
+    fixture_content = fixture_path.read_bytes()
+
+    json_data = get_cricsheet_json_decoder(decoder_name)(fixture_content)
+
+    assert _parse(json_data) == _parse(json.loads(fixture_content))
+    assert json_data["info"]["match_type"] == "T20"
+
+
+def test_unknown_decoder_is_rejected():
+    with pytest.raises(ValueError):
+        get_cricsheet_json_decoder("simdjson")
@@ -0,0 +1,65 @@
+from mens_t20i_data_collector._lambdas.cricsheet_match_data_parser import (
+    CricsheetMatchDataParser
+)
+
+
+def _delivery(batter, total_runs, extras=None, wickets=None):
+    delivery = {
+        "batter": batter,
+        "bowler": "MA Starc",
+        "non_striker": "RG Sharma",
+        "runs": {"batter": total_runs - sum((extras or {}).values()), "extras": sum((extras or {}).values()), "total": total_runs},
+    }
+    if extras:
+        delivery["extras"] = extras
+    if wickets:
+        delivery["wickets"] = wickets
+    return delivery
+
+
+CRICSHEET_MATCH_JSON_DATA = {
+    "info": {
+        "teams": ["India", "Australia"],
+        "match_type_number": 2001,
+        "dates": ["2024-06-24"],
+        "event": {"name": "ICC Men's T20 World Cup"},
+        "venue": "Daren Sammy National Cricket Stadium",
+        "city": "Gros Islet",
+        "toss": {"winner": "Australia", "decision": "field"},
+        "outcome": {"winner": "India", "by": {"runs": 24}},
+        "player_of_match": ["RG Sharma"],
+    },
+    "innings": [
+        {"team": "India", "overs": [{"over": 0, "deliveries": [_delivery("RG Sharma", 6), _delivery("RG Sharma", 1, extras={"wides": 1})]}]},
+        {"team": "Australia", "overs": [{"over": 0, "deliveries": [
+            _delivery("TM Head", 0, wickets=[{"player_out": "TM Head", "kind": "caught", "fielders": [{"name": "JJ Bumrah"}]}])
+        ]}]},
+        {"team": "India", "super_over": True, "overs": [{"over": 0, "deliveries": [_delivery("V Kohli", 4)]}]},
+    ],
+}
+
+
+def test_single_pass_produces_deliveries_and_match_data():
+    parser = CricsheetMatchDataParser(CRICSHEET_MATCH_JSON_DATA, 1234)
+    parser.parse_innings()
+
+    delivery_documents = parser.delivery_data_accumulator.to_mongo_documents()
+    match_data = parser.get_match_data()
+
+    assert [document["innings_number"] for document in delivery_documents] == [1, 1, 2, 3]
+    assert [document["bowling_team"] for document in delivery_documents] == ["Australia", "Australia", "India", "Australia"]
+    assert [document["wide_runs"] for document in delivery_documents] == [0, 1, 0, 0]
+    assert [document["fielder_name"] for document in delivery_documents] == [None, None, "JJ Bumrah", None]
+    assert match_data["index"] == 2001
+    assert match_data["team_1_total_runs"] == 11
+    assert match_data["team_2_total_runs"] == 0
+    assert match_data["winner"] == "India"
+    assert match_data["margin_runs"] == 24
+
+
+def test_matchwise_only_parse_skips_deliveries():
+    parser = CricsheetMatchDataParser(CRICSHEET_MATCH_JSON_DATA, 1234)
+    parser.parse_innings(collect_deliveries=False)
+
+    assert len(parser.delivery_data_accumulator) == 0
+    assert parser.get_match_data()["team_1_total_runs"] == 11
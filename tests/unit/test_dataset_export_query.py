@@ -0,0 +1,86 @@
+import mongomock
+from mens_t20i_data_collector._lambdas.constants import (
+    DELIVERYWISE_DATAFRAME_COLUMNS
+)
+from mens_t20i_data_collector._lambdas.dataset_export_query import (
+    DatasetExportQuery
+)
+
+
+class _RecordingMongoCollection:
+
+    """Wrapper of a MongoDB collection, which records the batch size of its cursors and the documents they return."""
+
+    def __init__(self, collection):
+        self._collection = collection
+        self.batch_sizes = []
+        self.found_documents = []
+
+    def find(self, *args):
+        return _RecordingMongoCursor(self._collection.find(*args), self)
+
+
+class _RecordingMongoCursor:
+
+    def __init__(self, cursor, recording_collection):
+        self._cursor = cursor
+        self._recording_collection = recording_collection
+
+    def __iter__(self):
+        for document in self._cursor:
+            self._recording_collection.found_documents.append(document)
+            yield document
+
+    def batch_size(self, batch_size):
+        self._recording_collection.batch_sizes.append(batch_size)
+        self._cursor.batch_size(batch_size)
+        return self
+
+
+def _get_mongo_db():
+    mongo_db = mongomock.MongoClient()["mens_t20i_dataset"]
+    mongo_db["matchwise_data"].insert_many([
+        {"_id": 1001, "match_id": 1001, "date": "2024-01-01"},
+        {"_id": 1002, "match_id": 1002, "date": "2024-01-02"},
+    ])
+    # The first match was abandoned without a ball bowled, so it has no deliveries
+    mongo_db["deliverywise_data"].insert_many([
+        {**{column: 0 for column in DELIVERYWISE_DATAFRAME_COLUMNS}, "match_id": 1002, "innings_number": 1, "ball_number": ball_number}
+        for ball_number in (1, 2)
+    ])
+    return mongo_db
+
+
+def _get_dataset_export_query():
+    mongo_db = _get_mongo_db()
+    return DatasetExportQuery(mongo_db["matchwise_data"], mongo_db["deliverywise_data"], cursor_batch_size=100)
+
+
+def test_chunk_of_a_match_without_deliveries_has_the_deliverywise_columns():
+    chunks = list(_get_dataset_export_query().iterate_deliverywise_data_in_chunks(matches_per_chunk=1))
+
+    assert [len(chunk) for chunk in chunks] == [0, 2]
+    assert list(chunks[0].columns) == DELIVERYWISE_DATAFRAME_COLUMNS + ["match_number"]
+    assert list(chunks[1]["match_number"]) == [2, 2]
+
+
+def test_deliveries_of_a_match_without_deliveries_have_the_deliverywise_columns():
+    deliverywise_data = _get_dataset_export_query().get_deliverywise_data_of_matches([1001])
+
+    assert deliverywise_data.empty
+    assert list(deliverywise_data.columns) == DELIVERYWISE_DATAFRAME_COLUMNS
+
+
+def test_cursors_fetch_only_the_fields_of_the_dataset_with_the_given_batch_size():
+    mongo_db = _get_mongo_db()
+    mongo_db["deliverywise_data"].update_many({}, {"$set": {"composite_delivery_key": "(1002, 1, 0, 1)"}})
+    matchwise_data_mongo_collection = _RecordingMongoCollection(mongo_db["matchwise_data"])
+    deliverywise_data_mongo_collection = _RecordingMongoCollection(mongo_db["deliverywise_data"])
+    dataset_export_query = DatasetExportQuery(matchwise_data_mongo_collection, deliverywise_data_mongo_collection, cursor_batch_size=7)
+
+    assert len(dataset_export_query.matchwise_data) == 2
+    assert len(dataset_export_query.get_deliverywise_data_of_matches([1002])) == 2
+
+    assert matchwise_data_mongo_collection.batch_sizes == deliverywise_data_mongo_collection.batch_sizes == [7]
+    assert all("_id" not in document for document in matchwise_data_mongo_collection.found_documents)
+    assert [set(document) for document in deliverywise_data_mongo_collection.found_documents] == [set(DELIVERYWISE_DATAFRAME_COLUMNS)] * 2
@@ -0,0 +1,48 @@
+import gzip
+import pytest
+import zstandard
+from mens_t20i_data_collector._lambdas.dataset_output_compressor import (
+    DatasetOutputCompressor,
+    get_dataset_output_file_name
+)
+
+CSV_CONTENT = b"match_id,batter\n1001,NA\n1001,None\n" * 1000
+
+
+def _compress_in_chunks(codec, chunk_size=4096):
+    compressor = DatasetOutputCompressor(codec)
+    compressed_chunks = [compressor.compress(CSV_CONTENT[start:start + chunk_size]) for start in range(0, len(CSV_CONTENT), chunk_size)]
+    return compressor, b"".join(compressed_chunks) + compressor.flush()
+
+
+@pytest.mark.parametrize("codec, decompress, content_type", [
+    ("gzip", gzip.decompress, "application/gzip"),
+    ("zstd", lambda data: zstandard.ZstdDecompressor().decompressobj().decompress(data), "application/zstd"),
+])
+def test_compressed_output_round_trips_and_is_typed_as_an_archive(codec, decompress, content_type):
+    compressor, compressed_content = _compress_in_chunks(codec)
+
+    assert len(compressed_content) < len(CSV_CONTENT)
+    assert decompress(compressed_content) == CSV_CONTENT
+    assert compressor.s3_extra_args == {"ContentType": content_type}
+
+
+def test_uncompressed_output_is_passed_through():
+    compressor, content = _compress_in_chunks("none")
+
+    assert content == CSV_CONTENT
+    assert not compressor.s3_extra_args
+
+
+@pytest.mark.parametrize("codec, file_name", [
+    ("gzip", "deliverywise_data.csv.gz"),
+    ("none", "deliverywise_data.csv"),
+    ("zstd", "deliverywise_data.csv.zst"),
+])
+def test_file_name_carries_the_extension_of_the_codec(codec, file_name):
+    assert get_dataset_output_file_name("deliverywise_data.csv", codec) == file_name
+
+
+def test_unsupported_codec_is_rejected():
+    with pytest.raises(ValueError):
+        DatasetOutputCompressor("bzip2")
@@ -0,0 +1,54 @@
+from mens_t20i_data_collector._lambdas.constants import (
+    COMPOSITE_DELIVERY_KEY_COLUMNS,
+    DELIVERYWISE_DATAFRAME_COLUMNS
+)
+from mens_t20i_data_collector._lambdas.delivery_data_accumulator import (
+    DeliveryDataAccumulator
+)
+
+
+def _delivery_record(innings_number, over_number, ball_number, player_dismissed=None):
+    record = {column: 0 for column in DELIVERYWISE_DATAFRAME_COLUMNS}
+    record.update({
+        "match_id": 1234,
+        "innings_number": innings_number,
+        "batting_team": "India",
+        "bowling_team": "Australia",
+        "over_number": over_number,
+        "ball_number": ball_number,
+        "batter": "V Kohli",
+        "bowler": "MA Starc",
+        "non_striker": "RG Sharma",
+        "player_dismissed": player_dismissed,
+        "dismissal_type": None,
+        "fielder_name": None,
+    })
+    return record
+
+
+def test_accumulator_builds_mongo_documents_identified_by_the_composite_delivery_key():
+    accumulator = DeliveryDataAccumulator()
+    accumulator.append(_delivery_record(1, 0, 1))
+    accumulator.append(_delivery_record(2, 19, 6, player_dismissed="V Kohli"))
+
+    documents = accumulator.to_mongo_documents()
+
+    assert len(accumulator) == 2
+    assert [list(document) for document in documents] == [DELIVERYWISE_DATAFRAME_COLUMNS + ["composite_delivery_key", "_id"]] * 2
+    assert [document["player_dismissed"] for document in documents] == [None, "V Kohli"]
+    expected_keys = [str(tuple(document[column] for column in COMPOSITE_DELIVERY_KEY_COLUMNS)) for document in documents]
+    assert [document["composite_delivery_key"] for document in documents] == expected_keys == ["(1234, 1, 0, 1)", "(1234, 2, 19, 6)"]
+    assert [document["_id"] for document in documents] == expected_keys
+
+
+def test_integer_columns_of_the_mongo_documents_are_python_integers():
+    accumulator = DeliveryDataAccumulator()
+    accumulator.append(_delivery_record(1, 0, 1))
+
+    document = accumulator.to_mongo_documents()[0]
+
+    assert all(isinstance(document[column], int) for column in ["match_id", "innings_number", "over_number", "ball_number"])
+
+
+def test_empty_accumulator_has_no_mongo_documents():
+    assert not DeliveryDataAccumulator().to_mongo_documents()
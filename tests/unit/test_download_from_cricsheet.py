@@ -0,0 +1,327 @@
+import io
+import json
+import os
+import zipfile
+import zlib
+from datetime import datetime, timedelta, timezone
+import boto3
+import pytest
+import requests
+from moto import mock_aws
+from mens_t20i_data_collector._lambdas.constants import (
+    CRICSHEET_DATA_DOWNLOAD_STATE_FILE_NAME,
+    CRICSHEET_DATA_DOWNLOADING_URL,
+    CRICSHEET_DATA_S3_FOLDER_NAME,
+    CRICSHEET_RECENTLY_ADDED_DATA_DOWNLOADING_URL,
+    MENS_T20I_MATCH_INFO
+)
+from mens_t20i_data_collector._lambdas.download_from_cricsheet import (
+    download_from_cricsheet_lambda_function
+)
+from mens_t20i_data_collector._lambdas.download_from_cricsheet.download_from_cricsheet_lambda_function import (
+    DownloadDataFromCricsheetHandler
+)
+from mens_t20i_data_collector._lambdas.processed_files_manifest import (
+    ProcessedFilesManifest
+)
+
+DOWNLOAD_BUCKET_NAME = "mens-t20i-dataset-test"
+DOWNLOAD_STATE_S3_KEY = f"{CRICSHEET_DATA_S3_FOLDER_NAME}/{CRICSHEET_DATA_DOWNLOAD_STATE_FILE_NAME}"
+DYNAMODB_TABLE_NAME = "cricsheet_json_file_data_extraction_status_table"
+
+
+class _StandInCricsheetResponse:
+
+    def __init__(self, status_code, content=b"", headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self._content = content
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        return False
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error")
+
+    def iter_content(self, chunk_size):
+        for offset in range(0, len(self._content), chunk_size):
+            yield self._content[offset:offset + chunk_size]
+
+
+class _StandInCricsheet:
+
+    """Stand-in of the downloads of Cricsheet, which records the requests and serves the same response to all of them."""
+
+    def __init__(self, response):
+        self.response = response
+        self.requests = []
+
+    def get(self, url, headers, stream, timeout):  # pylint: disable=unused-argument
+        self.requests.append((url, headers))
+        return self.response
+
+
+def _get_file_content(match_id, revision=0, **match_info):
+    return json.dumps({"info": {"match_type_number": match_id, "revision": revision, **match_info}}).encode("utf-8")
+
+
+def _get_zip_file_content(file_contents):
+    zip_file_content = io.BytesIO()
+    with zipfile.ZipFile(zip_file_content, "w") as zip_file:
+        for file, file_content in file_contents.items():
+            zip_file.writestr(file, file_content)
+    return zip_file_content.getvalue()
+
+
+def _set_environment_variables(monkeypatch, **variables):
+    for variable_name, value in {
+        "AWS_DEFAULT_REGION": "us-east-1",
+        "CRICSHEET_DATA_DOWNLOAD_MODE": "full",
+        "CRICSHEET_DATA_UPLOAD_MODE": "individual",
+        "DOWNLOAD_BUCKET_NAME": DOWNLOAD_BUCKET_NAME,
+        "DYNAMODB_TABLE_NAME": DYNAMODB_TABLE_NAME,
+        "S3_UPLOAD_CONCURRENCY": "2",
+        "THRESHOLD_FOR_NUMBER_OF_FILES_TO_BE_SENT_FOR_PROCESSING": "10",
+        **variables,
+    }.items():
+        monkeypatch.setenv(variable_name, value)
+
+
+def _create_aws_resources(monkeypatch):
+    """
+    Creates the bucket, the table and the queue used by the download lambda, which must be called within mock_aws.
+    """
+    s3_client = boto3.client("s3")
+    s3_client.create_bucket(Bucket=DOWNLOAD_BUCKET_NAME)
+    table = boto3.resource("dynamodb").create_table(
+        TableName=DYNAMODB_TABLE_NAME,
+        KeySchema=[{"AttributeName": "file_name", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "file_name", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    monkeypatch.setenv("DELAYED_SQS_QUEUE_URL", boto3.client("sqs").create_queue(QueueName="delayed-queue")["QueueUrl"])
+    return s3_client, table
+
+
+def _get_download_state(s3_client):
+    try:
+        return json.loads(s3_client.get_object(Bucket=DOWNLOAD_BUCKET_NAME, Key=DOWNLOAD_STATE_S3_KEY)["Body"].read())
+    except s3_client.exceptions.NoSuchKey:
+        return None
+
+
+def _download_and_send_new_files_for_processing(monkeypatch, tmp_path, stand_in_cricsheet):
+    monkeypatch.setattr(requests, "get", stand_in_cricsheet.get)
+    downloader = DownloadDataFromCricsheetHandler()
+    downloader._temp_folder = str(tmp_path)  # pylint: disable=protected-access
+    zip_file_path = downloader.download_data_from_cricsheet()
+    downloader.upload_new_json_data_files_for_data_processing(zip_file_path)
+    downloader.store_download_state()
+
+
+def test_only_the_new_and_the_revised_files_of_the_archive_are_sent_for_processing(tmp_path, monkeypatch):
+    _set_environment_variables(monkeypatch)
+    cricsheet_zip_path = tmp_path / "t20s_male_json.zip"
+    with zipfile.ZipFile(cricsheet_zip_path, "w") as cricsheet_zip_file:
+        cricsheet_zip_file.writestr("1001.json", _get_file_content(1001, revision=1))
+        cricsheet_zip_file.writestr("1002.json", _get_file_content(1002))
+        cricsheet_zip_file.writestr("1003.json", _get_file_content(1003))
+        cricsheet_zip_file.writestr("1004.json", _get_file_content(1004, revision=1))
+        cricsheet_zip_file.writestr("1005.json", _get_file_content(1005))
+
+    with mock_aws():
+        s3_client, table = _create_aws_resources(monkeypatch)
+        # 1001 is in the manifest with the CRC32 of its previous revision, 1002 was processed with its current content
+        # since the manifest was saved, 1003 was processed before the content CRC32 was recorded and 1004 was revised
+        manifest = ProcessedFilesManifest(s3_client, DOWNLOAD_BUCKET_NAME)
+        manifest.add({"1001.json": zlib.crc32(_get_file_content(1001))})
+        manifest.save()
+        table.put_item(Item={"file_name": "1002.json", "content_crc32": zlib.crc32(_get_file_content(1002))})
+        table.put_item(Item={"file_name": "1003.json"})
+        table.put_item(Item={"file_name": "1004.json", "content_crc32": zlib.crc32(_get_file_content(1004))})
+
+        downloader = DownloadDataFromCricsheetHandler()
+        with zipfile.ZipFile(cricsheet_zip_path) as cricsheet_zip_file:
+            new_files, revised_files = downloader._seggregate_new_and_revised_files_from_downloaded_zip(  # pylint: disable=protected-access
+                cricsheet_zip_file
+            )
+
+        assert new_files == ["1005.json"]
+        assert revised_files == ["1001.json", "1004.json"]
+        manifest.load()
+        assert manifest.get_content_crc32("1002.json") == zlib.crc32(_get_file_content(1002))
+        assert manifest.get_content_crc32("1003.json") == zlib.crc32(_get_file_content(1003))
+        assert manifest.get_content_crc32("1001.json") == zlib.crc32(_get_file_content(1001))
+
+
+def test_archive_not_modified_since_the_previous_download_is_not_processed(monkeypatch):
+    _set_environment_variables(monkeypatch)
+    stand_in_cricsheet = _StandInCricsheet(_StandInCricsheetResponse(304))
+    monkeypatch.setattr(requests, "get", stand_in_cricsheet.get)
+    # The files of the archive must not be looked at, so sending them for processing would fail
+    monkeypatch.setattr(DownloadDataFromCricsheetHandler, "upload_new_json_data_files_for_data_processing", None)
+    monkeypatch.setattr(download_from_cricsheet_lambda_function.logging, "shutdown", lambda: None)
+
+    with mock_aws():
+        s3_client, _ = _create_aws_resources(monkeypatch)
+        s3_client.put_object(Bucket=DOWNLOAD_BUCKET_NAME, Key=DOWNLOAD_STATE_S3_KEY, Body=json.dumps({
+            "last_successful_download_time": "2024-01-01T00:00:00+00:00",
+            "download_validators": {CRICSHEET_DATA_DOWNLOADING_URL: {"ETag": '"archive-1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}},
+        }))
+
+        output = download_from_cricsheet_lambda_function.handler.__wrapped__(None, None)
+
+        assert output == "No changes in Cricsheet data since the previous download"
+        assert stand_in_cricsheet.requests == [
+            (CRICSHEET_DATA_DOWNLOADING_URL, {"If-None-Match": '"archive-1"', "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"})
+        ]
+        download_state = _get_download_state(s3_client)
+        assert download_state["last_successful_download_time"] > "2024-01-01T00:00:00+00:00"
+        assert download_state["download_validators"][CRICSHEET_DATA_DOWNLOADING_URL]["ETag"] == '"archive-1"'
+
+
+def test_download_state_is_not_stored_while_new_files_are_pending_for_processing(tmp_path, monkeypatch):
+    _set_environment_variables(monkeypatch, THRESHOLD_FOR_NUMBER_OF_FILES_TO_BE_SENT_FOR_PROCESSING="2")
+    stand_in_cricsheet = _StandInCricsheet(_StandInCricsheetResponse(
+        200, _get_zip_file_content({f"{match_id}.json": _get_file_content(match_id) for match_id in (1001, 1002, 1003)}), {"ETag": '"archive-2"'}
+    ))
+
+    with mock_aws():
+        s3_client, _ = _create_aws_resources(monkeypatch)
+
+        _download_and_send_new_files_for_processing(monkeypatch, tmp_path, stand_in_cricsheet)
+
+        assert s3_client.list_objects_v2(Bucket=DOWNLOAD_BUCKET_NAME, Prefix="cricsheet_data/processed_data/")["KeyCount"] == 2
+        assert _get_download_state(s3_client) is None
+
+
+def test_download_state_is_stored_once_every_new_file_is_sent_for_processing(tmp_path, monkeypatch):
+    _set_environment_variables(monkeypatch)
+    stand_in_cricsheet = _StandInCricsheet(_StandInCricsheetResponse(
+        200, _get_zip_file_content({f"{match_id}.json": _get_file_content(match_id) for match_id in (1001, 1002, 1003)}), {"ETag": '"archive-2"'}
+    ))
+
+    with mock_aws():
+        s3_client, _ = _create_aws_resources(monkeypatch)
+
+        _download_and_send_new_files_for_processing(monkeypatch, tmp_path, stand_in_cricsheet)
+
+        assert s3_client.list_objects_v2(Bucket=DOWNLOAD_BUCKET_NAME, Prefix="cricsheet_data/processed_data/")["KeyCount"] == 3
+        download_state = _get_download_state(s3_client)
+        assert "last_successful_download_time" in download_state
+        assert download_state["download_validators"] == {CRICSHEET_DATA_DOWNLOADING_URL: {"ETag": '"archive-2"'}}
+
+
+def test_every_new_file_is_uploaded_and_sent_for_processing_by_the_upload_threads(monkeypatch):
+    _set_environment_variables(monkeypatch, S3_UPLOAD_CONCURRENCY="4", THRESHOLD_FOR_NUMBER_OF_FILES_TO_BE_SENT_FOR_PROCESSING="100")
+    file_contents = {f"{match_id}.json": _get_file_content(match_id) for match_id in range(1001, 1026)}
+    monkeypatch.setattr(requests, "get", _StandInCricsheet(_StandInCricsheetResponse(200, _get_zip_file_content(file_contents))).get)
+    monkeypatch.setattr(download_from_cricsheet_lambda_function.logging, "shutdown", lambda: None)
+
+    with mock_aws():
+        s3_client, _ = _create_aws_resources(monkeypatch)
+
+        output = download_from_cricsheet_lambda_function.handler.__wrapped__(None, None)
+
+        assert output == "Data file has been downloaded and placed successfully for processing"
+        uploaded_file_contents = {
+            os.path.basename(uploaded_object["Key"]): s3_client.get_object(Bucket=DOWNLOAD_BUCKET_NAME, Key=uploaded_object["Key"])["Body"].read()
+            for uploaded_object in s3_client.list_objects_v2(Bucket=DOWNLOAD_BUCKET_NAME, Prefix="cricsheet_data/processed_data/")["Contents"]
+        }
+        assert uploaded_file_contents == file_contents
+        sqs_messages = boto3.client("sqs").receive_message(QueueUrl=os.environ["DELAYED_SQS_QUEUE_URL"], MaxNumberOfMessages=10)["Messages"]
+        assert len(sqs_messages) == 1
+        assert json.loads(sqs_messages[0]["Body"])["new_files"] == list(file_contents)
+        assert json.loads(sqs_messages[0]["Body"])["revised_files"] == []
+
+
+@pytest.mark.parametrize("time_since_last_successful_download, cricsheet_url", [
+    (timedelta(hours=12), CRICSHEET_RECENTLY_ADDED_DATA_DOWNLOADING_URL.format(number_of_days=2)),
+    (timedelta(days=3), CRICSHEET_RECENTLY_ADDED_DATA_DOWNLOADING_URL.format(number_of_days=7)),
+    (timedelta(days=6, hours=12), CRICSHEET_RECENTLY_ADDED_DATA_DOWNLOADING_URL.format(number_of_days=30)),
+    (timedelta(days=28), CRICSHEET_RECENTLY_ADDED_DATA_DOWNLOADING_URL.format(number_of_days=30)),
+    (timedelta(days=29, hours=12), CRICSHEET_DATA_DOWNLOADING_URL),
+    (None, CRICSHEET_DATA_DOWNLOADING_URL),
+])
+def test_smallest_archive_covering_the_time_since_the_last_successful_download_is_downloaded(
+    monkeypatch, time_since_last_successful_download, cricsheet_url
+):
+    _set_environment_variables(monkeypatch, CRICSHEET_DATA_DOWNLOAD_MODE="incremental")
+    stand_in_cricsheet = _StandInCricsheet(_StandInCricsheetResponse(304))
+    monkeypatch.setattr(requests, "get", stand_in_cricsheet.get)
+
+    with mock_aws():
+        s3_client, _ = _create_aws_resources(monkeypatch)
+        if time_since_last_successful_download is not None:
+            s3_client.put_object(Bucket=DOWNLOAD_BUCKET_NAME, Key=DOWNLOAD_STATE_S3_KEY, Body=json.dumps({
+                "last_successful_download_time": (datetime.now(timezone.utc) - time_since_last_successful_download).isoformat()
+            }))
+
+        DownloadDataFromCricsheetHandler().download_data_from_cricsheet()
+
+    assert [url for url, _ in stand_in_cricsheet.requests] == [cricsheet_url]
+
+
+def test_only_the_mens_t20is_of_an_archive_of_recently_added_matches_are_sent_for_processing(tmp_path, monkeypatch):
+    _set_environment_variables(monkeypatch, CRICSHEET_DATA_DOWNLOAD_MODE="incremental")
+    stand_in_cricsheet = _StandInCricsheet(_StandInCricsheetResponse(200, _get_zip_file_content({
+        "1001.json": _get_file_content(1001, **MENS_T20I_MATCH_INFO),
+        "1002.json": _get_file_content(1002, **{**MENS_T20I_MATCH_INFO, "match_type": "ODI"}),
+        "1003.json": _get_file_content(1003, **{**MENS_T20I_MATCH_INFO, "gender": "female"}),
+        "1004.json": _get_file_content(1004, **{**MENS_T20I_MATCH_INFO, "team_type": "club"}),
+    })))
+
+    with mock_aws():
+        s3_client, _ = _create_aws_resources(monkeypatch)
+        s3_client.put_object(Bucket=DOWNLOAD_BUCKET_NAME, Key=DOWNLOAD_STATE_S3_KEY, Body=json.dumps({
+            "last_successful_download_time": (datetime.now(timezone.utc) - timedelta(hours=12)).isoformat()
+        }))
+
+        _download_and_send_new_files_for_processing(monkeypatch, tmp_path, stand_in_cricsheet)
+
+        uploaded_objects = s3_client.list_objects_v2(Bucket=DOWNLOAD_BUCKET_NAME, Prefix="cricsheet_data/processed_data/")["Contents"]
+        assert [uploaded_object["Key"] for uploaded_object in uploaded_objects] == ["cricsheet_data/processed_data/1001.json"]
+        sqs_messages = boto3.client("sqs").receive_message(QueueUrl=os.environ["DELAYED_SQS_QUEUE_URL"])["Messages"]
+        assert json.loads(sqs_messages[0]["Body"])["new_files"] == ["1001.json"]
+    assert stand_in_cricsheet.requests[0][0] == CRICSHEET_RECENTLY_ADDED_DATA_DOWNLOADING_URL.format(number_of_days=2)
+
+
+def test_files_of_an_archive_of_recently_added_matches_which_are_not_mens_t20is_are_parsed_once(tmp_path, monkeypatch):
+    _set_environment_variables(monkeypatch, CRICSHEET_DATA_DOWNLOAD_MODE="incremental")
+    file_contents = {
+        "1001.json": _get_file_content(1001, **MENS_T20I_MATCH_INFO),
+        "1002.json": _get_file_content(1002, **{**MENS_T20I_MATCH_INFO, "match_type": "ODI"}),
+        "1003.json": _get_file_content(1003, **{**MENS_T20I_MATCH_INFO, "gender": "female"}),
+    }
+    stand_in_cricsheet = _StandInCricsheet(_StandInCricsheetResponse(200, _get_zip_file_content(file_contents)))
+    parsed_files = []
+    is_mens_t20i_match = DownloadDataFromCricsheetHandler._is_mens_t20i_match  # pylint: disable=protected-access
+
+    def _record_parsed_file(downloader, zip_file_content, member):
+        parsed_files.append(member.filename)
+        return is_mens_t20i_match(downloader, zip_file_content, member)
+
+    monkeypatch.setattr(DownloadDataFromCricsheetHandler, "_is_mens_t20i_match", _record_parsed_file)
+
+    with mock_aws():
+        s3_client, _ = _create_aws_resources(monkeypatch)
+        s3_client.put_object(Bucket=DOWNLOAD_BUCKET_NAME, Key=DOWNLOAD_STATE_S3_KEY, Body=json.dumps({
+            "last_successful_download_time": (datetime.now(timezone.utc) - timedelta(hours=12)).isoformat()
+        }))
+        _download_and_send_new_files_for_processing(monkeypatch, tmp_path, stand_in_cricsheet)
+        assert parsed_files == ["1001.json", "1002.json", "1003.json"]
+        parsed_files.clear()
+        # 1001 is not processed yet, and Cricsheet revises 1002 in the meantime
+        stand_in_cricsheet.response = _StandInCricsheetResponse(200, _get_zip_file_content({
+            **file_contents, "1002.json": _get_file_content(1002, revision=1, **{**MENS_T20I_MATCH_INFO, "match_type": "ODI"})
+        }))
+
+        _download_and_send_new_files_for_processing(monkeypatch, tmp_path, stand_in_cricsheet)
+
+        assert parsed_files == ["1001.json", "1002.json"]
+        uploaded_objects = s3_client.list_objects_v2(Bucket=DOWNLOAD_BUCKET_NAME, Prefix="cricsheet_data/processed_data/")["Contents"]
+        assert [uploaded_object["Key"] for uploaded_object in uploaded_objects] == ["cricsheet_data/processed_data/1001.json"]
@@ -0,0 +1,30 @@
+import requests
+from mens_t20i_data_collector._lambdas import utils
+from mens_t20i_data_collector._lambdas.utils import exception_handler
+
+
+def _set_environment_variables(monkeypatch, **variables):
+    for variable_name, value in {
+        "ENABLE_TELEGRAM_NOTIFICATION_DIGEST": "false",
+        "TELEGRAM_BOT_TOKEN": "bot-token",
+        "TELEGRAM_CHAT_ID": "chat-id",
+        **variables,
+    }.items():
+        monkeypatch.setenv(variable_name, value)
+
+
+def test_failed_notification_does_not_fail_the_handler(monkeypatch):
+    _set_environment_variables(monkeypatch)
+
+    def send_alert_via_telegram_bot(**_):
+        raise requests.ConnectionError("Telegram is unreachable")
+
+    monkeypatch.setattr(utils, "send_alert_via_telegram_bot", send_alert_via_telegram_bot)
+
+    @exception_handler
+    def handler(_, __):
+        return {"message": "1 of 2 matches extracted", "batchItemFailures": [{"itemIdentifier": "b"}]}
+
+    response = handler({"Records": [{"messageId": "a"}, {"messageId": "b"}]}, None)
+
+    assert response == {"statusCode": 200, "body": "1 of 2 matches extracted", "batchItemFailures": [{"itemIdentifier": "b"}]}
@@ -0,0 +1,48 @@
+import json
+from mens_t20i_data_collector._lambdas.execution_metrics import (
+    emit_invocation_metrics,
+    record_metric,
+    reset_invocation_metrics,
+    timed_span
+)
+
+
+def _get_emitted_log_lines(capsys):
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+
+def test_metrics_of_an_invocation_are_emitted_in_the_embedded_metric_format(capsys):
+    reset_invocation_metrics()
+    with timed_span("S3Get"):
+        pass
+    record_metric("BytesRead", 2048, "Bytes")
+
+    emit_invocation_metrics("extract_deliverywise_cricsheet_data", 12.5, batch_item_failures=0)
+
+    [log_line] = _get_emitted_log_lines(capsys)
+    [directive] = log_line["_aws"]["CloudWatchMetrics"]
+    assert directive["Dimensions"] == [["FunctionName"]]
+    assert {"Name": "BytesRead", "Unit": "Bytes"} in directive["Metrics"]
+    assert {"Name": "S3GetDuration", "Unit": "Milliseconds"} in directive["Metrics"]
+    assert log_line["FunctionName"] == "extract_deliverywise_cricsheet_data"
+    assert log_line["BytesRead"] == 2048
+    assert log_line["InvocationDuration"] == 12.5
+    assert log_line["BatchItemFailures"] == 0
+    assert log_line["S3GetDuration"] >= 0
+
+
+def test_values_of_a_busy_invocation_are_split_across_log_lines_of_a_warm_start(capsys):
+    reset_invocation_metrics()
+    emit_invocation_metrics("upload_dataset_to_kaggle", 1.0)
+    reset_invocation_metrics()
+    for _ in range(150):
+        record_metric("RecordsProduced", 1)
+
+    emit_invocation_metrics("upload_dataset_to_kaggle", 1.0)
+
+    first_log_line, second_log_line = _get_emitted_log_lines(capsys)[1:]
+    assert len(first_log_line["RecordsProduced"]) == 100
+    assert len(second_log_line["RecordsProduced"]) == 50
+    assert first_log_line["ColdStart"] == 0
+    assert "ColdStart" not in second_log_line
+    assert [metric["Name"] for metric in second_log_line["_aws"]["CloudWatchMetrics"][0]["Metrics"]] == ["RecordsProduced"]
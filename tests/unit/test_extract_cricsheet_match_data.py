@@ -0,0 +1,22 @@
+import io
+import pytest
+from mens_t20i_data_collector._lambdas.extract_cricsheet_match_data.extract_cricsheet_match_data_lambda_function import (
+    CricsheetMatchDataExtractionHandler
+)
+
+
+def test_files_missing_from_a_truncated_bundle_have_no_line():
+    bundle_file = io.BytesIO(b'{"match": 1001}\n{"match": 1002}\n')
+
+    lines_of_files = list(CricsheetMatchDataExtractionHandler._get_lines_of_files_of_bundle(  # pylint: disable=protected-access
+        bundle_file, ["1001.json", "1002.json", "1003.json"]
+    ))
+
+    assert lines_of_files == [("1001.json", b'{"match": 1001}\n'), ("1002.json", b'{"match": 1002}\n'), ("1003.json", None)]
+
+
+def test_bundle_with_more_lines_than_files_is_rejected():
+    bundle_file = io.BytesIO(b'{"match": 1001}\n{"match": 1002}\n')
+
+    with pytest.raises(ValueError):
+        list(CricsheetMatchDataExtractionHandler._get_lines_of_files_of_bundle(bundle_file, ["1001.json"]))  # pylint: disable=protected-access
@@ -0,0 +1,28 @@
+import json
+import sys
+import pytest
+from build.extraction_benchmark import run_extraction_benchmark
+
+
+def test_benchmark_results_are_saved_and_compared_against_the_baseline(tmp_path, monkeypatch):
+    results_path = tmp_path / "results.json"
+    monkeypatch.setattr(sys, "argv", ["run_extraction_benchmark", "--output", str(results_path), "--runs", "1", "--dataset-matches", "5"])
+
+    run_extraction_benchmark()
+
+    benchmarks = json.loads(results_path.read_text())["benchmarks"]
+    assert "parse_deliveries/super_over" in benchmarks
+    assert "decode_json_typed/dls_affected" in benchmarks
+    assert "create_composite_delivery_keys/many_extras" in benchmarks
+    assert "encode_deliverywise_csv/5_matches" in benchmarks
+    assert all(result["median_in_microseconds"] > 0 for result in benchmarks.values())
+
+    baseline_path = tmp_path / "baseline.json"
+    baseline_path.write_text(json.dumps({"benchmarks": {
+        name: {**result, "median_in_microseconds": result["median_in_microseconds"] / 100} for name, result in benchmarks.items()
+    }}))
+    monkeypatch.setattr(sys, "argv", [
+        "run_extraction_benchmark", "--output", str(tmp_path / "rerun.json"), "--baseline", str(baseline_path), "--runs", "1", "--dataset-matches", "5"
+    ])
+    with pytest.raises(SystemExit):
+        run_extraction_benchmark()
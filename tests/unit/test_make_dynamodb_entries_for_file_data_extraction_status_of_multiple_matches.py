@@ -0,0 +1,61 @@
+from types import SimpleNamespace
+from botocore.exceptions import ClientError
+from mens_t20i_data_collector._lambdas.utils import (
+    make_dynamodb_entries_for_file_data_extraction_status_of_multiple_matches
+)
+
+
+class _TransactionRecordingTable:
+
+    def __init__(self, fail_transactions=False, failing_file_names=()):
+        self.name = "status_table"
+        self.meta = SimpleNamespace(client=self)
+        self._fail_transactions = fail_transactions
+        self._failing_file_names = set(failing_file_names)
+        self.transactions = []
+        self.updates = []
+
+    def transact_write_items(self, TransactItems):  # pylint: disable=invalid-name
+        if self._fail_transactions:
+            raise ClientError({"Error": {"Code": "TransactionCanceledException", "Message": "cancelled"}}, "TransactWriteItems")
+        self.transactions.append(TransactItems)
+
+    def update_item(self, Key, **kwargs):  # pylint: disable=invalid-name
+        if Key["file_name"] in self._failing_file_names:
+            raise ClientError({"Error": {"Code": "ValidationException", "Message": "invalid"}}, "UpdateItem")
+        self.updates.append((Key, kwargs))
+
+
+def test_entries_are_written_in_transactions_with_timestamps_source_etags_and_content_crc32s():
+    table = _TransactionRecordingTable()
+    match_ids_by_message_id = {f"message-{match_id}": match_id for match_id in range(150)}
+    match_ids_by_message_id["duplicate-message"] = 7
+
+    failed_message_ids = make_dynamodb_entries_for_file_data_extraction_status_of_multiple_matches(
+        table, match_ids_by_message_id, ["matchwise_data_extraction_status"], {7: '"etag"'}, {7: 3735928559}
+    )
+
+    assert failed_message_ids == []
+    assert [len(transaction) for transaction in table.transactions] == [100, 50]
+    assert table.updates == []
+    update = next(item["Update"] for item in table.transactions[0] if item["Update"]["Key"] == {"file_name": "7.json"})
+    assert update["TableName"] == "status_table"
+    assert update["UpdateExpression"] == (
+        "set matchwise_data_extraction_status = :status, matchwise_data_extraction_status_updated_at = :updated_at, source_etag = :source_etag, "
+        "content_crc32 = :content_crc32"
+    )
+    assert update["ExpressionAttributeValues"][":source_etag"] == '"etag"'
+    assert update["ExpressionAttributeValues"][":content_crc32"] == 3735928559
+
+
+def test_entries_of_a_failed_transaction_are_written_one_at_a_time():
+    table = _TransactionRecordingTable(fail_transactions=True, failing_file_names=["2.json"])
+
+    failed_message_ids = make_dynamodb_entries_for_file_data_extraction_status_of_multiple_matches(
+        table, {"a": 1, "b": 2, "c": 3, "d": 2}, ["deliverywise_data_extraction_status", "matchwise_data_extraction_status"]
+    )
+
+    assert failed_message_ids == ["b", "d"]
+    assert [key for key, _ in table.updates] == [{"file_name": "1.json"}, {"file_name": "3.json"}]
+    assert "source_etag" not in table.updates[0][1]["UpdateExpression"]
+    assert "content_crc32" not in table.updates[0][1]["UpdateExpression"]
@@ -0,0 +1,145 @@
+import json
+import boto3
+import pytest
+from moto import mock_aws
+from mens_t20i_data_collector._lambdas import client_registry, utils
+from mens_t20i_data_collector._lambdas.notification_digest import (
+    NotificationDigest
+)
+from mens_t20i_data_collector._lambdas.send_notification_digest import (
+    send_notification_digest_lambda
+)
+from mens_t20i_data_collector._lambdas.utils import exception_handler
+
+
+class _StandInTelegram:
+
+    """Stand-in of the Telegram bot, which records the sent messages."""
+
+    def __init__(self, is_available=True):
+        self.is_available = is_available
+        self.messages = []
+
+    def send_alert_via_telegram_bot(self, chat_id, message, telegram_bot_token):  # pylint: disable=unused-argument
+        self.messages.append(message)
+        return self.is_available
+
+
+@pytest.fixture(name="queue_url")
+def notification_digest_queue_url(monkeypatch):
+    for variable_name, value in {
+        "AWS_DEFAULT_REGION": "us-east-1",
+        "ENABLE_TELEGRAM_NOTIFICATION_DIGEST": "true",
+        "TELEGRAM_BOT_TOKEN": "bot-token",
+        "TELEGRAM_CHAT_ID": "chat-id",
+    }.items():
+        monkeypatch.setenv(variable_name, value)
+    client_registry.reset_client_registry()
+    with mock_aws():
+        queue_url = boto3.client("sqs").create_queue(QueueName="notification-digest")["QueueUrl"]
+        monkeypatch.setenv("TELEGRAM_NOTIFICATION_QUEUE_URL", queue_url)
+        yield queue_url
+    client_registry.reset_client_registry()
+
+
+def _get_queued_events(queue_url):
+    messages = boto3.client("sqs").receive_message(QueueUrl=queue_url, MaxNumberOfMessages=10).get("Messages", [])
+    return [json.loads(message["Body"]) for message in messages]
+
+
+def _invoke_handler_returning(response_or_error):
+    @exception_handler
+    def handler(_, __):
+        if isinstance(response_or_error, Exception):
+            raise response_or_error
+        return response_or_error
+
+    return handler({}, None)
+
+
+def test_status_of_a_handler_is_queued_for_the_digest(queue_url, monkeypatch):
+    stand_in_telegram = _StandInTelegram()
+    monkeypatch.setattr(utils, "send_alert_via_telegram_bot", stand_in_telegram.send_alert_via_telegram_bot)
+
+    _invoke_handler_returning("Match extracted")
+    _invoke_handler_returning({"message": "1 of 2 matches extracted", "batchItemFailures": [{"itemIdentifier": "b"}]})
+
+    assert [(event["status"], event["message"]) for event in _get_queued_events(queue_url)] == [
+        ("SUCCESS", "Match extracted"), ("FAILURE", "1 of 2 matches extracted")
+    ]
+    assert not stand_in_telegram.messages
+
+
+def test_critical_failure_of_a_handler_bypasses_the_digest(queue_url, monkeypatch):
+    stand_in_telegram = _StandInTelegram()
+    monkeypatch.setattr(utils, "send_alert_via_telegram_bot", stand_in_telegram.send_alert_via_telegram_bot)
+
+    response = _invoke_handler_returning(RuntimeError("MongoDB is unreachable"))
+
+    assert response["statusCode"] == 500
+    assert not _get_queued_events(queue_url)
+    assert len(stand_in_telegram.messages) == 1
+    assert "ERROR ❌" in stand_in_telegram.messages[0] and "MongoDB is unreachable" in stand_in_telegram.messages[0]
+
+
+@pytest.mark.parametrize("response, execution_status", [
+    ("Match extracted", "SUCCESS ✅"),
+    ({"message": "1 of 2 matches extracted", "batchItemFailures": [{"itemIdentifier": "b"}]}, "PARTIAL FAILURE ⚠️"),
+    (RuntimeError("MongoDB is unreachable"), "ERROR ❌"),
+])
+def test_status_is_sent_right_away_with_the_label_of_its_severity_when_the_digest_is_disabled(monkeypatch, response, execution_status):
+    monkeypatch.setenv("ENABLE_TELEGRAM_NOTIFICATION_DIGEST", "false")
+    monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "bot-token")
+    monkeypatch.setenv("TELEGRAM_CHAT_ID", "chat-id")
+    stand_in_telegram = _StandInTelegram()
+    monkeypatch.setattr(utils, "send_alert_via_telegram_bot", stand_in_telegram.send_alert_via_telegram_bot)
+
+    _invoke_handler_returning(response)
+
+    assert len(stand_in_telegram.messages) == 1
+    assert f"<b> Execution Status :</b> {execution_status}" in stand_in_telegram.messages[0]
+
+
+def test_digest_counts_the_events_of_every_lambda_and_lists_the_first_failures():
+    notification_digest = NotificationDigest()
+    for timestamp, function_name, status, message in [
+        ("2024-01-01 00:02:00", "extract", "FAILURE", "1 of 2 matches extracted"),
+        ("2024-01-01 00:00:00", "download", "SUCCESS", "Downloaded"),
+        ("2024-01-01 00:01:00", "extract", "SUCCESS", "Match extracted"),
+    ]:
+        notification_digest.add({"timestamp": timestamp, "function_name": function_name, "status": status, "message": message})
+
+    message = notification_digest.to_message()
+
+    assert len(notification_digest) == 3
+    assert "2024-01-01 00:00:00 - 2024-01-01 00:02:00" in message
+    assert "• download: 1 ✅ / 0 ❌" in message
+    assert "• extract: 1 ✅ / 1 ❌" in message
+    assert "• 2024-01-01 00:02:00 extract: 1 of 2 matches extracted" in message
+
+
+def test_digest_flush_sends_the_queued_events_and_deletes_them(queue_url, monkeypatch):
+    stand_in_telegram = _StandInTelegram()
+    monkeypatch.setattr(utils, "send_alert_via_telegram_bot", stand_in_telegram.send_alert_via_telegram_bot)
+    monkeypatch.setattr(send_notification_digest_lambda, "send_alert_via_telegram_bot", stand_in_telegram.send_alert_via_telegram_bot)
+    _invoke_handler_returning("Match extracted")
+    _invoke_handler_returning("Match extracted")
+
+    response = send_notification_digest_lambda.handler(None, None)
+
+    assert response["body"] == "Notification digest of 2 execution status events sent."
+    assert len(stand_in_telegram.messages) == 1
+    assert "2 ✅ / 0 ❌" in stand_in_telegram.messages[0]
+    assert not _get_queued_events(queue_url)
+
+
+def test_queued_events_are_kept_for_the_next_digest_when_it_is_not_sent(queue_url, monkeypatch):
+    monkeypatch.setattr(utils, "send_alert_via_telegram_bot", _StandInTelegram().send_alert_via_telegram_bot)
+    monkeypatch.setattr(send_notification_digest_lambda, "send_alert_via_telegram_bot", _StandInTelegram(is_available=False).send_alert_via_telegram_bot)
+    _invoke_handler_returning("Match extracted")
+
+    with pytest.raises(RuntimeError):
+        send_notification_digest_lambda.handler(None, None)
+
+    queue_attributes = boto3.client("sqs").get_queue_attributes(QueueUrl=queue_url, AttributeNames=["All"])["Attributes"]
+    assert int(queue_attributes["ApproximateNumberOfMessages"]) + int(queue_attributes["ApproximateNumberOfMessagesNotVisible"]) == 1
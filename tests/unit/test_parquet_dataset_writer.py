@@ -0,0 +1,66 @@
+import datetime
+import io
+import boto3
+import pandas as pd
+import pyarrow.parquet as pq
+from moto import mock_aws
+from mens_t20i_data_collector._lambdas.constants import (
+    DELIVERYWISE_DATAFRAME_COLUMNS,
+    DELIVERYWISE_DATAFRAME_INTEGER_COLUMNS
+)
+from mens_t20i_data_collector._lambdas.parquet_dataset_writer import (
+    ParquetDatasetWriter,
+    get_deliverywise_data_arrow_schema,
+    get_matchwise_data_arrow_schema
+)
+
+DOWNLOAD_BUCKET_NAME = "mens-t20i-dataset-test"
+
+
+def _get_deliverywise_dataframe(match_id, match_number, batters):
+    empty_delivery = {column: 0 if column in DELIVERYWISE_DATAFRAME_INTEGER_COLUMNS else "" for column in DELIVERYWISE_DATAFRAME_COLUMNS}
+    return pd.DataFrame([
+        {**empty_delivery, "match_id": match_id, "ball_number": ball_number, "batter": batter, "player_dismissed": None, "match_number": match_number}
+        for ball_number, batter in enumerate(batters, start=1)
+    ])
+
+
+def _write_and_read_back(key, schema, dataframes, monkeypatch):
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    with mock_aws():
+        s3_client = boto3.client("s3")
+        s3_client.create_bucket(Bucket=DOWNLOAD_BUCKET_NAME)
+        with ParquetDatasetWriter(s3_client, DOWNLOAD_BUCKET_NAME, key, schema) as writer:
+            for dataframe in dataframes:
+                writer.write(dataframe)
+        parquet_file = pq.ParquetFile(io.BytesIO(s3_client.get_object(Bucket=DOWNLOAD_BUCKET_NAME, Key=key)["Body"].read()))
+    return parquet_file
+
+
+def test_written_deliverywise_chunks_are_read_back_with_the_schema_of_the_dataset(monkeypatch):
+    parquet_file = _write_and_read_back(
+        "output/deliverywise_data.parquet",
+        get_deliverywise_data_arrow_schema(),
+        [_get_deliverywise_dataframe(1001, 1, ["V Kohli", "NA"]), _get_deliverywise_dataframe(1002, 2, ["V Kohli"])],
+        monkeypatch
+    )
+
+    table = parquet_file.read()
+    assert table.schema.equals(get_deliverywise_data_arrow_schema())
+    assert parquet_file.metadata.num_row_groups == 2
+    assert table.column("match_id").to_pylist() == [1001, 1001, 1002]
+    assert table.column("batter").to_pylist() == ["V Kohli", "NA", "V Kohli"]
+    assert table.column("player_dismissed").to_pylist() == [None, None, None]
+    assert table.column("match_number").to_pylist() == [1, 1, 2]
+
+
+def test_written_matchwise_data_is_read_back_with_typed_dates(monkeypatch):
+    matchwise_dataframe = pd.DataFrame([{field.name: None for field in get_matchwise_data_arrow_schema()}])
+    matchwise_dataframe[["match_number", "match_id", "date", "team_1", "team_1_total_runs"]] = [[1, 1001, "2024-01-01", "India", 180]]
+
+    table = _write_and_read_back("output/matchwise_data.parquet", get_matchwise_data_arrow_schema(), [matchwise_dataframe], monkeypatch).read()
+
+    assert table.to_pylist()[0] == {
+        **{field.name: None for field in get_matchwise_data_arrow_schema()},
+        "match_number": 1, "match_id": 1001, "date": datetime.date(2024, 1, 1), "team_1": "India", "team_1_total_runs": 180
+    }
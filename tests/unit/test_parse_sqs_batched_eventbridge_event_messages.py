@@ -0,0 +1,72 @@
+import json
+import pytest
+from mens_t20i_data_collector._lambdas import utils
+from mens_t20i_data_collector._lambdas.utils import (
+    exception_handler,
+    parse_sqs_batched_eventbridge_event_messages
+)
+
+
+@pytest.fixture(autouse=True)
+def stand_in_telegram(monkeypatch):
+    monkeypatch.setenv("ENABLE_TELEGRAM_NOTIFICATION_DIGEST", "false")
+    monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "bot-token")
+    monkeypatch.setenv("TELEGRAM_CHAT_ID", "chat-id")
+    monkeypatch.setattr(utils, "send_alert_via_telegram_bot", lambda **_: True)
+
+
+def _get_sqs_record(message_id, json_file_key):
+    return {"messageId": message_id, "body": json.dumps({"detail": {"object": {"key": json_file_key}}})}
+
+
+def test_only_the_failed_messages_of_a_batch_are_reported():
+    s3_objects_of_handler = []
+
+    def extract(s3_objects):
+        s3_objects_of_handler.append(s3_objects)
+        return "1 of 2 matches extracted", ["b"]
+
+    handler = exception_handler(parse_sqs_batched_eventbridge_event_messages(extract))
+
+    response = handler({"Records": [
+        _get_sqs_record("a", "cricsheet_data/processed_data/1001.json"), _get_sqs_record("b", "cricsheet_data/processed_data/1002.json")
+    ]}, None)
+
+    assert s3_objects_of_handler == [{
+        "a": ("cricsheet_data/processed_data/1001.json", 1001), "b": ("cricsheet_data/processed_data/1002.json", 1002)
+    }]
+    assert response == {"statusCode": 200, "body": "1 of 2 matches extracted", "batchItemFailures": [{"itemIdentifier": "b"}]}
+
+
+@pytest.mark.parametrize("malformed_record", [
+    {"messageId": "b", "body": "not json"},
+    {"messageId": "b", "body": json.dumps({"detail": {}})},
+    _get_sqs_record("b", "cricsheet_data/processed_data/readme.txt"),
+])
+def test_malformed_message_is_reported_without_reaching_the_handler(malformed_record):
+    s3_objects_of_handler = []
+
+    def extract(s3_objects):
+        s3_objects_of_handler.append(s3_objects)
+        return "1 of 1 matches extracted", []
+
+    handler = exception_handler(parse_sqs_batched_eventbridge_event_messages(extract))
+
+    response = handler({"Records": [_get_sqs_record("a", "cricsheet_data/processed_data/1001.json"), malformed_record]}, None)
+
+    assert list(s3_objects_of_handler[0]) == ["a"]
+    assert response["batchItemFailures"] == [{"itemIdentifier": "b"}]
+
+
+def test_every_message_of_the_batch_is_retried_when_the_handler_fails():
+    def extract(_):
+        raise RuntimeError("MongoDB is unreachable")
+
+    handler = exception_handler(parse_sqs_batched_eventbridge_event_messages(extract))
+
+    response = handler({"Records": [
+        _get_sqs_record("a", "cricsheet_data/processed_data/1001.json"), _get_sqs_record("b", "cricsheet_data/processed_data/1002.json")
+    ]}, None)
+
+    assert response["statusCode"] == 500
+    assert response["batchItemFailures"] == [{"itemIdentifier": "a"}, {"itemIdentifier": "b"}]
@@ -0,0 +1,88 @@
+import io
+from decimal import Decimal
+from mens_t20i_data_collector._lambdas.processed_files_manifest import (
+    ProcessedFilesManifest,
+    list_content_crc32s_of_all_files_from_dynamodb
+)
+
+
+class _PaginatedTable:
+
+    def __init__(self, pages, content_crc32s_by_file_name=None):
+        self._pages = pages
+        self._content_crc32s_by_file_name = content_crc32s_by_file_name or {}
+        self.scan_calls = []
+
+    def scan(self, **kwargs):
+        self.scan_calls.append(kwargs)
+        page_number = kwargs.get("ExclusiveStartKey", {}).get("page", 0)
+        response = {"Items": [
+            {"file_name": file_name, **({"content_crc32": Decimal(self._content_crc32s_by_file_name[file_name])} if file_name in self._content_crc32s_by_file_name else {})}
+            for file_name in self._pages[page_number]
+        ]}
+        if page_number + 1 < len(self._pages):
+            response["LastEvaluatedKey"] = {"page": page_number + 1}
+        return response
+
+
+def test_scan_follows_pagination():
+    table = _PaginatedTable([["1.json", "2.json"], ["3.json"], ["4.json"]], {"2.json": 3735928559})
+
+    assert list_content_crc32s_of_all_files_from_dynamodb(table) == {"1.json": None, "2.json": 3735928559, "3.json": None, "4.json": None}
+    assert len(table.scan_calls) == 3
+
+
+def test_manifest_rebuild_skips_files_not_named_after_a_match_id():
+    manifest = ProcessedFilesManifest(s3_client=None, s3_bucket_name="bucket")
+    manifest.rebuild_from_dynamodb(_PaginatedTable([["1001.json", "README.txt"], ["1002.json"]]))
+
+    assert len(manifest) == 2
+    assert "1001.json" in manifest
+    assert "1003.json" not in manifest
+
+
+class _InMemoryS3Client:
+
+    class exceptions:  # pylint: disable=invalid-name
+        NoSuchKey = KeyError
+
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, Bucket, Key, Body):  # pylint: disable=invalid-name
+        self.objects[(Bucket, Key)] = Body
+
+    def get_object(self, Bucket, Key):  # pylint: disable=invalid-name
+        return {"Body": io.BytesIO(self.objects[(Bucket, Key)])}
+
+
+def test_content_crc32s_survive_a_round_trip_through_s3():
+    s3_client = _InMemoryS3Client()
+    manifest = ProcessedFilesManifest(s3_client=s3_client, s3_bucket_name="bucket")
+    manifest.add({"1002.json": 4294967295, "1001.json": None})
+    manifest.save()
+
+    reloaded_manifest = ProcessedFilesManifest(s3_client=s3_client, s3_bucket_name="bucket")
+    reloaded_manifest.load()
+
+    assert len(reloaded_manifest) == 2
+    assert reloaded_manifest.get_content_crc32("1002.json") == 4294967295
+    assert "1001.json" in reloaded_manifest
+    assert reloaded_manifest.get_content_crc32("1001.json") is None
+    assert reloaded_manifest.get_content_crc32("1003.json") is None
+
+
+def test_manifests_stored_under_other_file_names_are_kept_apart():
+    s3_client = _InMemoryS3Client()
+    processed_files_manifest = ProcessedFilesManifest(s3_client=s3_client, s3_bucket_name="bucket")
+    processed_files_manifest.add({"1001.json": 1})
+    processed_files_manifest.save()
+    rejected_files_manifest = ProcessedFilesManifest(s3_client=s3_client, s3_bucket_name="bucket", manifest_file_name="rejected.bin")
+    rejected_files_manifest.add({"1002.json": 2})
+    rejected_files_manifest.save()
+
+    processed_files_manifest.load()
+    rejected_files_manifest.load()
+
+    assert "1001.json" in processed_files_manifest and "1002.json" not in processed_files_manifest
+    assert rejected_files_manifest.get_content_crc32("1002.json") == 2 and "1001.json" not in rejected_files_manifest
@@ -0,0 +1,29 @@
+import json
+import sys
+import zipfile
+import pandas as pd
+import pytest
+from build.run_pipeline_locally import run_pipeline_locally
+from tests.unit.test_cricsheet_match_data_parser import (
+    CRICSHEET_MATCH_JSON_DATA
+)
+
+
+@pytest.mark.parametrize("arguments", [
+    [],
+    ["--upload-mode", "bundle"],
+    ["--extraction-mode", "unified", "--sqs-batch-size", "2", "--dataset-output-compression", "gzip"],
+])
+def test_pipeline_publishes_every_match_of_the_cricsheet_archive(tmp_path, monkeypatch, arguments):
+    cricsheet_zip_path = tmp_path / "t20s_male_json.zip"
+    with zipfile.ZipFile(cricsheet_zip_path, "w") as cricsheet_zip_file:
+        for match_id in (1001, 1002, 1003):
+            cricsheet_zip_file.writestr(f"{match_id}.json", json.dumps(CRICSHEET_MATCH_JSON_DATA))
+    output_folder = tmp_path / "output"
+    monkeypatch.setattr(sys, "argv", ["run_pipeline_locally", "--cricsheet-zip", str(cricsheet_zip_path), "--output-folder", str(output_folder), *arguments])
+
+    run_pipeline_locally()
+
+    matchwise_data = pd.read_csv(output_folder / ("matchwise_data.csv.gz" if "gzip" in arguments else "matchwise_data.csv"))
+    assert sorted(matchwise_data["match_id"]) == [1001, 1002, 1003]
+    assert json.loads((output_folder / "dataset-metadata.json").read_text())["id"] == "local/mens-t20i-dataset"
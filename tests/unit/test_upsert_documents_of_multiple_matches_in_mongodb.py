@@ -0,0 +1,52 @@
+from pymongo import DeleteMany, ReplaceOne
+from pymongo.errors import BulkWriteError
+from mens_t20i_data_collector._lambdas.utils import (
+    upsert_documents_of_multiple_matches_in_mongodb
+)
+
+
+class _BulkWriteRecordingCollection:
+
+    def __init__(self, write_errors_by_chunk=None):
+        self._write_errors_by_chunk = write_errors_by_chunk or {}
+        self.bulk_writes = []
+        self.indexes = []
+
+    def create_index(self, keys):
+        self.indexes.append(keys)
+
+    def bulk_write(self, operations, ordered):
+        self.bulk_writes.append((operations, ordered))
+        write_errors = self._write_errors_by_chunk.get(len(self.bulk_writes) - 1)
+        if write_errors:
+            raise BulkWriteError({"writeErrors": write_errors})
+
+
+def _get_deliveries_of_match(match_id, number_of_deliveries):
+    return [{"_id": f"({match_id}, 1, 0, {ball_number})", "match_id": match_id} for ball_number in range(1, number_of_deliveries + 1)]
+
+
+def test_upserts_are_sent_unordered_in_chunks_with_a_cleanup_of_stale_deliveries():
+    collection = _BulkWriteRecordingCollection()
+
+    failed_message_ids = upsert_documents_of_multiple_matches_in_mongodb(
+        collection, {"a": _get_deliveries_of_match(1, 3), "b": _get_deliveries_of_match(2, 2)}, chunk_size=4, remove_stale_documents=True
+    )
+
+    assert failed_message_ids == []
+    assert collection.indexes == ["match_id"]
+    assert [len(operations) for operations, _ in collection.bulk_writes] == [4, 3]
+    assert all(not ordered for _, ordered in collection.bulk_writes)
+    operations = collection.bulk_writes[0][0] + collection.bulk_writes[1][0]
+    assert operations[0] == ReplaceOne({"_id": "(1, 1, 0, 1)"}, _get_deliveries_of_match(1, 3)[0], upsert=True)
+    assert operations[3] == DeleteMany({"match_id": 1, "_id": {"$nin": ["(1, 1, 0, 1)", "(1, 1, 0, 2)", "(1, 1, 0, 3)"]}})
+
+
+def test_write_errors_are_mapped_to_the_matches_of_their_chunk():
+    collection = _BulkWriteRecordingCollection({1: [{"index": 0, "code": 2, "errmsg": "failed"}, {"index": 1, "code": 11000, "errmsg": "duplicate"}]})
+
+    failed_message_ids = upsert_documents_of_multiple_matches_in_mongodb(
+        collection, {"a": _get_deliveries_of_match(1, 2), "b": _get_deliveries_of_match(2, 2), "c": _get_deliveries_of_match(3, 2)}, chunk_size=2
+    )
+
+    assert failed_message_ids == ["b"]